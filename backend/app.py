@@ -14,8 +14,15 @@ load_dotenv()
 from flask import Flask
 from flask_sock import Sock
 import mediapipe as mp
-import pickle
+from asl_classifier import load_classifier
+from batch_classifier import BatchClassifier
+from model_registry import ModelRegistry
 from hand_detection_contrast_enhanced import ContrastEnhancedHandDetector
+from frame_pyramid import FramePyramid
+from hand_observation import HandObservation
+from prediction_cache import PredictionCache, combined_stats
+from session_recorder import SessionRecorder
+from temporal_filter import OneEuroFilter, TemporalLandmarkFilter
 
 app = Flask(__name__)
 sock = Sock(app)
@@ -23,6 +30,32 @@ sock = Sock(app)
 # Inicializar el detector súper avanzado
 hand_detector = ContrastEnhancedHandDetector()
 
+# Detección especulativa opcional: en estado difícil lanza las dos
+# configuraciones en paralelo (más CPU a cambio de menos latencia)
+if os.getenv("SPECULATIVE_DETECTION", "false").lower() == "true":
+    hand_detector.detection_cascade.enable_speculative()
+
+# Filtro temporal de los keypoints enviados al cliente (por sesión):
+# "average" (media ponderada de ventana), "one_euro" u "off"
+LANDMARK_FILTER = os.getenv("LANDMARK_FILTER", "average").lower()
+
+# Confianza de las detecciones para el filtro temporal. mp.solutions.hands
+# no expone la confianza de detección o presencia de cada mano (hand.score es
+# la de lateralidad izquierda/derecha, no la calidad de los landmarks); las
+# manos que llegan al filtro ya superaron min_detection_confidence y la
+# validación, así que todas pesan igual
+DETECTED_HAND_CONFIDENCE = 1.0
+
+# Directorio donde grabar los landmarks de cada sesión (vacío: no grabar)
+SESSION_RECORD_DIR = os.getenv("SESSION_RECORD_DIR", "")
+
+def create_landmark_filter():
+    """Filtro temporal nuevo para una sesión (None si está desactivado)"""
+    if LANDMARK_FILTER == "off":
+        return None
+    one_euro = OneEuroFilter() if LANDMARK_FILTER == "one_euro" else None
+    return TemporalLandmarkFilter(one_euro=one_euro)
+
 # MediaPipe setup (mantener para compatibilidad)
 mp_hands = mp.solutions.hands
 
@@ -82,36 +115,48 @@ def send_metrics(measurement, tags=None, fields=None):
         # Silenciar errores de métricas para no afectar rendimiento
         pass
 
-# Load ASL classification model with better error handling
+# Load ASL classification model: NumPy export by default, pickle as fallback
 def load_model():
-    try:
-        with open("asl_model.pkl", "rb") as f:
-            model = pickle.load(f)
-        print("ASL model loaded successfully")
-        return model
-    except FileNotFoundError:
-        print("Warning: ASL model 'asl_model.pkl' not found. Classification disabled.")
-        return None
-    except Exception as e:
-        print(f"Error loading model: {e}")
-        return None
+    return load_classifier("asl_model.npz", "asl_model.pkl")
     
-# Load ASL classification model with better error handling
 asl_model = load_model()
 
-def _extract_features(hand_landmarks):
-    """Return a flat array of landmark coordinates."""
-    feats = []
-    for lm in hand_landmarks.landmark:
-        feats.extend([lm.x, lm.y, lm.z])
-    return np.array(feats).reshape(1, -1)
+# Registro de modelos con recarga en caliente: si MODEL_DIR tiene versiones
+# publicadas se sirve la más reciente que pase la validación, y las nuevas
+# se cargan sin reiniciar el servidor (las sesiones leen asl_model en cada
+# predicción)
+def _swap_model(model):
+    global asl_model
+    asl_model = model
+    if classifier_batcher is not None:
+        classifier_batcher.model = model
+
+classifier_batcher = None
+model_registry = ModelRegistry(os.getenv("MODEL_DIR", "models"), on_swap=_swap_model,
+                               initial_model=asl_model)
+model_registry.start()
+
+# Clasificación por lotes entre sesiones (true/false), con espera máxima
+# por lote y filas máximas por lote
+if asl_model is not None and os.getenv("CLASSIFIER_BATCHING", "false").lower() == "true":
+    classifier_batcher = BatchClassifier(
+        asl_model,
+        max_batch=int(os.getenv("CLASSIFIER_MAX_BATCH", "64")),
+        max_wait_ms=float(os.getenv("CLASSIFIER_BATCH_WAIT_MS", "0")),
+    )
 
-def predict_letter(hand_landmarks) -> str:
-    """Predict the ASL letter for the given hand landmarks."""
+def _extract_features(hand: HandObservation):
+    """Return a (1, 63) array of landmark coordinates (no copy)."""
+    return hand.features()
+
+def predict_letter(hand: HandObservation) -> str:
+    """Predict the ASL letter for the given hand observation."""
     if asl_model is None:
         return ""
-    features = _extract_features(hand_landmarks)
+    features = _extract_features(hand)
     try:
+        if classifier_batcher is not None:
+            return classifier_batcher.predict(features)
         return asl_model.predict(features)[0]
     except Exception:
         return ""
@@ -170,8 +215,25 @@ def process_video(ws):
     skin_similarity_scores = []
     last_stats_time = time.time()
     
+    # Filtros temporales de esta sesión, uno por posición de mano
+    landmark_filters = {}
+    filter_times = []
+    
+    # Caché de predicción de letra de esta sesión, una por posición de mano
+    prediction_caches = {}
+
+    # Estado de la cascada de detección de esta sesión (nivel, rachas, costes)
+    cascade_state = hand_detector.detection_cascade.new_state()
+
+    # Grabación opcional de landmarks para reentrenar (ver mine_sessions.py)
+    recorder = SessionRecorder(SESSION_RECORD_DIR) if SESSION_RECORD_DIR else None
+    
     while True:
-        data = ws.receive()
+        try:
+            data = ws.receive()
+        except Exception:
+            # Conexión cerrada por el cliente
+            data = None
         if not data:
             break
 
@@ -203,6 +265,7 @@ def process_video(ws):
             # Procesar datos de imagen
             image_rgb = None
             width, height = 640, 480  # Valores por defecto
+            rotation = 0
             
             # Try to parse as YUV data first
             yuv_result = parse_yuv_data(data)
@@ -216,6 +279,9 @@ def process_video(ws):
                 
                 if image_rgb is None:
                     continue
+                
+                # Pirámide compartida; el plano Y de NV21 sirve como gris
+                pyramid = FramePyramid.from_nv21(yuv_array, width, height, image_rgb)
                     
             else:
                 # Fallback: try to decode as JPEG
@@ -227,10 +293,13 @@ def process_video(ws):
                 # Convert BGR to RGB for JPEG fallback
                 image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 width, height = frame.shape[1], frame.shape[0]
+                pyramid = FramePyramid(image_rgb)
             
             # 🎯 DETECCIÓN ULTIMATE CON REALCE DE CONTRASTE
             start_detection = time.perf_counter()
-            results, detection_metadata = hand_detector.detect_hands_with_contrast_enhancement(image_rgb)
+            results, detection_metadata = hand_detector.detect_hands_with_contrast_enhancement(
+                image_rgb, pyramid, cascade_state
+            )
             end_detection = time.perf_counter()
             total_detection_time = (end_detection - start_detection) * 1000
             
@@ -254,32 +323,56 @@ def process_video(ws):
             letter = ""
             duration_asl_ms = 0
 
-            if results.multi_hand_landmarks:
-                for idx, hand_landmarks in enumerate(results.multi_hand_landmarks):
+            hand_observations = getattr(results, "hand_observations", None)
+            if hand_observations is None:
+                hand_observations = HandObservation.from_results(results)
+
+            if hand_observations:
+                for idx, hand in enumerate(hand_observations):
                     # Validación del detector súper avanzado
-                    if hand_detector.simple_landmark_validation(hand_landmarks, width, height):
-                        base = idx * len(hand_landmarks.landmark)
+                    if hand_detector.simple_landmark_validation(hand, width, height):
+                        base = idx * len(hand)
                         
-                        # Append keypoints
-                        for lm in hand_landmarks.landmark:
-                            x_px = int(lm.x * width)
-                            y_px = int(lm.y * height)
-                            keypoints.append([x_px, y_px])
+                        # Append keypoints (suavizados en el tiempo; la
+                        # predicción usa siempre los landmarks del fotograma)
+                        display_hand = hand
+                        if LANDMARK_FILTER != "off":
+                            start_filter = time.perf_counter()
+                            if idx not in landmark_filters:
+                                landmark_filters[idx] = create_landmark_filter()
+                            display_hand = HandObservation(
+                                landmark_filters[idx].filter(hand.points, DETECTED_HAND_CONFIDENCE, current_time)
+                            )
+                            filter_times.append((time.perf_counter() - start_filter) * 1000)
+                            if len(filter_times) > 50:
+                                filter_times.pop(0)
+                        keypoints.extend(display_hand.pixels(width, height).tolist())
 
                         # Offset the predefined topology
                         for start, end in DEFAULT_TOPOLOGY:
                             topology.append([start + base, end + base])
 
-                        # ASL prediction (con timing mínimo)
+                        # ASL prediction (con timing mínimo; se reutiliza la
+                        # última predicción si la pose no ha cambiado)
+                        if idx not in prediction_caches:
+                            prediction_caches[idx] = PredictionCache()
                         start_asl = time.perf_counter()
-                        letter = predict_letter(hand_landmarks)
+                        letter = prediction_caches[idx].predict(hand, predict_letter, current_time)
                         end_asl = time.perf_counter()
                         duration_asl_ms = (end_asl - start_asl) * 1000
 
+                        if recorder is not None:
+                            recorder.record(current_time, idx, hand, letter, width, height, rotation)
+
             # Enviar métricas súper detalladas (menos frecuentemente)
             if frame_count % 20 == 0:  # Solo cada 20 frames
                 avg_detection_time = float(np.mean(detection_times[-10:])) if detection_times else 0.0
                 avg_skin_similarity = float(np.mean(skin_similarity_scores[-10:])) if skin_similarity_scores else 0.0
+                speculative = hand_detector.detection_cascade.speculative
+                speculative_stats = speculative.stats() if speculative is not None else {}
+                prediction_stats = combined_stats(prediction_caches.values()) if prediction_caches else {}
+                batch_stats = classifier_batcher.stats() if classifier_batcher is not None else {}
+                registry_stats = model_registry.stats()
                 
                 send_metrics(
                     measurement="asl_processing_ultimate",
@@ -299,7 +392,13 @@ def process_video(ws):
                         "adaptive_gamma": float(detection_metadata.get("adaptive_gamma", 1.0)),
                         "adaptive_contrast": float(detection_metadata.get("adaptive_contrast", 1.0)),
                         "is_challenging_background": bool(skin_similarity.get("is_challenging_background", False)),
-                        "color_uniformity": float(skin_similarity.get("color_uniformity_rgb", 0))
+                        "color_uniformity": float(skin_similarity.get("color_uniformity_rgb", 0)),
+                        "cascade_level": int(detection_metadata.get("cascade_level", 0)),
+                        "landmark_filter_time_ms": float(np.mean(filter_times)) if filter_times else 0.0,
+                        **speculative_stats,
+                        **prediction_stats,
+                        **batch_stats,
+                        **registry_stats
                     }
                 )
 
@@ -351,6 +450,12 @@ def process_video(ws):
             print(f"Error processing frame {frame_count}: {e}")
             continue
 
+    if recorder is not None:
+        try:
+            recorder.close()
+        except Exception as e:
+            print(f"Error saving session recording: {e}")
+
 if __name__ == "__main__":
     print("🎯 Starting ULTIMATE Hand Detection Server")
     print("🚀 Specialized for challenging backgrounds with similar skin colors")
@@ -16,6 +16,7 @@ from flask_sock import Sock
 import mediapipe as mp
 import pickle
 from hand_detection_optimizer import HandDetectionOptimizer
+from temporal_filter import TemporalLandmarkFilter
 
 app = Flask(__name__)
 sock = Sock(app)
@@ -34,66 +35,6 @@ DEFAULT_TOPOLOGY = [
     for c in mp_hands.HAND_CONNECTIONS
 ]
 
-# Filtro temporal para suavizado de landmarks
-class TemporalLandmarkFilter:
-    def __init__(self, window_size=3, confidence_threshold=0.7):
-        self.window_size = window_size
-        self.confidence_threshold = confidence_threshold
-        self.landmark_history = []
-        self.confidence_history = []
-        
-    def add_detection(self, landmarks, confidence):
-        """Agregar nueva detección al historial"""
-        self.landmark_history.append(landmarks)
-        self.confidence_history.append(confidence)
-        
-        # Mantener solo el tamaño de ventana especificado
-        if len(self.landmark_history) > self.window_size:
-            self.landmark_history.pop(0)
-            self.confidence_history.pop(0)
-    
-    def get_filtered_landmarks(self):
-        """Obtener landmarks filtrados temporalmente"""
-        if not self.landmark_history:
-            return None
-            
-        # Si tenemos pocas detecciones, usar la más reciente
-        if len(self.landmark_history) < 2:
-            return self.landmark_history[-1]
-        
-        # Calcular promedio ponderado por confianza
-        total_weight = sum(self.confidence_history)
-        if total_weight == 0:
-            return self.landmark_history[-1]
-        
-        # Promedio ponderado de landmarks
-        averaged_landmarks = []
-        num_landmarks = len(self.landmark_history[-1])
-        
-        for i in range(num_landmarks):
-            x_sum = y_sum = z_sum = 0
-            
-            for j, landmarks in enumerate(self.landmark_history):
-                weight = self.confidence_history[j] / total_weight
-                x_sum += landmarks[i][0] * weight
-                y_sum += landmarks[i][1] * weight
-                z_sum += landmarks[i][2] * weight
-            
-            averaged_landmarks.append([x_sum, y_sum, z_sum])
-        
-        return averaged_landmarks
-    
-    def should_use_detection(self):
-        """Determinar si usar la detección actual basado en confianza histórica"""
-        if not self.confidence_history:
-            return True
-            
-        recent_confidence = np.mean(self.confidence_history[-2:]) if len(self.confidence_history) >= 2 else self.confidence_history[-1]
-        return recent_confidence >= self.confidence_threshold
-
-# Filtro temporal global
-temporal_filter = TemporalLandmarkFilter()
-
 # Simple metrics function
 def send_metrics(measurement, tags=None, fields=None):
     """Send metrics directly to Telegraf - ultra simple version"""
@@ -211,6 +152,9 @@ def process_video(ws):
     last_processed_time = 0
     processing_interval = 0.1  # Process maximum 10 FPS
     
+    # Filtro temporal propio de esta sesión
+    temporal_filter = TemporalLandmarkFilter()
+    
     while True:
         data = ws.receive()
         if not data:
@@ -292,9 +236,9 @@ def process_video(ws):
                         base = idx * len(hand_landmarks.landmark)
                         
                         # Extraer coordenadas para filtro temporal
-                        current_landmarks = []
-                        for lm in hand_landmarks.landmark:
-                            current_landmarks.append([lm.x, lm.y, lm.z])
+                        current_landmarks = np.array(
+                            [(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark], dtype=np.float32
+                        )
                         
                         # Calcular confianza basada en metadata de detección
                         detection_confidence = 1.0 - (detection_metadata["complexity_score"] / 100.0)
@@ -306,7 +250,7 @@ def process_video(ws):
                         # Usar filtro temporal si es apropiado
                         if temporal_filter.should_use_detection():
                             filtered_landmarks = temporal_filter.get_filtered_landmarks()
-                            if filtered_landmarks:
+                            if filtered_landmarks is not None:
                                 current_landmarks = filtered_landmarks
                         
                         # Append keypoints usando landmarks filtrados
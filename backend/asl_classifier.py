@@ -0,0 +1,228 @@
+"""
+NumPy-native inference for the ASL letter classifier.
+
+``export_linear_model`` writes the coefficients, intercepts and classes of a
+fitted scikit-learn linear classifier to a small versioned ``.npz``.
+``LinearClassifier`` loads that file and predicts with a single float32
+matmul and an argmax, without importing scikit-learn or paying its
+per-call input validation.
+
+``export_linear_model_dir`` writes the same model as a directory of raw
+``.npy`` files (see ``model_registry``) that ``LinearClassifier.load_dir``
+can memory-map, so several worker processes share one copy of the weights
+through the page cache.
+
+Both formats record the feature transform the model was trained on (see
+``hand_features``); ``LinearClassifier`` applies it, so callers always
+pass raw landmarks.
+
+Usage:
+    python asl_classifier.py asl_model.pkl asl_model.npz
+"""
+
+import json
+import os
+import pickle
+import sys
+from typing import Any, Optional, Sequence
+
+import numpy as np
+
+from hand_features import FEATURE_TRANSFORMS
+
+# Bump when the layout of the exported file changes
+EXPORT_FORMAT_VERSION = 2
+# Version 1 has no feature transform (raw landmarks)
+_READABLE_VERSIONS = (1, 2)
+
+DEFAULT_EXPORT_PATH = "asl_model.npz"
+DEFAULT_PICKLE_PATH = "asl_model.pkl"
+
+# Written last by export_linear_model_dir: a directory without it is incomplete
+MODEL_METADATA_FILE = "model.json"
+
+
+def model_probability_mode(model: Any) -> str:
+    """How the fitted model turns decision scores into probabilities."""
+    if isinstance(model, LinearClassifier):
+        return model.probability_mode
+    if len(model.classes_) == 2:
+        return "binary"
+    # SGDClassifier(loss="log_loss") normalizes one-vs-rest sigmoids
+    if hasattr(model, "loss"):
+        return "ovr"
+    multi_class = getattr(model, "multi_class", "auto")
+    if multi_class == "ovr" or getattr(model, "solver", "lbfgs") == "liblinear":
+        return "ovr"
+    return "softmax"
+
+
+def model_feature_transform(model: Any) -> str:
+    """Name of the ``FEATURE_TRANSFORMS`` entry the model's coef_ apply after."""
+    return getattr(model, "feature_transform", "raw")
+
+
+def export_linear_model(model: Any, path: str) -> None:
+    """Write a fitted linear classifier (e.g. LogisticRegression) to ``path``."""
+    np.savez(
+        path,
+        format_version=np.int32(EXPORT_FORMAT_VERSION),
+        coef=np.asarray(model.coef_, dtype=np.float32),
+        intercept=np.asarray(model.intercept_, dtype=np.float32),
+        classes=np.asarray(model.classes_).astype(str),
+        probability_mode=np.array(model_probability_mode(model)),
+        feature_transform=np.array(model_feature_transform(model)),
+    )
+
+
+def export_linear_model_dir(model: Any, directory: str) -> None:
+    """
+    Write a fitted linear classifier to ``directory`` as .npy files.
+
+    The weights are stored already transposed and contiguous so that a
+    memory-mapped load needs no copy.
+    """
+    os.makedirs(directory, exist_ok=True)
+    weights = np.ascontiguousarray(np.asarray(model.coef_, dtype=np.float32).T)
+    np.save(os.path.join(directory, "weights.npy"), weights)
+    np.save(os.path.join(directory, "intercept.npy"), np.asarray(model.intercept_, dtype=np.float32))
+    np.save(os.path.join(directory, "classes.npy"), np.asarray(model.classes_).astype(str))
+    metadata = {
+        "format_version": EXPORT_FORMAT_VERSION,
+        "probability_mode": model_probability_mode(model),
+        "feature_transform": model_feature_transform(model),
+    }
+    with open(os.path.join(directory, MODEL_METADATA_FILE), "w") as f:
+        json.dump(metadata, f)
+
+
+class LinearClassifier:
+    """Linear classifier evaluated with NumPy only."""
+
+    def __init__(self, coef: np.ndarray, intercept: np.ndarray, classes: Sequence[str],
+                 probability_mode: str = "softmax", feature_transform: str = "raw"):
+        # Stored transposed so that features @ weights is a contiguous matmul
+        # (no copy when ``coef`` is the transpose of a contiguous array)
+        self.weights = np.ascontiguousarray(np.asarray(coef, dtype=np.float32).T)
+        self.intercept = np.asarray(intercept, dtype=np.float32)
+        self.classes_ = np.asarray(classes)
+        self.probability_mode = probability_mode
+        self.n_features_in_ = self.weights.shape[0]
+        if feature_transform not in FEATURE_TRANSFORMS:
+            raise ValueError(f"Unknown feature transform '{feature_transform}'")
+        self.feature_transform = feature_transform
+        self._transform = FEATURE_TRANSFORMS[feature_transform]
+
+    @property
+    def coef_(self) -> np.ndarray:
+        return self.weights.T
+
+    @property
+    def intercept_(self) -> np.ndarray:
+        return self.intercept
+
+    @classmethod
+    def load(cls, path: str) -> "LinearClassifier":
+        """Load an export written by ``export_linear_model``."""
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["format_version"])
+            if version not in _READABLE_VERSIONS:
+                raise ValueError(f"Unsupported model export version {version} in {path}")
+            feature_transform = str(data["feature_transform"]) if "feature_transform" in data.files else "raw"
+            return cls(data["coef"], data["intercept"], data["classes"], str(data["probability_mode"]),
+                       feature_transform)
+
+    @classmethod
+    def load_dir(cls, directory: str, mmap: bool = True) -> "LinearClassifier":
+        """Load an export written by ``export_linear_model_dir``."""
+        with open(os.path.join(directory, MODEL_METADATA_FILE)) as f:
+            metadata = json.load(f)
+        version = int(metadata.get("format_version", -1))
+        if version not in _READABLE_VERSIONS:
+            raise ValueError(f"Unsupported model export version {version} in {directory}")
+        mmap_mode = "r" if mmap else None
+        weights = np.load(os.path.join(directory, "weights.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+        intercept = np.load(os.path.join(directory, "intercept.npy"), allow_pickle=False)
+        classes = np.load(os.path.join(directory, "classes.npy"), allow_pickle=False)
+        return cls(weights.T, intercept, classes, metadata["probability_mode"],
+                   metadata.get("feature_transform", "raw"))
+
+    def decision_function(self, features: np.ndarray) -> np.ndarray:
+        """Raw class scores, shape (n_samples, n_scores)."""
+        if self._transform is not None:
+            features = self._transform(features)
+        features = np.asarray(features, dtype=np.float32).reshape(-1, self.n_features_in_)
+        return features @ self.weights + self.intercept
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Predicted labels for a (n_samples, n_features) array."""
+        scores = self.decision_function(features)
+        if self.probability_mode == "binary":
+            return self.classes_[(scores[:, 0] > 0).astype(np.intp)]
+        return self.classes_[scores.argmax(axis=1)]
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """Class probabilities, matching the scikit-learn model's predict_proba."""
+        scores = self.decision_function(features)
+        if self.probability_mode == "binary":
+            positive = _sigmoid(scores[:, 0])
+            return np.stack([1.0 - positive, positive], axis=1)
+        if self.probability_mode == "ovr":
+            probabilities = _sigmoid(scores)
+            totals = probabilities.sum(axis=1, keepdims=True)
+            # Every sigmoid can underflow to 0: uniform, as scikit-learn does
+            all_zero = totals[:, 0] == 0
+            probabilities[all_zero] = 1.0
+            totals[all_zero] = probabilities.shape[1]
+            return probabilities / totals
+        scores = scores - scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+
+def _sigmoid(scores: np.ndarray) -> np.ndarray:
+    """Logistic function; exp overflows to inf (result 0) like scipy's expit."""
+    with np.errstate(over="ignore"):
+        return 1.0 / (1.0 + np.exp(-scores))
+
+
+def load_classifier(export_path: str = DEFAULT_EXPORT_PATH,
+                    pickle_path: str = DEFAULT_PICKLE_PATH) -> Optional[Any]:
+    """
+    Load the NumPy export if present, otherwise fall back to the pickled
+    scikit-learn model. Returns None if neither can be loaded.
+    """
+    if os.path.exists(export_path):
+        try:
+            model = LinearClassifier.load(export_path)
+            print(f"ASL model loaded from {export_path} (NumPy inference)")
+            return model
+        except Exception as e:
+            print(f"Error loading model export '{export_path}': {e}; trying pickle")
+
+    try:
+        with open(pickle_path, "rb") as f:
+            model = pickle.load(f)
+        print("ASL model loaded successfully")
+        return model
+    except FileNotFoundError:
+        print(f"Warning: ASL model '{pickle_path}' not found. Classification disabled.")
+        return None
+    except Exception as e:
+        print(f"Error loading model: {e}")
+        return None
+
+
+def main(pickle_path: str, export_path: str) -> None:
+    """Export a pickled scikit-learn model to the NumPy format."""
+    with open(pickle_path, "rb") as f:
+        model = pickle.load(f)
+    export_linear_model(model, export_path)
+    print(f"Model exported to {export_path}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python asl_classifier.py asl_model.pkl asl_model.npz")
+        sys.exit(1)
+    main(sys.argv[1], sys.argv[2])
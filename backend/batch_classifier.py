@@ -0,0 +1,147 @@
+"""
+Clasificación por lotes entre sesiones.
+
+Cada conexión WebSocket corre en su propio hilo y, sin este servicio,
+llama a ``asl_model.predict`` con una sola fila: con muchas sesiones
+simultáneas se paga el coste fijo de cada llamada una vez por mano y por
+fotograma. ``BatchClassifier`` recoge las filas de todas las sesiones en
+una cola, un hilo dedicado las agrupa y ejecuta un único ``predict`` por
+lote, y devuelve a cada sesión su resultado.
+
+Política de vaciado del lote (configurable):
+
+- max_batch: filas máximas por lote; al llegar se vacía sin esperar
+- max_wait_ms: espera máxima desde la primera fila pendiente. Solo se
+  espera si el lote anterior tenía más de una fila: con una única sesión
+  activa esperar solo añade latencia. Con 0 no se espera nunca y el lote
+  contiene las filas que se acumularon mientras se procesaba el anterior
+
+El traspaso entre hilos cuesta decenas de µs, así que el lote compensa con
+modelos de coste fijo alto por llamada (p. ej. el pickle de scikit-learn);
+con el modelo exportado a NumPy la llamada directa suele ser más barata.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class _Request:
+    """Fila pendiente de una sesión y su resultado"""
+
+    __slots__ = ("features", "result", "error", "done")
+
+    def __init__(self, features: np.ndarray):
+        self.features = features
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+
+class BatchClassifier:
+    """
+    Servicio de predicción compartido que agrupa filas de varias sesiones
+
+    - model: objeto con ``predict(X)`` y ``n_features_in_``
+    - max_batch: filas máximas por lote
+    - max_wait_ms: espera máxima para completar un lote
+    """
+
+    def __init__(self, model: Any, max_batch: int = 64, max_wait_ms: float = 0.0):
+        if max_batch < 1:
+            raise ValueError("max_batch debe ser al menos 1")
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+
+        self._buffer = np.zeros((max_batch, model.n_features_in_), dtype=np.float32)
+        self._pending: List[_Request] = []
+        self._cond = threading.Condition()
+        self._stopped = False
+
+        self.batches = 0
+        self.rows = 0
+        self._last_batch_size = 0
+        self.batch_ms: Optional[float] = None  # EMA del coste de predict() por lote
+
+        self._thread = threading.Thread(target=self._run, name="batch-classifier", daemon=True)
+        self._thread.start()
+
+    def predict(self, features: np.ndarray, timeout: Optional[float] = 1.0) -> Any:
+        """
+        Etiqueta de una fila de ``features`` (bloquea hasta que su lote se
+        procese). Propaga la excepción del modelo si el lote falla.
+        """
+        request = _Request(features)
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("BatchClassifier detenido")
+            self._pending.append(request)
+            # Despertar al hilo solo cuando empieza un lote o se llena
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._cond.notify()
+        if not request.done.wait(timeout):
+            raise TimeoutError("Sin respuesta del clasificador por lotes")
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+
+                # Esperar a más filas hasta llenar el lote o agotar la espera
+                # (solo si hay varias sesiones enviando filas)
+                deadline = time.perf_counter() + self.max_wait_s
+                while (len(self._pending) < self.max_batch and self._last_batch_size > 1
+                       and not self._stopped):
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            self._flush(batch)
+
+    def _flush(self, batch: List[_Request]):
+        """Ejecuta un predict para todo el lote y reparte los resultados"""
+        start = time.perf_counter()
+        try:
+            for row, request in enumerate(batch):
+                self._buffer[row] = request.features.reshape(-1)
+            labels = self.model.predict(self._buffer[:len(batch)])
+            for request, label in zip(batch, labels):
+                request.result = label
+        except Exception as e:
+            for request in batch:
+                request.error = e
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.batch_ms = elapsed_ms if self.batch_ms is None else 0.8 * self.batch_ms + 0.2 * elapsed_ms
+        self.batches += 1
+        self.rows += len(batch)
+        self._last_batch_size = len(batch)
+
+        for request in batch:
+            request.done.set()
+
+    def stop(self):
+        """Procesa lo pendiente y detiene el hilo"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join(timeout=1.0)
+
+    def stats(self) -> Dict[str, float]:
+        """Tamaño medio de lote y coste del último predict agrupado"""
+        return {
+            "classifier_batches": int(self.batches),
+            "classifier_mean_batch": float(self.rows / self.batches) if self.batches else 0.0,
+            "classifier_batch_ms": float(self.batch_ms or 0.0),
+        }
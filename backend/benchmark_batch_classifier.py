@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+"""
+Rendimiento de la clasificación por lotes entre sesiones (batch_classifier)
+frente a una llamada a predict por fila desde cada hilo de sesión.
+
+Cada sesión es un hilo que clasifica filas en bucle cerrado. Se mide el
+rendimiento total (predicciones/s) y la latencia por predicción con 1, 10
+y 100 sesiones, para el modelo exportado a NumPy y para el pickle de
+scikit-learn.
+"""
+
+import pickle
+import threading
+import time
+import warnings
+
+import numpy as np
+
+from asl_classifier import LinearClassifier
+from batch_classifier import BatchClassifier
+
+DURATION_S = 1.0
+
+
+def run_sessions(sessions, predict_fn, features):
+    """Lanza ``sessions`` hilos en bucle cerrado durante DURATION_S"""
+    latencies = [[] for _ in range(sessions)]
+    barrier = threading.Barrier(sessions + 1)
+    stop_at = [0.0]
+
+    def session(index):
+        rng = np.random.default_rng(index)
+        rows = features[rng.integers(0, len(features), 256)]
+        samples = latencies[index]
+        barrier.wait()
+        i = 0
+        while True:
+            start = time.perf_counter()
+            if start >= stop_at[0]:
+                break
+            predict_fn(rows[i & 255])
+            samples.append(time.perf_counter() - start)
+            i += 1
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    stop_at[0] = time.perf_counter() + DURATION_S
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+
+    merged = np.concatenate([np.asarray(s) for s in latencies]) * 1e6
+    return len(merged) / DURATION_S, float(np.percentile(merged, 50)), float(np.percentile(merged, 95))
+
+
+def main():
+    print("🧪 Clasificación por lotes entre sesiones")
+    print("=" * 70)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        with open("asl_model.pkl", "rb") as f:
+            sklearn_model = pickle.load(f)
+    models = {"NumPy": LinearClassifier.load("asl_model.npz"), "sklearn": sklearn_model}
+
+    rng = np.random.default_rng(0)
+    features = rng.uniform(0, 1, (4096, 1, 63)).astype(np.float32)
+
+    for model_name, model in models.items():
+        # Comprobar que el lote devuelve lo mismo que la llamada directa
+        batcher = BatchClassifier(model, max_batch=64, max_wait_ms=0.0)
+        mismatches = sum(batcher.predict(row) != model.predict(row)[0] for row in features[:500])
+        batcher.stop()
+        print(f"\n🔎 Modelo {model_name} (discrepancias con predict directo: {mismatches})")
+
+        for sessions in (1, 10, 100):
+            direct = run_sessions(sessions, lambda row: model.predict(row)[0], features)
+            print(f"  👥 {sessions:3d} sesiones | directo        {direct[0]:9.0f} pred/s  "
+                  f"p50 {direct[1]:8.1f}µs  p95 {direct[2]:8.1f}µs")
+            for wait_ms in (0.0, 1.0, 2.0):
+                batcher = BatchClassifier(model, max_batch=64, max_wait_ms=wait_ms)
+                batched = run_sessions(sessions, batcher.predict, features)
+                stats = batcher.stats()
+                batcher.stop()
+                print(f"  👥 {sessions:3d} sesiones | lote {wait_ms:.0f}ms espera {batched[0]:9.0f} pred/s  "
+                      f"p50 {batched[1]:8.1f}µs  p95 {batched[2]:8.1f}µs  "
+                      f"lote medio {stats['classifier_mean_batch']:5.1f} (x{batched[0] / direct[0]:.1f})")
+
+
+if __name__ == "__main__":
+    main()
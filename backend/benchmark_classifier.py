@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark del clasificador exportado a NumPy (asl_model.npz) frente al
+LogisticRegression serializado (asl_model.pkl): concordancia de
+predicciones y probabilidades, latencia por llamada y tiempo de arranque.
+"""
+
+import pickle
+import subprocess
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from asl_classifier import LinearClassifier
+
+
+def per_call_us(fn, features, repeats=5000):
+    """Mediana del tiempo de una llamada en µs"""
+    fn(features[0])
+    samples = []
+    for i in range(repeats):
+        row = features[i % len(features)]
+        start = time.perf_counter()
+        fn(row)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return float(np.median(samples))
+
+
+def cold_load_ms(statement):
+    """Tiempo de un proceso nuevo que solo carga el modelo"""
+    code = f"import time; t = time.perf_counter(); {statement}; print((time.perf_counter() - t) * 1000)"
+    output = subprocess.run([sys.executable, "-W", "ignore", "-c", code],
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    print("🧪 Clasificador exportado a NumPy")
+    print("=" * 70)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        with open("asl_model.pkl", "rb") as f:
+            sklearn_model = pickle.load(f)
+    numpy_model = LinearClassifier.load("asl_model.npz")
+
+    # Landmarks sintéticos en el rango de MediaPipe (float32 como en la ruta real)
+    rng = np.random.default_rng(0)
+    centers = rng.uniform(0.2, 0.8, (20000, 1, 3)) * np.array([1, 1, 0])
+    features = (centers + rng.normal(0, 0.08, (20000, 21, 3))).reshape(-1, 1, 63).astype(np.float32)
+    batch = features[:, 0]
+
+    expected = sklearn_model.predict(batch)
+    predicted = numpy_model.predict(batch)
+    agreement = np.mean(expected == predicted) * 100
+    proba_error = np.abs(sklearn_model.predict_proba(batch) - numpy_model.predict_proba(batch)).max()
+    print(f"  📏 Concordancia de predicción: {agreement:.3f}% ({np.sum(expected != predicted)} de {len(batch)})")
+    print(f"  📏 Error máximo de probabilidad: {proba_error:.2e}")
+
+    sklearn_us = per_call_us(lambda row: sklearn_model.predict(row)[0], features)
+    numpy_us = per_call_us(lambda row: numpy_model.predict(row)[0], features)
+    print(f"  ⏱️  Predicción por fotograma: sklearn {sklearn_us:.1f}µs -> NumPy {numpy_us:.1f}µs "
+          f"(x{sklearn_us / numpy_us:.1f})")
+
+    pickle_ms = np.median([cold_load_ms("import pickle; pickle.load(open('asl_model.pkl', 'rb'))") for _ in range(3)])
+    export_ms = np.median([cold_load_ms("from asl_classifier import LinearClassifier; LinearClassifier.load('asl_model.npz')")
+                           for _ in range(3)])
+    print(f"  🚀 Carga en proceso nuevo: pickle (importa sklearn) {pickle_ms:.0f}ms -> export {export_ms:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+"""
+Poda de casi-duplicados (dedup_images) sobre un dataset sintético con la
+estructura de Kaggle: por letra, ráfagas de fotogramas casi idénticos
+(mismo fondo y mano, con ruido de sensor y desplazamientos de 1-2 px).
+
+Comprueba que la selección con el índice Hamming por bandas conserva
+exactamente las mismas imágenes que la pasada voraz contra todas las
+conservadas (también con una ráfaga enorme de hashes casi idénticos), que
+la poda conserva al menos una imagen de cada ráfaga, y mide el tiempo de
+hashing y cuánto se reduce la extracción con MediaPipe de train_model.
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+import dedup_images
+import train_model
+
+LETTERS = "ABCDE"
+RUNS_PER_LETTER = 8
+FRAMES_PER_RUN = 25
+
+
+def write_dataset(root, rng):
+    """Escribe las ráfagas y devuelve {ruta: (letra, ráfaga)}"""
+    runs = {}
+    for letter in LETTERS:
+        os.makedirs(os.path.join(root, letter))
+        for run in range(RUNS_PER_LETTER):
+            # Escena suave aleatoria: ruido grueso ampliado
+            scene = cv2.resize(rng.integers(0, 255, (6, 6, 3), dtype=np.uint8), (240, 240),
+                               interpolation=cv2.INTER_CUBIC)
+            for frame in range(FRAMES_PER_RUN):
+                dx, dy = rng.integers(-2, 3, 2)
+                image = scene[20 + dy:220 + dy, 20 + dx:220 + dx].astype(np.int16)
+                image = np.clip(image + rng.normal(0, 3, image.shape), 0, 255).astype(np.uint8)
+                path = os.path.join(root, letter, f"{letter}{run * FRAMES_PER_RUN + frame}.jpg")
+                cv2.imwrite(path, image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+                runs[path] = (letter, run)
+    return runs
+
+
+def brute_force_selection(hashes, max_distance):
+    """Pasada voraz de referencia: cada hash contra todos los conservados"""
+    keep = np.zeros(len(hashes), dtype=bool)
+    kept = np.zeros(0, dtype=np.uint64)
+    seen = set()
+    for i, value in enumerate(hashes):
+        if int(value) in seen:
+            continue
+        seen.add(int(value))
+        if not len(kept) or dedup_images.hamming(kept, np.full(len(kept), value)).min() > max_distance:
+            keep[i] = True
+            kept = np.append(kept, value)
+    return keep
+
+
+def near_duplicates(rng, base, count, flips):
+    """``count`` hashes a como mucho ``flips`` bits de cada valor de ``base``"""
+    hashes = np.repeat(base, count // len(base))
+    for _ in range(flips):
+        hashes ^= np.uint64(1) << rng.integers(0, 64, len(hashes)).astype(np.uint64)
+    return hashes
+
+
+def main():
+    print("🧪 Poda de casi-duplicados con hashes perceptuales")
+    print("=" * 70)
+
+    # Índice por bandas frente a la pasada voraz contra todas las conservadas:
+    # hashes variados con vecinos a 3 bits, y una ráfaga de 20000 fotogramas
+    # casi idénticos (un único cubo enorme en un índice de pares)
+    rng = np.random.default_rng(0)
+    varied = rng.integers(0, 2**63, 3000, dtype=np.uint64)
+    varied[1500:] = near_duplicates(rng, varied[:1500], 1500, 3)
+    burst = near_duplicates(rng, rng.integers(0, 2**63, 1, dtype=np.uint64), 20000, 2)
+    for name, hashes in (("variados", varied), ("ráfaga", burst)):
+        for max_distance in (2, 4, 8):
+            start = time.perf_counter()
+            indexed = dedup_images.select_representatives(hashes, max_distance)
+            index_time = time.perf_counter() - start
+            start = time.perf_counter()
+            brute = brute_force_selection(hashes, max_distance)
+            brute_time = time.perf_counter() - start
+            same = np.array_equal(indexed, brute)
+            print(f"  🔎 {name} ({len(hashes)}), distancia {max_distance}: {int(indexed.sum())} conservados, "
+                  f"índice {index_time * 1000:.0f}ms vs todos contra todos {brute_time * 1000:.0f}ms "
+                  f"{'✅' if same else '❌'}")
+            if not same:
+                sys.exit(1)
+
+    root = tempfile.mkdtemp(prefix="asl_dedup_")
+    try:
+        data_dir = os.path.join(root, "train")
+        runs = write_dataset(data_dir, rng)
+        workers = os.cpu_count() or 1
+        with contextlib.redirect_stdout(io.StringIO()) as log:
+            kept, total = dedup_images.prune(data_dir, max_distance=4, workers=workers)
+        print(f"  ⚡ {log.getvalue().splitlines()[-1]} ({workers} procesos)")
+        covered = {runs[path] for path, _ in kept}
+        print(f"  🧹 {total} imágenes -> {len(kept)} ({1 - len(kept) / total:.1%} eliminadas), "
+              f"ráfagas con representante {len(covered)}/{len(LETTERS) * RUNS_PER_LETTER}")
+        if len(covered) != len(LETTERS) * RUNS_PER_LETTER:
+            print("  ❌ la poda eliminó ráfagas enteras")
+            sys.exit(1)
+
+        manifest = os.path.join(root, "pruned.json")
+        dedup_images.write_manifest(manifest, data_dir, kept, 4, total)
+        timings = {}
+        for name, path in (("completo", None), ("podado", manifest)):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                train_model._load_dataset(data_dir, workers=1, manifest=path)
+            timings[name] = time.perf_counter() - start
+        print(f"  ⏱️  Extracción MediaPipe: completo {timings['completo']:.1f}s -> "
+              f"podado {timings['podado']:.1f}s (x{timings['completo'] / timings['podado']:.1f})")
+        print("  ✅ Manifiesto podado consumible por train_model --manifest")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
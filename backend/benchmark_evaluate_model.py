@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+"""
+Arnés de evaluación (evaluate_model) de principio a fin con la CLI.
+
+Crea un shard set de validación sintético etiquetado por el modelo de
+producción con un 10% de etiquetas cambiadas, evalúa el export NumPy y el
+pickle, y comprueba que el informe JSON es coherente con scikit-learn y
+que ``--baseline`` detecta un modelo degradado y uno más lento.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+from sklearn.metrics import confusion_matrix, precision_recall_fscore_support
+
+from asl_classifier import LinearClassifier, export_linear_model
+from benchmark_streaming_training import synthetic_features
+from feature_shards import ShardWriter
+
+
+def run(*args):
+    result = subprocess.run([sys.executable, "-W", "ignore", "evaluate_model.py", *args],
+                            capture_output=True, text=True)
+    return result.returncode, result.stdout, result.stderr
+
+
+def main():
+    print("🧪 Arnés de evaluación de modelos")
+    print("=" * 70)
+
+    production = LinearClassifier.load("asl_model.npz")
+    rng = np.random.default_rng(0)
+    X = synthetic_features(rng, 5000)
+    y = production.predict(X)
+    flipped = rng.random(len(y)) < 0.1
+    y[flipped] = rng.choice(production.classes_, int(flipped.sum()))
+
+    root = tempfile.mkdtemp(prefix="asl_eval_")
+    try:
+        shards = os.path.join(root, "heldout")
+        writer = ShardWriter(shards, shard_rows=2000)
+        writer.add(X, y)
+        writer.close()
+
+        baseline = os.path.join(root, "baseline.json")
+        code, out, _ = run("asl_model.npz", shards, "--report", baseline)
+        with open(baseline) as f:
+            report = json.load(f)
+        print("  " + out.replace("\n", "\n  ").rstrip())
+
+        # Coherencia con scikit-learn
+        labels = report["confusion"]["labels"]
+        predicted = production.predict(X)
+        expected = confusion_matrix(y, predicted, labels=labels)
+        precision, recall, _, _ = precision_recall_fscore_support(y, predicted, labels=labels, zero_division=0)
+        ok = (np.array_equal(expected, np.array(report["confusion"]["matrix"]))
+              and np.allclose(precision, [report["per_letter"][l]["precision"] for l in labels])
+              and np.allclose(recall, [report["per_letter"][l]["recall"] for l in labels]))
+        print(f"  📏 Matriz de confusión y precisión/recall iguales a scikit-learn: {'✅' if ok else '❌'}")
+
+        code_pickle, out, _ = run("asl_model.pkl", shards, "--report", os.path.join(root, "pickle.json"))
+        print("  " + out.replace("\n", "\n  ").rstrip())
+
+        # Modelo degradado: pesos con ruido
+        degraded = os.path.join(root, "degraded.npz")
+        noise = rng.normal(0, np.abs(production.coef_).mean() * 2, production.coef_.shape)
+        export_linear_model(LinearClassifier(production.coef_ + noise, production.intercept_,
+                                             production.classes_, production.probability_mode), degraded)
+        code_degraded, _, err_degraded = run(degraded, shards, "--report", os.path.join(root, "degraded.json"),
+                                             "--baseline", baseline)
+        # Mismo modelo, más lento: el pickle pasa por la validación de scikit-learn
+        code_slow, _, err_slow = run("asl_model.pkl", shards, "--report", os.path.join(root, "slow.json"),
+                                     "--baseline", baseline)
+        code_same, _, _ = run("asl_model.npz", shards, "--report", os.path.join(root, "same.json"),
+                              "--baseline", baseline, "--max-latency-ratio", "3")
+        print(f"  🚨 degradado: código {code_degraded} ({len(err_degraded.splitlines())} regresiones) | "
+              f"pickle lento: código {code_slow} | mismo modelo: código {code_same}")
+        if not ok or code or code_pickle or code_degraded != 1 or code_slow != 1 or code_same != 0:
+            print("  ❌ el arnés no detecta las regresiones esperadas")
+            sys.exit(1)
+        print("  ✅ Informe JSON y detección de regresiones de precisión y latencia")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+"""
+Normalización de landmarks compartida (hand_features): invariancia,
+rendimiento por lote y efecto en la precisión.
+
+Las manos sintéticas son 26 formas prototipo (una por letra) colocadas en
+posiciones y tamaños aleatorios de la imagen con ruido, como llegan de
+MediaPipe. Se compara una regresión logística sobre coordenadas crudas y
+sobre landmarks normalizados con los mismos datos, y se comprueba que el
+export NumPy aplica la misma transformación que el pipeline de entrenamiento.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import FunctionTransformer
+
+from asl_classifier import LinearClassifier, export_linear_model
+from hand_features import NUM_LANDMARKS, mirror_left_hands, normalize_landmarks
+from model_search import as_linear_classifier
+
+LETTERS = [chr(c) for c in range(ord("A"), ord("Z") + 1)]
+
+
+def synthetic_hands(rng, prototypes, rows):
+    """Formas prototipo con posición, escala y rotación en el plano aleatorias"""
+    labels = rng.integers(0, len(prototypes), rows)
+    angles = rng.uniform(-0.3, 0.3, rows)
+    cos, sin = np.cos(angles), np.sin(angles)
+    rotation = np.zeros((rows, 3, 3))
+    rotation[:, 0, 0], rotation[:, 0, 1], rotation[:, 1, 0], rotation[:, 1, 1] = cos, -sin, sin, cos
+    rotation[:, 2, 2] = 1
+    shapes = prototypes[labels] + rng.normal(0, 0.08, (rows, NUM_LANDMARKS, 3))
+    points = np.einsum("nij,nkj->nki", rotation, shapes) * rng.uniform(0.08, 0.3, (rows, 1, 1))
+    points[:, :, :2] += rng.uniform(0.25, 0.75, (rows, 1, 2))
+    return points.reshape(rows, -1).astype(np.float32), np.array(LETTERS)[labels]
+
+
+def main():
+    print("🧪 Normalización de landmarks compartida")
+    print("=" * 70)
+
+    rng = np.random.default_rng(0)
+    base = rng.normal(0, 0.5, (1, NUM_LANDMARKS, 3))
+    prototypes = base + rng.normal(0, 0.1, (len(LETTERS), NUM_LANDMARKS, 3))
+    prototypes -= prototypes[:, :1]
+    X, y = synthetic_hands(rng, prototypes, 6000)
+    X_test, y_test = synthetic_hands(rng, prototypes, 3000)
+
+    # Invariancia a traslación y escala, y espejo de manos izquierdas
+    moved = X.reshape(-1, NUM_LANDMARKS, 3) * 1.7
+    moved[:, :, :2] += 0.1
+    error = np.abs(normalize_landmarks(moved) - normalize_landmarks(X)).max()
+    mirrored = mirror_left_hands(X, np.ones(len(X), dtype=bool))
+    mirror_error = np.abs(normalize_landmarks(mirrored, np.ones(len(X), dtype=bool))
+                          - normalize_landmarks(X)).max()
+    print(f"  📐 error tras trasladar/escalar: {error:.1e} | tras espejo + canonicalizar: {mirror_error:.1e}")
+    if error > 1e-4 or mirror_error > 1e-4:
+        print("  ❌ la normalización no es invariante")
+        sys.exit(1)
+
+    for batch in (1, 64, 100_000):
+        rows = np.resize(X, (batch, X.shape[1]))
+        repeats = max(1, 200_000 // batch)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            normalize_landmarks(rows)
+        elapsed = (time.perf_counter() - start) / repeats
+        print(f"  ⚡ lote {batch:>7,}: {elapsed * 1e6:9.1f}µs ({batch / elapsed / 1e6:.2f}M manos/s)")
+
+    print()
+    for C in (0.1, 1.0):
+        raw = LogisticRegression(C=C, max_iter=2000).fit(X, y)
+        hand = make_pipeline(FunctionTransformer(normalize_landmarks),
+                             LogisticRegression(C=C, max_iter=2000)).fit(X, y)
+        print(f"  🎯 C={C:<4}: crudo {np.mean(raw.predict(X_test) == y_test):.3f} | "
+              f"normalizado {np.mean(hand.predict(X_test) == y_test):.3f}")
+
+    # El export lleva la transformación: el servidor pasa landmarks crudos
+    path = os.path.join(tempfile.mkdtemp(prefix="asl_features_"), "asl_model.npz")
+    export_linear_model(as_linear_classifier(hand), path)
+    exported = LinearClassifier.load(path)
+    agreement = np.mean(exported.predict(X_test) == hand.predict(X_test))
+    proba_error = np.abs(exported.predict_proba(X_test) - hand.predict_proba(X_test)).max()
+    print(f"  📦 export '{exported.feature_transform}': coincidencia {agreement:.2%}, "
+          f"error de probabilidad {proba_error:.1e}")
+    if agreement < 0.999:
+        print("  ❌ el export no reproduce el pipeline de entrenamiento")
+        sys.exit(1)
+    production = LinearClassifier.load("asl_model.npz")
+    print(f"  ✅ Sin desfase entrenamiento/servicio; modelo de producción (formato 1) "
+          f"cargado como '{production.feature_transform}'")
+
+
+if __name__ == "__main__":
+    main()
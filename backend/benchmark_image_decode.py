@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+"""
+Decodificación a resolución reducida en train_model frente a la carga
+original (cv2.imread a tamaño completo + recorte + conversión de color).
+
+Uso:
+    python benchmark_image_decode.py [/ruta/a/asl_alphabet_train]
+
+Sin argumentos genera un árbol sintético con JPEGs de varios tamaños.
+Con un dataset real además se compara la tasa de detección de MediaPipe
+y la diferencia de landmarks entre ambas cargas.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+import train_model
+
+SIZES = [(200, 200), (640, 480), (1280, 960), (1920, 1080), (4032, 3024)]
+
+
+def legacy_load(path):
+    """Carga original de _load_dataset"""
+    img = cv2.imread(path)
+    if img is None:
+        return None
+    img = train_model._center_crop_square(img)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+
+def synthetic_tree(root, per_size=12):
+    """JPEGs con contenido suave (gradientes y formas desenfocadas) por tamaño"""
+    rng = np.random.default_rng(0)
+    items = []
+    for width, height in SIZES:
+        letter_dir = os.path.join(root, f"{width}x{height}")
+        os.makedirs(letter_dir)
+        for i in range(per_size):
+            small = rng.integers(0, 256, (12, 16, 3), dtype=np.uint8)
+            img = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+            for _ in range(6):
+                center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+                axes = (int(rng.integers(width // 20, width // 5)), int(rng.integers(height // 20, height // 5)))
+                color = [int(c) for c in rng.integers(0, 256, 3)]
+                cv2.ellipse(img, center, axes, float(rng.uniform(0, 180)), 0, 360, color, -1)
+            noise = rng.normal(0, 4, img.shape)
+            img = np.clip(img + noise, 0, 255).astype(np.uint8)
+            path = os.path.join(letter_dir, f"{i}.jpg")
+            cv2.imwrite(path, img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+            items.append((path, f"{width}x{height}"))
+    return items
+
+
+def main():
+    print("🧪 Decodificación a resolución reducida (train_model)")
+    print("=" * 70)
+
+    temp_root = None
+    if len(sys.argv) > 1:
+        items = train_model._list_images(sys.argv[1])
+        items = items[::max(1, len(items) // 500)]
+        groups = {"dataset": items}
+    else:
+        temp_root = tempfile.mkdtemp(prefix="asl_decode_")
+        items = synthetic_tree(temp_root)
+        groups = {}
+        for item in items:
+            groups.setdefault(item[1], []).append(item)
+
+    try:
+        train_model._init_worker()
+        total = {"legacy": 0.0, "reduced": 0.0}
+        found = {"legacy": 0, "reduced": 0}
+        landmark_deltas = []
+
+        for group, group_items in groups.items():
+            timings = {"legacy": [], "reduced": []}
+            pixel_deltas = []
+            for path, _ in group_items:
+                start = time.perf_counter()
+                reference = legacy_load(path)
+                timings["legacy"].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                reduced = train_model._load_image_rgb(path)
+                timings["reduced"].append(time.perf_counter() - start)
+
+                if reference is None or reduced is None:
+                    continue
+                # Fidelidad: recorte completo reducido con INTER_AREA frente a la decodificación reducida
+                if reduced.shape != reference.shape:
+                    resized = cv2.resize(reference, reduced.shape[1::-1], interpolation=cv2.INTER_AREA)
+                    pixel_deltas.append(float(np.mean(np.abs(resized.astype(np.int16) - reduced))))
+
+                landmarks = {}
+                for name, image in (("legacy", reference), ("reduced", reduced)):
+                    results = train_model._hands.process(image)
+                    if results.multi_hand_landmarks:
+                        found[name] += 1
+                        landmarks[name] = np.array(train_model._extract_features(results.multi_hand_landmarks[0]))
+                if len(landmarks) == 2:
+                    landmark_deltas.append(float(np.abs(landmarks["legacy"] - landmarks["reduced"]).mean()))
+
+            legacy_ms = np.median(timings["legacy"]) * 1000
+            reduced_ms = np.median(timings["reduced"]) * 1000
+            total["legacy"] += sum(timings["legacy"])
+            total["reduced"] += sum(timings["reduced"])
+            fidelity = f", diferencia media {np.mean(pixel_deltas):.1f}/255" if pixel_deltas else ""
+            print(f"  ⏱️  {group:>10}: completo {legacy_ms:6.2f}ms -> reducido {reduced_ms:6.2f}ms "
+                  f"(x{legacy_ms / reduced_ms:.1f}){fidelity}")
+
+        print(f"  📊 Total {len(items)} imágenes: {total['legacy']:.2f}s -> {total['reduced']:.2f}s")
+        print(f"  ✋ Manos detectadas: completo {found['legacy']} / reducido {found['reduced']} de {len(items)}")
+        if landmark_deltas:
+            print(f"  📏 Diferencia media de landmarks (coordenadas normalizadas): {np.mean(landmark_deltas):.4f}")
+        else:
+            print("  📏 Sin manos detectadas: pasa un dataset real para medir el efecto en la detección")
+    finally:
+        if temp_root:
+            shutil.rmtree(temp_root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
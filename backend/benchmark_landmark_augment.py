@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+"""
+Aumento de datos en espacio de landmarks (landmark_augment): rendimiento,
+validez geométrica y efecto en el entrenamiento en streaming.
+
+El conjunto de entrenamiento son manos sintéticas derechas (ver
+benchmark_hand_features) escritas como shards; la prueba son manos
+izquierdas (espejo) y derechas. Se entrena train_streaming con y sin
+copias aumentadas generadas al vuelo.
+"""
+
+import contextlib
+import io
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import train_streaming
+from benchmark_hand_features import LETTERS, synthetic_hands
+from feature_shards import ShardWriter
+from hand_features import NUM_LANDMARKS, mirror_left_hands
+from landmark_augment import Augmentation, augment
+
+
+def bone_lengths(features):
+    points = features.reshape(-1, NUM_LANDMARKS, 3)
+    return np.linalg.norm(points[:, 1:] - points[:, :1], axis=2)
+
+
+def main():
+    print("🧪 Aumento de datos en landmarks")
+    print("=" * 70)
+
+    rng = np.random.default_rng(0)
+    base = rng.normal(0, 0.5, (1, NUM_LANDMARKS, 3))
+    prototypes = base + rng.normal(0, 0.1, (len(LETTERS), NUM_LANDMARKS, 3))
+    prototypes -= prototypes[:, :1]
+    X, y = synthetic_hands(rng, prototypes, 4000)
+
+    for batch in (1024, 8192, 100_000):
+        rows = np.resize(X, (batch, X.shape[1]))
+        repeats = max(3, 1_000_000 // batch)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            augment(rows, rng)
+        rate = batch * repeats / (time.perf_counter() - start)
+        print(f"  ⚡ lote {batch:>7,}: {rate / 1e6:.2f}M manos aumentadas/s (1 núcleo)")
+
+    # Sin rangos: identidad. Rotación + espejo: distancias a la muñeca intactas
+    none = Augmentation(mirror_p=0, roll=0, tilt=0, scale=0, shift=0, jitter=0)
+    identity_error = np.abs(augment(X, rng, none) - X).max()
+    rigid = Augmentation(mirror_p=0.5, roll=0.5, tilt=0.5, scale=0, shift=0.2, jitter=0)
+    bone_error = np.abs(bone_lengths(augment(X, rng, rigid)) - bone_lengths(X)).max()
+    print(f"  📐 identidad {identity_error:.1e} | distancias tras rotar/espejar/trasladar {bone_error:.1e}")
+    if identity_error > 1e-6 or bone_error > 1e-4:
+        print("  ❌ transformación no válida")
+        sys.exit(1)
+
+    # Entrenar solo con manos derechas, probar con izquierdas y derechas
+    X_test, y_test = synthetic_hands(rng, prototypes, 3000)
+    X_left = mirror_left_hands(X_test, np.ones(len(X_test), dtype=bool))
+    root = tempfile.mkdtemp(prefix="asl_augment_")
+    try:
+        writer = ShardWriter(root, shard_rows=1000)
+        writer.add(X, y)
+        writer.close()
+        print()
+        for copies in (0, 4):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                clf = train_streaming.train(root, epochs=5, batch_size=256, augment_copies=copies)
+            elapsed = time.perf_counter() - start
+            right = np.mean(clf.predict(X_test) == y_test)
+            left = np.mean(clf.predict(X_left) == y_test)
+            print(f"  🎯 {copies} copias aumentadas: derechas {right:.3f} | izquierdas {left:.3f} "
+                  f"({elapsed:.1f}s, {len(X) * (1 + copies) * 5 / elapsed:,.0f} filas/s)")
+    finally:
+        shutil.rmtree(root)
+    print("  ✅ Copias generadas por lote, sin materializar el conjunto aumentado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark de las máscaras de piel a 1/4 de resolución: coste de la
+morfología frente a la versión a resolución completa y concordancia de la
+caja de smart_roi_detection.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from frame_pyramid import FramePyramid
+from hand_detection_lightweight import LightweightHandDetectionOptimizer
+from image_ops import MASK_SCALE, blur_scaled, morphology_scaled, skin_mask_reduced
+from test_optimization_comparison import create_test_images
+
+
+def time_ms(fn, repeats=50):
+    """Mediana del tiempo de ejecución en ms"""
+    fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def full_resolution_morphology(mask):
+    """Morfología de las tres rutas tal como se hacía a resolución completa"""
+    k5 = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+    k7 = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (7, 7))
+    k11 = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (11, 11))
+    cv2.morphologyEx(cv2.morphologyEx(mask, cv2.MORPH_OPEN, k5), cv2.MORPH_CLOSE, k5)
+    cv2.morphologyEx(cv2.morphologyEx(mask, cv2.MORPH_OPEN, k7), cv2.MORPH_CLOSE, k7)
+    closed = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, k11)
+    cv2.GaussianBlur(cv2.dilate(closed, k11, iterations=2), (15, 15), 0)
+
+
+def reduced_morphology(mask):
+    """Las mismas operaciones con kernels reescalados a MASK_SCALE"""
+    morphology_scaled(morphology_scaled(mask, cv2.MORPH_OPEN, 5, MASK_SCALE), cv2.MORPH_CLOSE, 5, MASK_SCALE)
+    morphology_scaled(morphology_scaled(mask, cv2.MORPH_OPEN, 7, MASK_SCALE), cv2.MORPH_CLOSE, 7, MASK_SCALE)
+    closed = morphology_scaled(mask, cv2.MORPH_CLOSE, 11, MASK_SCALE)
+    blur_scaled(morphology_scaled(closed, cv2.MORPH_DILATE, 11, MASK_SCALE, iterations=2), 15, MASK_SCALE)
+
+
+def full_resolution_roi(image):
+    """Caja de smart_roi_detection calculada a resolución completa"""
+    height, width = image.shape[:2]
+    hsv = cv2.cvtColor(image, cv2.COLOR_RGB2HSV)
+    skin_mask = cv2.inRange(hsv, np.array([0, 15, 50]), np.array([25, 255, 255]))
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (7, 7))
+    skin_mask = cv2.morphologyEx(skin_mask, cv2.MORPH_OPEN, kernel)
+    skin_mask = cv2.morphologyEx(skin_mask, cv2.MORPH_CLOSE, kernel)
+    contours, _ = cv2.findContours(skin_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+    largest_contour = max(contours, key=cv2.contourArea)
+    if cv2.contourArea(largest_contour) < width * height * 0.01:
+        return None
+    x, y, w, h = cv2.boundingRect(largest_contour)
+    x_exp = max(0, int(x - w * 0.2))
+    y_exp = max(0, int(y - h * 0.2))
+    return x_exp, y_exp, min(width - x_exp, int(w * 1.4)), min(height - y_exp, int(h * 1.4))
+
+
+def iou(a, b):
+    """Intersección sobre unión de dos cajas (x, y, w, h)"""
+    x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+    x1, y1 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    inter = max(0, x1 - x0) * max(0, y1 - y0)
+    return inter / float(a[2] * a[3] + b[2] * b[3] - inter)
+
+
+def main():
+    print("🧪 Máscaras de piel a 1/4 de resolución")
+    print("=" * 70)
+
+    detector = object.__new__(LightweightHandDetectionOptimizer)
+    detector.roi_level = 2
+
+    np.random.seed(0)
+    images = [(name, cv2.cvtColor(img, cv2.COLOR_BGR2RGB)) for name, img in create_test_images()]
+    # Fondo azul con una región de tono piel en RGB para ejercitar la ROI
+    skin_scene = np.full((480, 640, 3), (40, 90, 200), dtype=np.uint8)
+    cv2.rectangle(skin_scene, (250, 150), (350, 300), (220, 170, 130), -1)
+    cv2.circle(skin_scene, (300, 130), 30, (220, 170, 130), -1)
+    images.append(("Skin Region On Blue", skin_scene))
+
+    for name, image_rgb in images:
+        hsv = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2HSV)
+        full_mask = cv2.inRange(hsv, np.array([0, 15, 50]), np.array([25, 255, 255]))
+        small_mask = skin_mask_reduced(image_rgb, (0, 15, 50), (25, 255, 255))
+
+        t_full = time_ms(lambda: full_resolution_morphology(full_mask))
+        t_small = time_ms(lambda: reduced_morphology(small_mask))
+
+        legacy_box = full_resolution_roi(image_rgb)
+        new_result = detector.smart_roi_detection(image_rgb, FramePyramid(image_rgb))
+        new_box = new_result[1] if new_result else None
+        if legacy_box and new_box:
+            agreement = f"IoU = {iou(legacy_box, new_box):.3f}"
+        else:
+            agreement = "ambas sin ROI" if legacy_box == new_box else f"{legacy_box} vs {new_box}"
+
+        print(f"\n🔍 {name}")
+        print(f"  ⏱️  Morfología: {t_full:.3f}ms -> {t_small:.3f}ms (x{t_full / max(t_small, 1e-6):.1f})")
+        print(f"  📦 ROI: {agreement}")
+
+
+if __name__ == "__main__":
+    main()
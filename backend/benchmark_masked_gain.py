@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark y paridad del operador de ganancia enmascarada (image_ops.apply_masked_gain)
+frente a las implementaciones anteriores por canal de
+ContrastEnhancedHandDetector.apply_spectral_hand_enhancement y
+HandDetectionOptimizer.skin_color_enhancement.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from image_ops import apply_masked_gain
+from hand_detection_contrast_enhanced import ContrastEnhancedHandDetector
+from hand_detection_optimizer import HandDetectionOptimizer
+from test_optimization_comparison import create_test_images
+
+
+def legacy_spectral_hand_enhancement(image_rgb):
+    """Implementación anterior: máscara a resolución completa y bucle por canal en float32"""
+    hsv = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2HSV)
+    h, s, v = cv2.split(hsv)
+    mask_h = cv2.inRange(h, 5, 25)
+    mask_s = cv2.inRange(s, 30, 255)
+    mask_v = cv2.inRange(v, 60, 255)
+    hand_mask = cv2.bitwise_and(cv2.bitwise_and(mask_h, mask_s), mask_v)
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+    hand_mask = cv2.morphologyEx(hand_mask, cv2.MORPH_OPEN, kernel)
+    hand_mask = cv2.morphologyEx(hand_mask, cv2.MORPH_CLOSE, kernel)
+    enhanced_image = image_rgb.copy()
+    if np.sum(hand_mask) > 1000:
+        mask_normalized = hand_mask.astype(np.float32) / 255.0
+        for i in range(3):
+            channel = enhanced_image[:, :, i].astype(np.float32)
+            enhanced_channel = cv2.multiply(channel, 1.0 + 0.2 * mask_normalized)
+            enhanced_image[:, :, i] = np.clip(enhanced_channel, 0, 255).astype(np.uint8)
+    return enhanced_image, hand_mask
+
+
+def legacy_skin_color_enhancement(image, saturate=False):
+    """
+    Implementación anterior con broadcasting de NumPy. Con saturate=False
+    reproduce el desborde silencioso original; con saturate=True es la
+    referencia correcta usada para la paridad.
+    """
+    hsv = cv2.cvtColor(image, cv2.COLOR_RGB2HSV)
+    skin_mask = cv2.inRange(hsv, np.array([0, 20, 70], dtype=np.uint8),
+                            np.array([20, 255, 255], dtype=np.uint8))
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (11, 11))
+    skin_mask = cv2.morphologyEx(skin_mask, cv2.MORPH_CLOSE, kernel)
+    skin_mask = cv2.dilate(skin_mask, kernel, iterations=2)
+    skin_mask = cv2.GaussianBlur(skin_mask, (15, 15), 0)
+    skin_mask_norm = skin_mask.astype(np.float32) / 255.0
+    if saturate:
+        enhanced = image.astype(np.float32) * (1 + 0.3 * skin_mask_norm)[:, :, None]
+        return np.clip(enhanced, 0, 255).astype(np.uint8), skin_mask
+    enhanced = image.copy()
+    for i in range(3):
+        enhanced[:, :, i] = (enhanced[:, :, i] * (1 + 0.3 * skin_mask_norm)).astype(np.int64).astype(np.uint8)
+    return enhanced, skin_mask
+
+
+def reference_masked_gain(image_rgb, mask, gain):
+    """Referencia float64 saturada del operador fusionado"""
+    factor = 1.0 + gain * mask.astype(np.float64)[:, :, None] / 255.0
+    return np.clip(np.rint(image_rgb * factor), 0, 255).astype(np.uint8)
+
+
+def time_ms(fn, repeats=50):
+    """Mediana del tiempo de ejecución en ms"""
+    fn()  # calentamiento
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def diff_stats(a, b):
+    """Diferencia absoluta máxima, media y % de píxeles con diferencia > 2"""
+    d = np.abs(a.astype(np.int16) - b.astype(np.int16))
+    return int(d.max()), float(d.mean()), float(np.mean(d.max(axis=2) > 2) * 100)
+
+
+def main():
+    print("🧪 Ganancia enmascarada: implementación por canal vs. operador fusionado")
+    print("=" * 70)
+
+    # Instancias sin grafos de MediaPipe: solo se usan los métodos de realce
+    contrast_detector = object.__new__(ContrastEnhancedHandDetector)
+    optimizer = object.__new__(HandDetectionOptimizer)
+
+    np.random.seed(0)
+    for test_name, test_image in create_test_images():
+        image_rgb = cv2.cvtColor(test_image, cv2.COLOR_BGR2RGB)
+        print(f"\n🔍 {test_name}")
+
+        # 1. Paridad del operador con la misma máscara a resolución completa
+        legacy_spectral, spectral_mask = legacy_spectral_hand_enhancement(image_rgb)
+        operator_max, _, _ = diff_stats(apply_masked_gain(image_rgb, spectral_mask, 0.2),
+                                        reference_masked_gain(image_rgb, spectral_mask, 0.2))
+        print(f"  Operador vs. referencia saturada: max |Δ| = {operator_max}")
+
+        # 2. Paridad de extremo a extremo (máscara a resolución reducida)
+        new_spectral = contrast_detector.apply_spectral_hand_enhancement(image_rgb)
+        max_d, mean_d, pct = diff_stats(new_spectral, legacy_spectral)
+        print(f"  Espectral: max |Δ| = {max_d}, media = {mean_d:.3f}, píxeles |Δ|>2 = {pct:.2f}%")
+
+        legacy_skin_sat, _ = legacy_skin_color_enhancement(image_rgb, saturate=True)
+        legacy_skin_wrap, _ = legacy_skin_color_enhancement(image_rgb)
+        new_skin = optimizer.skin_color_enhancement(image_rgb)
+        max_d, mean_d, pct = diff_stats(new_skin, legacy_skin_sat)
+        wrapped = float(np.mean(legacy_skin_wrap < legacy_skin_sat.astype(np.int16) - 2) * 100)
+        print(f"  Piel:      max |Δ| = {max_d}, media = {mean_d:.3f}, píxeles |Δ|>2 = {pct:.2f}%"
+              f" (desborde en versión anterior: {wrapped:.2f}%)")
+
+        # 3. Tiempos
+        t_legacy_spectral = time_ms(lambda: legacy_spectral_hand_enhancement(image_rgb))
+        t_new_spectral = time_ms(lambda: contrast_detector.apply_spectral_hand_enhancement(image_rgb))
+        t_legacy_skin = time_ms(lambda: legacy_skin_color_enhancement(image_rgb))
+        t_new_skin = time_ms(lambda: optimizer.skin_color_enhancement(image_rgb))
+        print(f"  ⏱️  Espectral: {t_legacy_spectral:.2f}ms -> {t_new_spectral:.2f}ms "
+              f"(x{t_legacy_spectral / max(t_new_spectral, 1e-6):.1f})")
+        print(f"  ⏱️  Piel:      {t_legacy_skin:.2f}ms -> {t_new_skin:.2f}ms "
+              f"(x{t_legacy_skin / max(t_new_skin, 1e-6):.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+"""
+Recarga en caliente del registro de modelos (model_registry).
+
+Diez sesiones clasifican en bucle mientras se publican versiones nuevas:
+una válida, una que falla el canario (clases permutadas) y una reversión
+borrando la última versión. Se mide el tiempo hasta servir cada versión,
+los errores y la latencia máxima de predicción durante los cambios, y el
+coste de cargar una versión mapeada en memoria frente al .npz.
+"""
+
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from asl_classifier import LinearClassifier
+from model_registry import ModelRegistry, publish, write_canary
+
+
+def wait_for(condition, timeout=5.0):
+    """Segundos hasta que ``condition()`` se cumple (None si no llega)"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if condition():
+            return time.perf_counter() - start
+        time.sleep(0.001)
+    return None
+
+
+def perturbed(model, rng, scale):
+    """Copia del modelo con ruido relativo en los pesos"""
+    noise = 1 + rng.normal(0, scale, model.weights.shape).astype(np.float32)
+    return LinearClassifier((model.weights * noise).T, model.intercept, model.classes_, model.probability_mode)
+
+
+def main():
+    print("🧪 Registro de modelos con recarga en caliente")
+    print("=" * 70)
+
+    rng = np.random.default_rng(0)
+    base = LinearClassifier.load("asl_model.npz")
+    features = rng.uniform(0, 1, (2000, 63)).astype(np.float32)
+    root = tempfile.mkdtemp(prefix="asl_models_")
+    failures = 0
+    try:
+        # Canario: etiquetas del modelo actual sobre landmarks sintéticos
+        write_canary(root, features[:500], base.predict(features[:500]))
+        v1 = publish(base, root, "v1")
+
+        registry = ModelRegistry(root, poll_interval_s=0.02)
+        registry.start()
+
+        # Sesiones que leen registry.model en cada predicción
+        stop = threading.Event()
+        errors, latencies = [0], []
+
+        def session(seed):
+            rows = features[np.random.default_rng(seed).integers(0, len(features), 256)]
+            samples = []
+            latencies.append(samples)
+            i = 0
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    registry.model.predict(rows[i & 255])
+                except Exception:
+                    errors[0] += 1
+                samples.append(time.perf_counter() - start)
+                i += 1
+
+        threads = [threading.Thread(target=session, args=(i,)) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+
+        steps = []
+        v2 = publish(perturbed(base, rng, 0.01), root, "v2")
+        steps.append(("publicar v2 (válida)", v2, wait_for(lambda: registry.version == v2)))
+
+        bad = LinearClassifier(base.weights.T, base.intercept, base.classes_[rng.permutation(len(base.classes_))])
+        v3 = publish(bad, root, "v3")
+        rejected = wait_for(lambda: registry.rejections == 1)
+        steps.append(("publicar v3 (canario falla)", v2, rejected))
+
+        shutil.rmtree(os.path.join(root, v2))
+        steps.append(("borrar v2 (reversión a v1)", v1, wait_for(lambda: registry.version == v1)))
+
+        stop.set()
+        for thread in threads:
+            thread.join()
+        registry.stop()
+
+        for label, expected, elapsed in steps:
+            ok = elapsed is not None
+            failures += not ok
+            shown = f"{elapsed * 1000:6.1f}ms" if elapsed is not None else "sin cambio"
+            print(f"  {'✅' if ok else '❌'} {label}: sirviendo {expected} tras {shown}")
+        failures += registry.version != v1 or errors[0] != 0
+        print(f"  📊 Versión final {registry.version}, recargas {registry.reloads}, rechazos {registry.rejections}")
+        merged = np.concatenate([np.asarray(s) for s in latencies]) * 1e6
+        print(f"  📊 Errores en sesiones {errors[0]} de {len(merged)} predicciones, "
+              f"latencia p50 {np.percentile(merged, 50):.1f}µs p99 {np.percentile(merged, 99):.1f}µs "
+              f"(10 hilos compitiendo por el GIL)")
+
+        # Carga de una versión: .npz (copia en cada proceso) frente a mmap
+        # (páginas compartidas entre procesos a través de la caché de páginas)
+        version_dir = os.path.join(root, v1)
+        timings = {}
+        for name, load in (("npz", lambda: LinearClassifier.load("asl_model.npz")),
+                           ("mmap", lambda: LinearClassifier.load_dir(version_dir))):
+            load()
+            start = time.perf_counter()
+            for _ in range(200):
+                load()
+            timings[name] = (time.perf_counter() - start) / 200 * 1e6
+        weights = LinearClassifier.load_dir(version_dir).weights
+        while isinstance(weights, np.ndarray) and weights.base is not None:
+            weights = weights.base
+        print(f"  ⏱️  Carga de versión: npz {timings['npz']:.0f}µs, mmap {timings['mmap']:.0f}µs "
+              f"(pesos respaldados por mmap: {isinstance(weights, mmap.mmap)})")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
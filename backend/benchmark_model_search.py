@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+"""
+Búsqueda de modelo (model_search) sobre características sintéticas
+etiquetadas por el modelo de producción: precisión por validación cruzada
+y latencia de predicción de una fila, lado a lado, y el modelo elegido con
+varios presupuestos de latencia.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+import model_search
+from asl_classifier import LinearClassifier
+from benchmark_streaming_training import synthetic_features
+
+ROWS = 3000
+BUDGETS_US = (20.0, 200.0, 2000.0)
+
+
+def main():
+    print("🧪 Búsqueda de modelo con presupuesto de latencia")
+    print("=" * 70)
+
+    production = LinearClassifier.load("asl_model.npz")
+    rng = np.random.default_rng(0)
+    X = synthetic_features(rng, ROWS)
+    y = production.predict(X)
+
+    workers = os.cpu_count() or 1
+    start = time.perf_counter()
+    report, selected = model_search.search(X, y, workers=workers)
+    print(f"  ⏱️  {len(report)} candidatos, {ROWS} filas, {workers} procesos: "
+          f"{time.perf_counter() - start:.1f}s")
+    print()
+    model_search.print_report(report, selected, model_search.DEFAULT_LATENCY_BUDGET_US)
+    print()
+
+    for budget in BUDGETS_US:
+        within = [row for row in report if row["latency_us"] <= budget]
+        if within:
+            row = within[0]
+            print(f"  🎯 presupuesto {budget:>6.0f}µs → {row['normalization']}/{row['classifier']} "
+                  f"(precisión {row['cv_accuracy']:.3f}, {row['latency_us']:.1f}µs)")
+        else:
+            print(f"  🎯 presupuesto {budget:>6.0f}µs → ningún candidato")
+
+    # El export NumPy de un candidato lineal debe predecir lo mismo que su pipeline
+    for row in report:
+        if row["linear"] is not None:
+            agreement = np.mean(row["linear"].predict(X) == row["model"].predict(X))
+            if agreement < 0.999:
+                print(f"  ❌ {row['normalization']}/{row['classifier']}: export NumPy coincide "
+                      f"solo en {agreement:.1%}")
+                sys.exit(1)
+    print("  ✅ Exports NumPy de los candidatos lineales equivalentes a sus pipelines")
+
+
+if __name__ == "__main__":
+    main()
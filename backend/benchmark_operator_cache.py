@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark del coste de construcción de CLAHE y kernels morfológicos que
+elimina la caché por hilo de image_ops, con los parámetros que usa cada
+detector.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from image_ops import get_clahe, get_structuring_element
+
+# (detector, operador, parámetros) tal como se llaman por fotograma
+CLAHE_CALLS = [
+    ("ContrastEnhancedHandDetector", "apply_advanced_contrast_enhancement", None, (6, 6)),
+    ("HandDetectionOptimizer", "preprocess_for_complex_background", 3.0, (8, 8)),
+    ("LightweightHandDetectionOptimizer", "fast_image_enhancement", 2.0, (4, 4)),
+]
+
+KERNEL_CALLS = [
+    ("ContrastEnhancedHandDetector", "apply_spectral_hand_enhancement", (3, 3)),
+    ("HandDetectionOptimizer", "skin_color_enhancement", (5, 5)),
+    ("LightweightHandDetectionOptimizer", "smart_roi_detection", (7, 7)),
+]
+
+
+def time_us(fn, repeats=2000):
+    """Tiempo medio por llamada en microsegundos"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    print("🧪 Caché de operadores: coste de construcción eliminado por fotograma")
+    print("=" * 70)
+
+    np.random.seed(0)
+    l_channel = np.random.randint(0, 255, (480, 640), dtype=np.uint8)
+    # Porcentajes de piel variables como en fotogramas reales
+    skin_percentages = np.random.uniform(25, 100, 2000)
+    clip_limits = [min(4.0, 2.0 + p / 20) for p in skin_percentages]
+
+    print("\n🎨 CLAHE (construcción + apply sobre L de 640x480):")
+    for detector, method, clip, grid in CLAHE_CALLS:
+        limits = clip_limits if clip is None else [clip] * len(clip_limits)
+        it = iter(limits * 3)
+        fresh = time_us(lambda: cv2.createCLAHE(clipLimit=next(it), tileGridSize=grid).apply(l_channel), 500)
+        it = iter(limits * 3)
+        cached = time_us(lambda: get_clahe(next(it), grid).apply(l_channel), 500)
+        it = iter(limits * 3)
+        build_only = time_us(lambda: cv2.createCLAHE(clipLimit=next(it), tileGridSize=grid))
+        print(f"  {detector}.{method}")
+        print(f"     nuevo por llamada: {fresh:8.1f}µs, caché: {cached:8.1f}µs, "
+              f"construcción sola: {build_only:6.1f}µs")
+
+    distinct = sorted({round(c / 0.5) * 0.5 for c in clip_limits})
+    print(f"\n  Clip limits distintos: {len(set(clip_limits))} -> {len(distinct)} buckets {distinct}")
+
+    print("\n🔲 Kernels morfológicos:")
+    for detector, method, ksize in KERNEL_CALLS:
+        fresh = time_us(lambda: cv2.getStructuringElement(cv2.MORPH_ELLIPSE, ksize))
+        cached = time_us(lambda: get_structuring_element(cv2.MORPH_ELLIPSE, ksize))
+        print(f"  {detector}.{method} {ksize}: {fresh:5.2f}µs -> {cached:5.2f}µs")
+
+
+if __name__ == "__main__":
+    main()
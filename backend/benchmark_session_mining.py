@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+"""
+Grabación de sesiones (session_recorder) y minado de características
+(mine_sessions) con sesiones sintéticas.
+
+Cada sesión simulada sostiene letras 1-3 s a 12.5 FPS con el temblor
+natural de la mano, pasando de una a otra con una transición corta y con
+algún hueco sin mano. Se mide el coste de grabar una mano en el bucle de
+la sesión, la proporción de fotogramas que sobreviven a la deduplicación,
+el rendimiento del minado y que volver a minar no añade duplicados.
+"""
+
+import contextlib
+import io
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmark_hand_features import LETTERS, synthetic_hands
+from feature_shards import read_manifest
+from hand_features import NUM_LANDMARKS
+from hand_observation import HandObservation
+from mine_sessions import mine, read_samples
+from session_recorder import SessionRecorder
+
+SESSIONS = 20
+FPS = 12.5
+
+
+def simulate_session(rng, prototypes, recorder, start_time):
+    """Secuencia de letras sostenidas con temblor, transiciones y huecos"""
+    now = start_time
+    frames = 0
+    for _ in range(rng.integers(5, 15)):
+        hand, _ = synthetic_hands(rng, prototypes, 1)
+        hand = hand.reshape(NUM_LANDMARKS, 3)
+        target, _ = synthetic_hands(rng, prototypes, 1)
+        target = target.reshape(NUM_LANDMARKS, 3)
+        hold = int(rng.uniform(1, 3) * FPS)
+        for i in range(hold + 4):
+            # Últimos 4 fotogramas: transición hacia la letra siguiente
+            blend = max(0, i - hold + 1) / 5
+            points = (1 - blend) * hand + blend * target + rng.normal(0, 0.0008, hand.shape)
+            observation = HandObservation(points.astype(np.float32), "Right", 0.95)
+            recorder.record(now, 0, observation, "", 640, 480, 90)
+            now += 1 / FPS
+            frames += 1
+        if rng.random() < 0.3:
+            now += 2.0  # mano fuera de cuadro
+    return frames
+
+
+def main():
+    print("🧪 Grabación y minado de sesiones")
+    print("=" * 70)
+
+    rng = np.random.default_rng(0)
+    base = rng.normal(0, 0.5, (1, NUM_LANDMARKS, 3))
+    prototypes = base + rng.normal(0, 0.1, (len(LETTERS), NUM_LANDMARKS, 3))
+    prototypes -= prototypes[:, :1]
+
+    root = tempfile.mkdtemp(prefix="asl_sessions_")
+    try:
+        record_dir, store_dir, shards_dir = f"{root}/sessions", f"{root}/store", f"{root}/shards"
+        frames = 0
+        record_time = 0.0
+        for session in range(SESSIONS):
+            recorder = SessionRecorder(record_dir, flush_every=128)
+            start = time.perf_counter()
+            frames += simulate_session(rng, prototypes, recorder, 1000.0 * session)
+            recorder.close()
+            record_time += time.perf_counter() - start
+
+        hand = HandObservation(np.zeros((NUM_LANDMARKS, 3), dtype=np.float32))
+        recorder = SessionRecorder(f"{root}/overhead")
+        samples = []
+        for i in range(20000):
+            start = time.perf_counter()
+            recorder.record(float(i), 0, hand, "A", 640, 480)
+            samples.append(time.perf_counter() - start)
+        recorder.close()
+        samples = np.array(samples) * 1e6
+        handoffs = samples[recorder.flush_every - 1::recorder.flush_every]
+        print(f"  ⏱️  Grabar una mano en el bucle de sesión: media {samples.mean():.1f}µs; "
+              f"entregar una parte de {recorder.flush_every} manos al hilo de escritura: "
+              f"{handoffs.mean():.0f}µs")
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            read, kept, added = mine(record_dir, store_dir, pseudo_label="asl_model.npz",
+                                     min_confidence=0.5, shards_dir=shards_dir)
+        elapsed = time.perf_counter() - start
+        print(f"  🧹 {read} fotogramas en {SESSIONS} sesiones -> {kept} tras deduplicar "
+              f"({kept / read:.1%}), minado a {read / elapsed:,.0f} fotogramas/s")
+        labeled = sum(shard["rows"] for shard in read_manifest(shards_dir)["shards"])
+        print(f"  🏷️  {labeled} fotogramas con pseudo-etiqueta (confianza >= 0.5) en el shard set")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, _, added_again = mine(record_dir, store_dir)
+        print(f"  🔁 Segundo minado: {added_again} fotogramas nuevos")
+        if read != frames or added != kept or added_again != 0:
+            print("  ❌ el minado no es idempotente o perdió fotogramas")
+            sys.exit(1)
+
+        samples = read_samples(store_dir)
+        sample = next(iter(samples.values()))
+        print(f"  🧾 {len(samples)} filas con procedencia (p. ej. {sample['part']} fila "
+              f"{sample['row']}, letra servida {sample['letter']!r}, rotación {sample['rotation']})")
+        if len(samples) != added or any("pseudo_label" not in sample for sample in samples.values()):
+            print("  ❌ filas minadas sin procedencia")
+            sys.exit(1)
+        print("  ✅ Características de producción en el feature store sin volver a ejecutar MediaPipe")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark de los modos de suavizado de smoothing.EdgePreservingSmoother:
+modelo de coste por modo, fidelidad frente al bilateral d=9 completo y
+paridad de detección sobre los fondos sintéticos de test_optimization_comparison.
+"""
+
+import cv2
+import numpy as np
+import mediapipe as mp
+
+from hand_detection_optimizer import HandDetectionOptimizer
+from smoothing import EdgePreservingSmoother, SMOOTHING_MODES, bilateral_full
+from test_optimization_comparison import create_test_images
+
+
+def psnr(a, b):
+    """PSNR en dB entre dos imágenes uint8"""
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    return float("inf") if mse == 0 else float(10 * np.log10(255.0 ** 2 / mse))
+
+
+def main():
+    print("🧪 Suavizado con preservación de bordes: coste y paridad por modo")
+    print("=" * 70)
+
+    np.random.seed(0)
+    test_images = [(name, cv2.cvtColor(img, cv2.COLOR_BGR2RGB)) for name, img in create_test_images()]
+
+    # 1. Modelo de coste (medido sobre el fondo texturizado, el peor caso)
+    smoother = EdgePreservingSmoother()
+    smoother.calibrate(test_images[1][1], repeats=1)
+    costs = smoother.calibrate(test_images[1][1], repeats=10)
+    shape = test_images[1][1].shape
+    print(f"\n⏱️  Coste por modo ({shape[1]}x{shape[0]}):")
+    for mode in SMOOTHING_MODES:
+        print(f"  {mode:<17} {smoother.predict_cost_ms(mode, shape):7.2f}ms  ({costs[mode]:.1f} ms/Mpx)")
+
+    print("\n📐 Selección por presupuesto:")
+    for budget in (1.0, 4.0, 8.0, 20.0, None):
+        print(f"  presupuesto {str(budget):>5}ms -> {smoother.select_mode(shape, budget)}")
+
+    # 2. Fidelidad frente al bilateral completo
+    print("\n🎯 PSNR frente a bilateral(9, 75, 75):")
+    for name, image_rgb in test_images:
+        reference = bilateral_full(image_rgb, 9, 75)
+        scores = []
+        for mode in SMOOTHING_MODES[1:]:
+            forced = EdgePreservingSmoother(mode=mode)
+            scores.append(f"{mode}={psnr(forced.smooth(image_rgb), reference):.1f}dB")
+        print(f"  {name:<36} " + ", ".join(scores))
+
+    # 3. Paridad de detección con preprocess_for_complex_background
+    print("\n✋ Detecciones tras preprocess_for_complex_background:")
+    optimizer = HandDetectionOptimizer()
+    hands = mp.solutions.hands.Hands(
+        static_image_mode=True,
+        max_num_hands=1,
+        min_detection_confidence=0.3,
+    )
+    detections = {mode: 0 for mode in SMOOTHING_MODES}
+    for name, image_rgb in test_images:
+        row = []
+        for mode in SMOOTHING_MODES:
+            optimizer.smoother = EdgePreservingSmoother(mode=mode)
+            processed = optimizer.preprocess_for_complex_background(image_rgb)
+            found = 1 if hands.process(processed).multi_hand_landmarks else 0
+            detections[mode] += found
+            row.append(f"{mode}={found}")
+        print(f"  {name:<36} " + ", ".join(row))
+    hands.close()
+
+    print("\n📈 Tasa de detección por modo:")
+    for mode in SMOOTHING_MODES:
+        rate = detections[mode] / len(test_images) * 100
+        print(f"  {mode:<17} {detections[mode]}/{len(test_images)} ({rate:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
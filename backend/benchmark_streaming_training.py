@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+"""
+Memoria y precisión del entrenamiento por lotes desde shards
+(train_streaming) frente a cargar todo el conjunto en memoria.
+
+Genera conjuntos sintéticos de 100k y 1M filas etiquetadas por el modelo
+de producción y mide, en un proceso nuevo por caso, el pico de memoria
+residente (ru_maxrss) de una época de entrenamiento en streaming y de la
+carga completa que hace train_model. Con el conjunto pequeño compara
+también la precisión con LogisticRegression en memoria y con el ajuste
+fino desde el modelo de producción.
+"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from asl_classifier import LinearClassifier
+from feature_shards import ShardWriter
+
+SIZES = (100_000, 1_000_000)
+
+STREAMING = """
+import resource, sys
+import train_streaming
+train_streaming.train(sys.argv[1], epochs=1, checkpoint=None)
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+"""
+
+IN_MEMORY = """
+import resource, sys
+import numpy as np
+from feature_shards import iter_batches
+X = np.concatenate([b[1] for b in iter_batches(sys.argv[1], 100_000)])
+y = np.concatenate([b[2] for b in iter_batches(sys.argv[1], 100_000)])
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+"""
+
+
+def synthetic_features(rng, rows):
+    """Manos sintéticas alrededor de un centro aleatorio (coordenadas MediaPipe)"""
+    centers = rng.uniform(0.2, 0.8, (rows, 1, 3)) * np.array([1, 1, 0])
+    return (centers + rng.normal(0, 0.08, (rows, 21, 3))).reshape(rows, 63).astype(np.float32)
+
+
+def peak_mb(script, shards_dir):
+    output = subprocess.run([sys.executable, "-W", "ignore", "-c", script, shards_dir],
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    print("🧪 Entrenamiento en streaming desde shards")
+    print("=" * 70)
+
+    production = LinearClassifier.load("asl_model.npz")
+    rng = np.random.default_rng(0)
+    X_test = synthetic_features(rng, 5000)
+    y_test = production.predict(X_test)
+
+    root = tempfile.mkdtemp(prefix="asl_shards_")
+    try:
+        for rows in SIZES:
+            shards_dir = f"{root}/{rows}"
+            writer = ShardWriter(shards_dir)
+            for start in range(0, rows, 50_000):
+                X = synthetic_features(rng, min(50_000, rows - start))
+                writer.add(X, production.predict(X))
+            writer.close()
+
+            streaming = peak_mb(STREAMING, shards_dir)
+            in_memory = peak_mb(IN_MEMORY, shards_dir)
+            print(f"  💾 {rows:>9,} filas: streaming {streaming:6.0f}MB pico | "
+                  f"todo en memoria (solo cargar X, y) {in_memory:6.0f}MB pico")
+
+        # Precisión frente al ajuste completo, con el conjunto pequeño
+        import warnings
+        from sklearn.linear_model import LogisticRegression
+        from feature_shards import iter_batches
+        import train_streaming
+
+        shards_dir = f"{root}/{SIZES[0]}"
+        batches = list(iter_batches(shards_dir, SIZES[0]))
+        X = np.concatenate([b[1] for b in batches])
+        y = np.concatenate([b[2] for b in batches])
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            full = LogisticRegression(max_iter=1000).fit(X, y)
+        print(f"\n  📏 Precisión (etiquetas del modelo de producción, {len(y_test)} filas nuevas):")
+        print(f"     LogisticRegression en memoria: {np.mean(full.predict(X_test) == y_test):.3f}")
+        streamed = train_streaming.train(shards_dir, epochs=3, checkpoint=None)
+        print(f"     SGD en streaming, 3 épocas:     {np.mean(streamed.predict(X_test) == y_test):.3f}")
+        tuned = train_streaming.train(shards_dir, epochs=1, checkpoint=None, warm_start="asl_model.npz")
+        print(f"     Ajuste fino desde producción:   {np.mean(tuned.predict(X_test) == y_test):.3f}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark del filtro temporal de landmarks: coste por fotograma del buffer
+circular vectorizado (media ponderada y One-Euro) frente al filtro de
+listas anterior, y concordancia de la media ponderada entre ambos.
+"""
+
+import time
+
+import numpy as np
+
+from temporal_filter import OneEuroFilter, TemporalLandmarkFilter
+
+
+class ListTemporalLandmarkFilter:
+    """Filtro anterior de app_optimized.py (listas + bucles), como referencia"""
+
+    def __init__(self, window_size=3, confidence_threshold=0.7):
+        self.window_size = window_size
+        self.confidence_threshold = confidence_threshold
+        self.landmark_history = []
+        self.confidence_history = []
+
+    def add_detection(self, landmarks, confidence):
+        self.landmark_history.append(landmarks)
+        self.confidence_history.append(confidence)
+        if len(self.landmark_history) > self.window_size:
+            self.landmark_history.pop(0)
+            self.confidence_history.pop(0)
+
+    def get_filtered_landmarks(self):
+        if not self.landmark_history:
+            return None
+        if len(self.landmark_history) < 2:
+            return self.landmark_history[-1]
+        total_weight = sum(self.confidence_history)
+        if total_weight == 0:
+            return self.landmark_history[-1]
+        averaged_landmarks = []
+        for i in range(len(self.landmark_history[-1])):
+            x_sum = y_sum = z_sum = 0
+            for j, landmarks in enumerate(self.landmark_history):
+                weight = self.confidence_history[j] / total_weight
+                x_sum += landmarks[i][0] * weight
+                y_sum += landmarks[i][1] * weight
+                z_sum += landmarks[i][2] * weight
+            averaged_landmarks.append([x_sum, y_sum, z_sum])
+        return averaged_landmarks
+
+    def should_use_detection(self):
+        if not self.confidence_history:
+            return True
+        recent_confidence = np.mean(self.confidence_history[-2:]) if len(self.confidence_history) >= 2 else self.confidence_history[-1]
+        return recent_confidence >= self.confidence_threshold
+
+
+def hand_track(frames, rng, radius=0.2):
+    """
+    Trayectoria sintética a 12.5 FPS con ruido de detección: mano que se
+    mueve en círculo (o quieta, manteniendo una letra, con radius=0)
+    """
+    base = rng.uniform(-0.05, 0.05, (21, 3)).astype(np.float32)
+    t = np.arange(frames) * 0.08
+    centers = np.stack([0.5 + radius * np.cos(t), 0.5 + radius * np.sin(t), np.zeros_like(t)], axis=1)
+    truth = centers[:, None, :] + base
+    noise = rng.normal(0, 0.004, (frames, 21, 3))
+    return (truth + noise).astype(np.float32), t, truth
+
+
+def main():
+    print("🧪 Filtro temporal de landmarks (buffer circular NumPy)")
+    print("=" * 70)
+
+    rng = np.random.default_rng(0)
+    frames = 2000
+    track, timestamps, truth = hand_track(frames, rng)
+    confidences = rng.uniform(0.5, 1.0, frames)
+
+    # Concordancia de la media ponderada con el filtro de listas
+    legacy, ring = ListTemporalLandmarkFilter(), TemporalLandmarkFilter(max_gap_s=1.0)
+    max_error = 0.0
+    for points, confidence, timestamp in zip(track, confidences, timestamps):
+        legacy.add_detection(points.tolist(), confidence)
+        ring.add_detection(points, confidence, timestamp)
+        assert legacy.should_use_detection() == ring.should_use_detection()
+        expected = np.asarray(legacy.get_filtered_landmarks(), dtype=np.float64)
+        max_error = max(max_error, float(np.abs(ring.get_filtered_landmarks() - expected).max()))
+    print(f"  📏 Media ponderada: error máximo frente al filtro de listas = {max_error:.2e}")
+
+    # Coste por fotograma: añadir detección + obtener landmarks filtrados
+    timings = {}
+    legacy = ListTemporalLandmarkFilter()
+    samples = []
+    for points, confidence in zip(track, confidences):
+        as_list = points.tolist()
+        start = time.perf_counter()
+        legacy.add_detection(as_list, confidence)
+        legacy.get_filtered_landmarks()
+        samples.append((time.perf_counter() - start) * 1e6)
+    timings["listas (anterior)"] = float(np.median(samples))
+
+    filters = (("buffer circular", lambda: TemporalLandmarkFilter(max_gap_s=1.0)),
+               ("One-Euro", lambda: TemporalLandmarkFilter(max_gap_s=1.0, one_euro=OneEuroFilter())))
+    for name, make in filters:
+        filt = make()
+        samples = []
+        for points, confidence, timestamp in zip(track, confidences, timestamps):
+            start = time.perf_counter()
+            filt.add_detection(points, confidence, timestamp)
+            filt.get_filtered_landmarks()
+            samples.append((time.perf_counter() - start) * 1e6)
+        timings[name] = float(np.median(samples))
+
+    # Error por landmark frente a la posición real (ruido + retardo)
+    for scenario, radius in (("mano quieta", 0.0), ("mano en movimiento", 0.2)):
+        scenario_track, scenario_times, scenario_truth = hand_track(frames, rng, radius)
+        raw_error = np.linalg.norm(scenario_track[:, :, :2] - scenario_truth[:, :, :2], axis=2).mean()
+        print(f"\n  🔍 {scenario}: sin filtro {raw_error:.4f}")
+        for name, make in filters:
+            filt = make()
+            outputs = []
+            for points, timestamp in zip(scenario_track, scenario_times):
+                filt.add_detection(points, 1.0, timestamp)
+                outputs.append(filt.get_filtered_landmarks())
+            error = np.linalg.norm(np.asarray(outputs)[:, :, :2] - scenario_truth[:, :, :2], axis=2).mean()
+            print(f"     {name}: {error:.4f}")
+
+    print()
+    for name, value in timings.items():
+        print(f"  ⏱️  {name}: {value:.1f}µs / fotograma")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+
+"""
+Paridad y coste del motor de validación vectorizado (hand_validation)
+frente a las validaciones originales con bucles sobre landmarks protobuf.
+
+Las funciones de referencia son copia literal de las versiones anteriores
+de cada detector; cualquier discrepancia se cuenta y hace fallar el script.
+"""
+
+import sys
+import time
+
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+from hand_observation import HandObservation
+from hand_validation import (CHALLENGING_CONTEXT_RULES, CONTEXT_RULES, EXCLUSION_RULES, QUICK_RULES,
+                             REALISM_RULES, HandValidator, movement_is_consistent)
+
+
+# --- Referencias (implementaciones originales) ---
+
+def reference_validate_hand_in_context(hand_landmarks, width, height, skin_analysis):
+    if not hand_landmarks or not hand_landmarks.landmark:
+        return False
+    x_coords = [lm.x for lm in hand_landmarks.landmark]
+    y_coords = [lm.y for lm in hand_landmarks.landmark]
+    x_var = max(x_coords) - min(x_coords)
+    y_var = max(y_coords) - min(y_coords)
+    if x_var < 0.02 or y_var < 0.02:
+        return False
+    if skin_analysis["is_challenging_background"]:
+        if x_var < 0.05 or y_var < 0.05:
+            return False
+        wrist = hand_landmarks.landmark[0]
+        middle_finger_tip = hand_landmarks.landmark[12]
+        distance = np.sqrt(
+            (wrist.x - middle_finger_tip.x)**2 +
+            (wrist.y - middle_finger_tip.y)**2
+        )
+        if distance < 0.08:
+            return False
+    return True
+
+
+def reference_simple_landmark_validation(hand_landmarks, image_width, image_height):
+    if not hand_landmarks or not hand_landmarks.landmark:
+        return False
+    x_coords = [lm.x for lm in hand_landmarks.landmark[:5]]
+    y_coords = [lm.y for lm in hand_landmarks.landmark[:5]]
+    x_var = max(x_coords) - min(x_coords)
+    y_var = max(y_coords) - min(y_coords)
+    return bool(x_var > 0.02 and y_var > 0.02)
+
+
+def reference_validate_landmarks(hand_landmarks, image_width, image_height):
+    if not hand_landmarks or not hand_landmarks.landmark:
+        return False
+    for lm in hand_landmarks.landmark:
+        x, y = lm.x * image_width, lm.y * image_height
+        if x < 0 or x >= image_width or y < 0 or y >= image_height:
+            return False
+    x_coords = [lm.x * image_width for lm in hand_landmarks.landmark]
+    y_coords = [lm.y * image_height for lm in hand_landmarks.landmark]
+    hand_width = max(x_coords) - min(x_coords)
+    hand_height = max(y_coords) - min(y_coords)
+    min_size = min(image_width, image_height) * 0.05
+    return hand_width > min_size and hand_height > min_size
+
+
+def reference_is_hand_in_excluded_region(hand_landmarks, width, height, context_info):
+    if not hand_landmarks or not hand_landmarks.landmark:
+        return False
+    x_coords = [lm.x * width for lm in hand_landmarks.landmark]
+    y_coords = [lm.y * height for lm in hand_landmarks.landmark]
+    hand_center_x = sum(x_coords) / len(x_coords)
+    hand_center_y = sum(y_coords) / len(y_coords)
+    for fx, fy, fw, fh in context_info["faces"]["face_regions"]:
+        if fx <= hand_center_x <= fx + fw and fy <= hand_center_y <= fy + fh:
+            return True
+    for ex, ey, ew, eh in context_info["pose"]["excluded_regions"]:
+        if ex <= hand_center_x <= ex + ew and ey <= hand_center_y <= ey + eh:
+            return True
+    return False
+
+
+def reference_calculate_hand_quality_score(hand_landmarks, width, height):
+    if not hand_landmarks or not hand_landmarks.landmark:
+        return 0.0
+    landmarks = hand_landmarks.landmark
+    x_coords = [lm.x * width for lm in landmarks]
+    y_coords = [lm.y * height for lm in landmarks]
+    hand_width = max(x_coords) - min(x_coords)
+    hand_height = max(y_coords) - min(y_coords)
+    aspect_ratio = hand_width / hand_height if hand_height > 0 else 0
+    aspect_score = 1.0 if 0.6 <= aspect_ratio <= 1.4 else 0.3
+    finger_tips = [4, 8, 12, 16, 20]
+    wrist_y = landmarks[0].y * height
+    tips_above_wrist = 0
+    for tip_idx in finger_tips:
+        if tip_idx < len(landmarks):
+            if landmarks[tip_idx].y * height < wrist_y:
+                tips_above_wrist += 1
+    finger_score = tips_above_wrist / len(finger_tips)
+    x_var = np.var(x_coords) if len(x_coords) > 1 else 0
+    y_var = np.var(y_coords) if len(y_coords) > 1 else 0
+    variability_score = min(1.0, (x_var + y_var) / 1000.0)
+    final_score = (aspect_score * 0.3 + finger_score * 0.5 + variability_score * 0.2)
+    return min(1.0, max(0.0, final_score))
+
+
+def reference_is_hand_movement_consistent(position_history):
+    if len(position_history) < 3:
+        return True
+    distances = []
+    for i in range(1, len(position_history)):
+        prev_x, prev_y = position_history[i-1]
+        curr_x, curr_y = position_history[i]
+        distances.append(np.sqrt((curr_x - prev_x)**2 + (curr_y - prev_y)**2))
+    avg_distance = np.mean(distances)
+    max_distance = max(distances)
+    return max_distance <= avg_distance * 3.0
+
+
+# --- Datos de prueba ---
+
+def random_hand(rng):
+    """Mano sintética: 21 puntos alrededor de un centro con escala variable"""
+    hand = landmark_pb2.NormalizedLandmarkList()
+    center = rng.uniform(-0.1, 1.1, 2)
+    scale = rng.choice([rng.uniform(0.002, 0.03), rng.uniform(0.03, 0.3)])
+    for offset in rng.normal(size=(21, 3)):
+        lm = hand.landmark.add()
+        lm.x = center[0] + offset[0] * scale
+        lm.y = center[1] + offset[1] * scale
+        lm.z = offset[2] * 0.05
+    return hand
+
+
+def main():
+    print("🧪 Paridad del motor de validación vectorizado")
+    print("=" * 70)
+
+    rng = np.random.default_rng(0)
+    width, height = 640, 480
+    context_info = {
+        "faces": {"faces": [], "face_regions": [(100, 60, 200, 180)]},
+        "pose": {"pose_landmarks": None, "excluded_regions": [(220, 200, 260, 192)]},
+    }
+    regions = context_info["faces"]["face_regions"] + context_info["pose"]["excluded_regions"]
+
+    validators = {
+        "context": HandValidator(CONTEXT_RULES),
+        "challenging": HandValidator(CHALLENGING_CONTEXT_RULES),
+        "quick": HandValidator(QUICK_RULES),
+        "realism": HandValidator(REALISM_RULES),
+        "exclusion": HandValidator(EXCLUSION_RULES, score=True),
+    }
+    mismatches = {name: 0 for name in list(validators) + ["quality_score", "movement"]}
+    accepted = {name: 0 for name in validators}
+
+    frames = 2000
+    for _ in range(frames):
+        hands = [random_hand(rng) for _ in range(rng.integers(1, 4))]
+        observations = [HandObservation.from_landmarks(hand) for hand in hands]
+        verdicts = {name: v.evaluate(observations, width, height, {"regions": regions})
+                    for name, v in validators.items()}
+
+        for index, hand in enumerate(hands):
+            expected = {
+                "context": reference_validate_hand_in_context(hand, width, height, {"is_challenging_background": False}),
+                "challenging": reference_validate_hand_in_context(hand, width, height, {"is_challenging_background": True}),
+                "quick": reference_simple_landmark_validation(hand, width, height),
+                "realism": reference_validate_landmarks(hand, width, height),
+                "exclusion": not reference_is_hand_in_excluded_region(hand, width, height, context_info),
+            }
+            for name, value in expected.items():
+                got = bool(verdicts[name].accepted[index])
+                mismatches[name] += got != bool(value)
+                accepted[name] += got
+            score = reference_calculate_hand_quality_score(hand, width, height)
+            mismatches["quality_score"] += float(verdicts["exclusion"].scores[index]) != score
+
+        history = [tuple(p) for p in rng.uniform(0, 640, (rng.integers(0, 11), 2))]
+        mismatches["movement"] += movement_is_consistent(history) != reference_is_hand_movement_consistent(history)
+
+    for name, count in mismatches.items():
+        status = "✅" if count == 0 else "❌"
+        extra = f" (aceptadas {accepted[name]})" if name in accepted else ""
+        print(f"  {status} {name}: {count} discrepancias{extra}")
+
+    # Coste por fotograma con N manos candidatas: reglas de contexto difícil
+    # + exclusión con puntuación (la validación más completa de los detectores)
+    for count in (1, 2, 4):
+        hands = [random_hand(rng) for _ in range(count)]
+        observations = [HandObservation.from_landmarks(hand) for hand in hands]
+
+        def legacy():
+            for hand in hands:
+                reference_validate_hand_in_context(hand, width, height, {"is_challenging_background": True})
+                reference_is_hand_in_excluded_region(hand, width, height, context_info)
+                reference_calculate_hand_quality_score(hand, width, height)
+
+        def vectorized():
+            validators["challenging"].evaluate(observations, width, height)
+            validators["exclusion"].evaluate(observations, width, height, {"regions": regions})
+
+        timings = []
+        for fn in (legacy, vectorized):
+            fn()
+            start = time.perf_counter()
+            for _ in range(2000):
+                fn()
+            timings.append((time.perf_counter() - start) / 2000 * 1e6)
+        print(f"  ⏱️  {count} mano(s): bucles {timings[0]:.1f}µs -> vectorizado {timings[1]:.1f}µs "
+              f"(x{timings[0] / timings[1]:.1f})")
+
+    if any(mismatches.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Detección de contexto (caras, torso) en segundo plano a baja frecuencia.
+
+Las regiones de exclusión cambian mucho más despacio que la mano, así que no
+hace falta calcularlas en cada fotograma ni dentro de la ruta de detección.
+Un hilo de baja prioridad procesa como mucho ``rate_hz`` fotogramas por
+segundo (siempre el más reciente), asocia las cajas nuevas con las
+anteriores y publica una instantánea inmutable. El hilo del fotograma solo
+lee la última instantánea publicada: nunca espera al detector de contexto.
+El hilo se crea con el primer fotograma entregado y se detiene con ``stop``.
+
+Las cajas se guardan en coordenadas relativas (0-1) para que no dependan de
+la resolución a la que se ejecutó la detección.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Expansión de la caja de cara (por lado) para no aceptar manos pegadas a ella
+FACE_EXPANSION = 0.3
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> float:
+    """Intersección sobre unión de dos cajas relativas (x, y, w, h)"""
+    x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+    x1, y1 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    inter = max(0.0, x1 - x0) * max(0.0, y1 - y0)
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return float(inter / union) if union > 0 else 0.0
+
+
+class TrackedRegion:
+    """Caja relativa seguida entre detecciones de contexto"""
+
+    __slots__ = ("kind", "box", "last_seen")
+
+    def __init__(self, kind: str, box: np.ndarray, last_seen: float):
+        self.kind = kind
+        self.box = box
+        self.last_seen = last_seen
+
+
+class ContextSnapshot:
+    """Regiones publicadas por el hilo de contexto (solo lectura)"""
+
+    __slots__ = ("faces", "torsos", "pose_landmarks", "timestamp")
+
+    def __init__(self, faces: Tuple[Tuple[np.ndarray, float], ...] = (),
+                 torsos: Tuple[Tuple[np.ndarray, float], ...] = (),
+                 pose_landmarks: Any = None, timestamp: float = 0.0):
+        self.faces = faces      # (caja relativa, último instante visto)
+        self.torsos = torsos
+        self.pose_landmarks = pose_landmarks
+        self.timestamp = timestamp
+
+
+class ContextWorker:
+    """
+    Hilo de contexto con las regiones de exclusión más recientes
+
+    - detect_fn(imagen) -> (cajas_cara, cajas_torso, pose_landmarks), con
+      cajas relativas (x, y, w, h); solo se llama desde el hilo del worker
+    - rate_hz: frecuencia máxima de detección
+    - ttl_s: tiempo que una región sigue vigente sin volver a verse
+    - match_iou / smoothing: asociación y suavizado de cajas entre detecciones
+    """
+
+    def __init__(self, detect_fn: Callable[[np.ndarray], Tuple[Sequence, Sequence, Any]],
+                 rate_hz: float = 3.0, ttl_s: float = 1.5, match_iou: float = 0.3,
+                 smoothing: float = 0.5, niceness: int = 10):
+        self.detect_fn = detect_fn
+        self.min_interval = 1.0 / rate_hz
+        self.ttl_s = ttl_s
+        self.match_iou = match_iou
+        self.smoothing = smoothing
+        self.niceness = niceness
+
+        self._tracks: List[TrackedRegion] = []
+        self._snapshot = ContextSnapshot()
+        self._pending: Optional[np.ndarray] = None
+        self._last_submit = 0.0
+        self._wakeup = threading.Condition()
+        self._running = True
+        self._thread: Optional[threading.Thread] = None
+
+        self.runs = 0
+        self.last_run_ms = 0.0
+
+    def submit(self, image_rgb: np.ndarray, now: Optional[float] = None) -> bool:
+        """
+        Ofrece un fotograma al hilo de contexto sin bloquear.
+
+        Se ignora si aún no ha pasado ``1 / rate_hz`` desde el último
+        aceptado; si el worker está ocupado, el pendiente se sustituye por el
+        más reciente. La imagen no debe modificarse después de entregarla.
+        """
+        now = time.monotonic() if now is None else now
+        if now - self._last_submit < self.min_interval:
+            return False
+        self._last_submit = now
+        with self._wakeup:
+            if not self._running:
+                return False
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="context-worker", daemon=True)
+                self._thread.start()
+            self._pending = image_rgb
+            self._wakeup.notify()
+        return True
+
+    def _loop(self):
+        """Bucle del hilo: espera un fotograma, detecta y publica"""
+        try:
+            # Prioridad baja solo para este hilo (Linux: nice por hilo)
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.niceness)
+        except (AttributeError, OSError):
+            pass
+
+        while True:
+            with self._wakeup:
+                while self._pending is None and self._running:
+                    self._wakeup.wait()
+                if not self._running:
+                    return
+                image, self._pending = self._pending, None
+
+            start = time.perf_counter()
+            try:
+                faces, torsos, pose_landmarks = self.detect_fn(image)
+            except Exception:
+                # Si falla la detección de contexto, se conservan las regiones
+                # vigentes hasta que caduquen
+                continue
+            self.last_run_ms = float((time.perf_counter() - start) * 1000)
+            self.runs += 1
+            self._publish(faces, torsos, pose_landmarks, time.monotonic())
+
+    def _associate(self, kind: str, boxes: Sequence, now: float):
+        """Empareja cajas nuevas con las seguidas (IoU voraz) y suaviza"""
+        candidates = [t for t in self._tracks if t.kind == kind]
+        for box in boxes:
+            box = np.asarray(box, dtype=np.float32)
+            best, best_iou = None, self.match_iou
+            for track in candidates:
+                overlap = box_iou(track.box, box)
+                if overlap >= best_iou:
+                    best, best_iou = track, overlap
+            if best is None:
+                self._tracks.append(TrackedRegion(kind, box, now))
+            else:
+                best.box = (1 - self.smoothing) * best.box + self.smoothing * box
+                best.last_seen = now
+                candidates.remove(best)
+
+    def _publish(self, faces: Sequence, torsos: Sequence, pose_landmarks: Any, now: float):
+        """Actualiza el seguimiento y publica una instantánea nueva"""
+        self._associate("face", faces, now)
+        self._associate("torso", torsos, now)
+        self._tracks = [t for t in self._tracks if now - t.last_seen <= self.ttl_s]
+        # Sustitución atómica de la referencia: los lectores no necesitan lock
+        self._snapshot = ContextSnapshot(
+            faces=tuple((t.box.copy(), t.last_seen) for t in self._tracks if t.kind == "face"),
+            torsos=tuple((t.box.copy(), t.last_seen) for t in self._tracks if t.kind == "torso"),
+            pose_landmarks=pose_landmarks,
+            timestamp=now,
+        )
+
+    def context_info(self, width: int, height: int, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Regiones vigentes en píxeles de una imagen ``width`` x ``height``, con
+        el mismo formato que ``detect_faces_and_poses``. No bloquea.
+        """
+        now = time.monotonic() if now is None else now
+        snapshot = self._snapshot
+        scale = np.array([width, height, width, height], dtype=np.float32)
+
+        faces, face_regions, excluded_regions = [], [], []
+        for box, last_seen in snapshot.faces:
+            if now - last_seen > self.ttl_s:
+                continue
+            x, y, w, h = (int(v) for v in box * scale)
+            faces.append((x, y, w, h))
+            x_exp = max(0, x - int(w * FACE_EXPANSION))
+            y_exp = max(0, y - int(h * FACE_EXPANSION))
+            w_exp = min(width - x_exp, w + int(w * FACE_EXPANSION * 2))
+            h_exp = min(height - y_exp, h + int(h * FACE_EXPANSION * 2))
+            face_regions.append((x_exp, y_exp, w_exp, h_exp))
+        for box, last_seen in snapshot.torsos:
+            if now - last_seen <= self.ttl_s:
+                excluded_regions.append(tuple(int(v) for v in box * scale))
+
+        pose_fresh = now - snapshot.timestamp <= self.ttl_s
+        return {
+            "faces": {"faces": faces, "face_regions": face_regions},
+            "pose": {
+                "pose_landmarks": snapshot.pose_landmarks if pose_fresh else None,
+                "excluded_regions": excluded_regions,
+            },
+        }
+
+    def stats(self) -> Dict[str, float]:
+        """Ejecuciones y coste de la última detección de contexto"""
+        return {
+            "context_runs": int(self.runs),
+            "context_last_run_ms": float(self.last_run_ms),
+            "context_age_ms": float((time.monotonic() - self._snapshot.timestamp) * 1000)
+            if self._snapshot.timestamp else -1.0,
+        }
+
+    def stop(self, timeout: Optional[float] = 1.0):
+        """Detiene el hilo (espera a que termine la detección en curso)"""
+        with self._wakeup:
+            self._running = False
+            self._wakeup.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
@@ -0,0 +1,200 @@
+"""
+Near-duplicate pruning of the training images with perceptual hashes.
+
+The Kaggle ASL folders contain long runs of nearly identical frames. They
+cost MediaPipe time in ``train_model.py`` and over-weight a few poses in
+training. This command computes a 64-bit difference hash (dHash) of every
+image, finds pairs of images of the same letter whose hashes differ in at
+most ``max_distance`` bits, and keeps the first image of every group of
+near-duplicates (in file order). The result is a manifest that
+``train_model.py --manifest`` reads instead of listing the folders.
+
+Hashing needs an 8x9 grayscale thumbnail only, so JPEGs are decoded at 1/8
+scale, in chunks, by a process pool; the bits of a whole chunk are computed
+with one NumPy comparison.
+
+Near-duplicates are found with a bucketed Hamming index: the 64 bits are
+split into ``max_distance + 1`` bands, and two hashes within
+``max_distance`` bits must agree exactly on at least one band
+(pigeonhole). Images are visited in file order and each one is compared
+only with the already-kept images that share a band value with it. Kept
+images are more than ``max_distance`` bits apart, so buckets stay small
+even for long bursts of near-identical frames.
+
+Usage:
+    python dedup_images.py asl_alphabet_train pruned.json --max-distance 4
+    python train_model.py asl_alphabet_train asl_model.pkl --manifest pruned.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+MANIFEST_FORMAT_VERSION = 1
+
+LETTERS: List[str] = [chr(c) for c in range(ord("A"), ord("Z") + 1)]
+
+# Images per task sent to a worker process
+CHUNK_SIZE = 256
+
+# Set bits of every byte value, for Hamming distances on NumPy 1.x
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def list_images(data_dir: str) -> List[Tuple[str, str]]:
+    """Return (path, letter) for every image, in a deterministic order."""
+    items: List[Tuple[str, str]] = []
+    for letter in LETTERS:
+        letter_dir = os.path.join(data_dir, letter)
+        if not os.path.isdir(letter_dir):
+            print(f"Warning: directory '{letter_dir}' not found; skipping")
+            continue
+        for fname in sorted(os.listdir(letter_dir)):
+            if fname.lower().endswith((".jpg", ".jpeg", ".png")):
+                items.append((os.path.join(letter_dir, fname), letter))
+    return items
+
+
+def _hash_chunk(paths: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """dHash of every image of the chunk, and whether it could be decoded."""
+    thumbnails = np.zeros((len(paths), 8, 9), dtype=np.uint8)
+    valid = np.zeros(len(paths), dtype=bool)
+    for i, path in enumerate(paths):
+        image = cv2.imread(path, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        if image is None:
+            continue
+        # Same center square that train_model crops before detection
+        h, w = image.shape
+        side = min(h, w)
+        y0, x0 = (h - side) // 2, (w - side) // 2
+        thumbnails[i] = cv2.resize(image[y0:y0 + side, x0:x0 + side], (9, 8), interpolation=cv2.INTER_AREA)
+        valid[i] = True
+    bits = thumbnails[:, :, 1:] > thumbnails[:, :, :-1]
+    hashes = np.packbits(bits.reshape(len(paths), 64), axis=1).view(">u8").ravel().astype(np.uint64)
+    return hashes, valid
+
+
+def _init_worker() -> None:
+    # The pool already uses every core; keep OpenCV single-threaded per worker
+    cv2.setNumThreads(1)
+
+
+def hash_images(paths: Sequence[str], workers: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """(hashes, valid) of ``paths``, computed in chunks by ``workers`` processes."""
+    chunks = [paths[start:start + CHUNK_SIZE] for start in range(0, len(paths), CHUNK_SIZE)]
+    workers = min(workers, len(chunks))
+    if workers <= 1:
+        results = [_hash_chunk(chunk) for chunk in chunks]
+    else:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+            results = list(pool.map(_hash_chunk, chunks))
+    if not results:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=bool)
+    return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results])
+
+
+def hamming(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Bitwise Hamming distance between uint64 hash arrays."""
+    return _POPCOUNT[np.bitwise_xor(a, b).view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def _bands(max_distance: int) -> List[Tuple[int, int]]:
+    """(shift, mask) of the ``max_distance + 1`` bands the 64 hash bits are split into."""
+    bands = max_distance + 1
+    if bands > 64:
+        raise ValueError("max_distance must be below 64")
+    widths = [64 // bands + (1 if band < 64 % bands else 0) for band in range(bands)]
+    shifts = np.cumsum([0] + widths[:-1]).tolist()
+    return [(shift, (1 << width) - 1) for shift, width in zip(shifts, widths)]
+
+
+def select_representatives(hashes: np.ndarray, max_distance: int) -> np.ndarray:
+    """
+    Boolean mask of the images to keep: in order, an image is dropped if it
+    is within ``max_distance`` bits of an image kept before it.
+    """
+    # Exact duplicates first: only the first image of every hash survives
+    unique, first = np.unique(hashes, return_index=True)
+    keep = np.zeros(len(hashes), dtype=bool)
+    bands = _bands(max_distance)
+    buckets: List[Dict[int, List[int]]] = [{} for _ in bands]
+
+    # Greedy pass over the distinct hashes in file order, against kept ones only
+    for index in np.argsort(first, kind="stable").tolist():
+        value = int(unique[index])
+        keys = [(value >> shift) & mask for shift, mask in bands]
+        if any(bin(value ^ kept).count("1") <= max_distance
+               for bucket, key in zip(buckets, keys) for kept in bucket.get(key, ())):
+            continue
+        keep[first[index]] = True
+        for bucket, key in zip(buckets, keys):
+            bucket.setdefault(key, []).append(value)
+    return keep
+
+
+def write_manifest(path: str, data_dir: str, items: Sequence[Tuple[str, str]], max_distance: int,
+                   total: int) -> None:
+    """Write the pruned (path, letter) list with paths relative to ``data_dir``."""
+    manifest = {
+        "format_version": MANIFEST_FORMAT_VERSION,
+        "data_dir": os.path.abspath(data_dir),
+        "hash": "dhash64",
+        "max_distance": max_distance,
+        "total_images": total,
+        "images": [[os.path.relpath(image, data_dir), letter] for image, letter in items],
+    }
+    staging = path + ".tmp"
+    with open(staging, "w") as f:
+        json.dump(manifest, f)
+    os.replace(staging, path)
+
+
+def read_manifest(path: str, data_dir: Optional[str] = None) -> List[Tuple[str, str]]:
+    """(path, letter) items of a manifest, resolved against ``data_dir`` (default: the recorded one)."""
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != MANIFEST_FORMAT_VERSION:
+        raise ValueError(f"Unsupported image manifest format in {path}")
+    base = data_dir or manifest["data_dir"]
+    return [(os.path.join(base, image), letter) for image, letter in manifest["images"]]
+
+
+def prune(data_dir: str, max_distance: int = 4, workers: int = 1) -> Tuple[List[Tuple[str, str]], int]:
+    """Pruned (path, letter) items of ``data_dir`` and the number of images listed."""
+    items = list_images(data_dir)
+    start_time = time.perf_counter()
+    hashes, valid = hash_images([path for path, _ in items], workers)
+    elapsed = time.perf_counter() - start_time
+    print(f"Hashed {len(items)} images in {elapsed:.1f}s ({len(items) / max(elapsed, 1e-9):.0f} images/sec)")
+
+    letters = np.array([letter for _, letter in items])
+    keep = ~valid  # unreadable images are left for train_model to report
+    for letter in np.unique(letters):
+        members = np.flatnonzero((letters == letter) & valid)
+        keep[members[select_representatives(hashes[members], max_distance)]] = True
+    kept = [item for item, k in zip(items, keep.tolist()) if k]
+    return kept, len(items)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("data_dir", help="path to asl_alphabet_train")
+    parser.add_argument("manifest", help="output manifest, e.g. pruned.json")
+    parser.add_argument("--max-distance", type=int, default=4,
+                        help="max differing hash bits of near-duplicates (default: 4)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes used for hashing (default: all cores)")
+    args = parser.parse_args()
+    kept, total = prune(args.data_dir, args.max_distance, args.workers)
+    write_manifest(args.manifest, args.data_dir, kept, args.max_distance, total)
+    removed = total - len(kept)
+    print(f"Kept {len(kept)}/{total} images ({removed} near-duplicates removed, "
+          f"{removed / max(total, 1):.1%}); manifest written to {args.manifest}")
@@ -0,0 +1,424 @@
+"""
+Planificador en cascada para las distintas configuraciones de MediaPipe Hands.
+
+Las configuraciones se ordenan de la más barata a la más cara (p. ej.
+tracking estándar -> sensible -> static_image_mode). En cada fotograma se
+ejecuta solo el nivel actual; se escala tras varios fallos seguidos y se
+vuelve a bajar con histéresis tras varios aciertos. Un segundo grafo en el
+mismo fotograma solo se ejecuta si el presupuesto de tiempo lo permite según
+el coste medido de cada configuración.
+
+Opcionalmente (modo especulativo) en estado difícil se lanzan dos
+configuraciones en paralelo y se usa la primera respuesta válida. El grafo
+perdedor no se puede interrumpir: la sesión espera a que termine antes de
+lanzar el siguiente fotograma y esa espera se contabiliza. Si el pool está
+ocupado por otra sesión, no hay dos niveles que lanzar o fallan todos los
+grafos, el fotograma sigue el camino secuencial.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class CascadeLevel:
+    """Configuración de Hands de la cascada (compartida por todas las sesiones)"""
+
+    __slots__ = ("name", "graph", "lock")
+
+    def __init__(self, name: str, graph: Any):
+        self.name = name
+        self.graph = graph
+        # Un grafo de MediaPipe no admite process() concurrente
+        self.lock = threading.Lock()
+
+
+class CascadeLevelStats:
+    """
+    Estadísticas de una configuración de Hands en una sesión
+
+    Un grafo perdedor de una carrera especulativa las actualiza desde un hilo
+    del pool mientras la sesión sigue, por eso se modifican bajo ``lock``.
+    """
+
+    __slots__ = ("cost_ms", "attempts", "successes", "lock")
+
+    def __init__(self):
+        self.cost_ms: Optional[float] = None  # EMA del tiempo de process()
+        self.attempts = 0
+        self.successes = 0
+        self.lock = threading.Lock()
+
+    def record_attempt(self, elapsed_ms: Optional[float], smoothing: float):
+        """Cuenta una ejecución; ``elapsed_ms`` None si process() falló (sin coste)"""
+        with self.lock:
+            if elapsed_ms is not None:
+                self.cost_ms = elapsed_ms if self.cost_ms is None else (
+                    (1 - smoothing) * self.cost_ms + smoothing * elapsed_ms
+                )
+            self.attempts += 1
+
+    def record_success(self):
+        with self.lock:
+            self.successes += 1
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.attempts if self.attempts else 0.0
+
+
+class CascadeState:
+    """
+    Estado mutable de la cascada de una sesión
+
+    Cada sesión (WebSocket) crea el suyo con ``DetectorCascade.new_state``:
+    los fallos de un cliente no escalan al resto y los costes y tasas de
+    acierto no mezclan clientes.
+    """
+
+    __slots__ = ("level", "consecutive_misses", "consecutive_hits", "backoff", "levels", "pending")
+
+    def __init__(self, num_levels: int):
+        self.level = 0
+        self.consecutive_misses = 0
+        self.consecutive_hits = 0
+        self.backoff = 1
+        self.levels: List[CascadeLevelStats] = [CascadeLevelStats() for _ in range(num_levels)]
+        # Grafos perdedores de la última carrera especulativa aún en ejecución
+        self.pending: List[Future] = []
+
+
+class DetectorCascade:
+    """
+    Selección de configuración de Hands con costes medidos e histéresis
+
+    - escalate_after: fallos consecutivos en un nivel antes de subir
+    - deescalate_after: aciertos consecutivos antes de bajar (> escalate_after)
+    - giveup_after: fallos consecutivos en el nivel más alto antes de volver
+      al nivel 0; cada abandono duplica el umbral de escalado hasta el
+      siguiente acierto, para no pagar el detector de palma en cada fotograma
+      cuando simplemente no hay mano en escena
+
+    La cascada solo guarda las configuraciones y los parámetros; el nivel,
+    las rachas y los costes medidos viven en un ``CascadeState`` por sesión.
+    """
+
+    def __init__(self, levels: Sequence[Tuple[str, Any]], escalate_after: int = 3,
+                 deescalate_after: int = 10, giveup_after: int = 15,
+                 max_backoff: int = 4, cost_smoothing: float = 0.2):
+        if not levels:
+            raise ValueError("La cascada necesita al menos una configuración")
+        self.levels: List[CascadeLevel] = [CascadeLevel(name, graph) for name, graph in levels]
+        self.escalate_after = escalate_after
+        self.deescalate_after = deescalate_after
+        self.giveup_after = giveup_after
+        self.max_backoff = max_backoff
+        self.cost_smoothing = cost_smoothing
+        self.speculative: Optional["SpeculativeRunner"] = None
+
+    def new_state(self) -> CascadeState:
+        """Estado inicial para una nueva sesión"""
+        return CascadeState(len(self.levels))
+
+    def enable_speculative(self, max_workers: int = 2):
+        """Activa la detección especulativa en paralelo para estados difíciles"""
+        if self.speculative is None and len(self.levels) > 1:
+            self.speculative = SpeculativeRunner(max_workers)
+
+    def in_hard_state(self, state: CascadeState) -> bool:
+        """La sesión ha escalado por fallos repetidos"""
+        return state.level > 0
+
+    def predicted_cost_ms(self, level: int, state: CascadeState) -> float:
+        """Coste medido del nivel en la sesión (0 si aún no se ha ejecutado)"""
+        cost = state.levels[level].cost_ms
+        return cost if cost is not None else 0.0
+
+    def _run(self, level: int, image, state: CascadeState) -> Tuple[Any, float, float]:
+        """
+        Ejecuta el grafo del nivel y actualiza su coste medido en la sesión.
+        Devuelve (resultados, ms de process(), ms de espera por el lock).
+        """
+        entry = self.levels[level]
+        stats = state.levels[level]
+        requested = time.perf_counter()
+        with entry.lock:
+            start = time.perf_counter()
+            try:
+                results = entry.graph.process(image)
+            except Exception:
+                stats.record_attempt(None, self.cost_smoothing)
+                raise
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        wait_ms = (start - requested) * 1000
+        stats.record_attempt(elapsed_ms, self.cost_smoothing)
+        return results, elapsed_ms, wait_ms
+
+    def _wait_pending(self, state: CascadeState) -> float:
+        """Espera a los perdedores de la carrera anterior; devuelve los ms esperados"""
+        if not state.pending:
+            return 0.0
+        start = time.perf_counter()
+        wait(state.pending)
+        state.pending = []
+        wait_ms = (time.perf_counter() - start) * 1000
+        if self.speculative is not None:
+            self.speculative.record_wait(wait_ms)
+        return wait_ms
+
+    def process(self, image, state: CascadeState, validate: Optional[Callable[[Any, list], list]] = None,
+                min_level: int = 0, budget_ms: Optional[float] = None) -> Tuple[Any, list, Dict[str, Any]]:
+        """
+        Detecta con el nivel actual de la sesión ``state`` (al menos ``min_level``).
+
+        ``validate(resultados, rechazos)`` devuelve la lista de manos aceptadas
+        y añade a ``rechazos`` los motivos de las descartadas; por defecto se
+        aceptan todas. Devuelve (resultados, manos_aceptadas, info); los
+        rechazos de los grafos que cuentan para el fotograma van en
+        ``info["validation_rejections"]``.
+        """
+        if validate is None:
+            validate = lambda r, rejections: list(r.multi_hand_landmarks or [])
+
+        # El grafo perdedor de la carrera anterior aún puede tener su lock
+        pending_ms = self._wait_pending(state)
+
+        level = min(max(state.level, min_level), len(self.levels) - 1)
+
+        if self.speculative is not None and self.in_hard_state(state):
+            speculative = self._process_speculative(image, state, validate, level, min_level, pending_ms)
+            if speculative is not None:
+                return speculative
+
+        rejections: list = []
+        results, spent_ms, wait_ms = self._run(level, image, state)
+        accepted = validate(results, rejections)
+        graphs_run = 1
+
+        # Reintento en el mismo fotograma solo si cabe en el presupuesto
+        while (not accepted and budget_ms is not None and level + 1 < len(self.levels)
+               and spent_ms + self.predicted_cost_ms(level + 1, state) <= budget_ms):
+            level += 1
+            retry_results, retry_ms, retry_wait_ms = self._run(level, image, state)
+            spent_ms += retry_ms
+            wait_ms += retry_wait_ms
+            graphs_run += 1
+            retry_accepted = validate(retry_results, rejections)
+            if retry_accepted:
+                results, accepted = retry_results, retry_accepted
+
+        if accepted:
+            state.levels[level].record_success()
+        self._update_state(state, level, bool(accepted), min_level)
+
+        info = {
+            "cascade_config": self.levels[level].name,
+            "cascade_level": int(level),
+            "cascade_graphs_run": int(graphs_run),
+            "cascade_time_ms": float(spent_ms + wait_ms + pending_ms),
+            "cascade_wait_ms": float(wait_ms + pending_ms),
+            "speculative": False,
+            "validation_rejections": rejections,
+        }
+        return results, accepted, info
+
+    def _process_speculative(self, image, state: CascadeState, validate, level: int, min_level: int,
+                             pending_ms: float):
+        """
+        Lanza el nivel escalado y el anterior a la vez; gana el primero válido.
+        Devuelve None (camino secuencial) si no hay dos niveles desde
+        ``min_level``, el pool está ocupado o fallan todos los grafos.
+        """
+        primary = max(min(max(min_level, level - 1), len(self.levels) - 2), min_level)
+        if primary + 1 >= len(self.levels):
+            return None
+        candidates = [primary, primary + 1]
+
+        def task(candidate: int):
+            # Cada grafo valida sobre su propia lista: solo se usan los
+            # rechazos del ganador, el perdedor puede terminar más tarde
+            rejections: list = []
+            results, elapsed_ms, _ = self._run(candidate, image, state)
+            return results, validate(results, rejections), rejections, elapsed_ms
+
+        race = self.speculative.race(candidates, task)
+        if race is None:
+            return None
+        winner, results, accepted, rejections, wall_ms, losers = race
+        state.pending = losers
+        if accepted:
+            state.levels[winner].record_success()
+        self._update_state(state, winner, bool(accepted), min_level)
+
+        info = {
+            "cascade_config": self.levels[winner].name,
+            "cascade_level": int(winner),
+            "cascade_graphs_run": len(candidates),
+            "cascade_time_ms": float(wall_ms + pending_ms),
+            "cascade_wait_ms": float(pending_ms),
+            "speculative": True,
+            "validation_rejections": rejections,
+        }
+        return results, accepted, info
+
+    def _update_state(self, state: CascadeState, used_level: int, success: bool, min_level: int):
+        """Escalado tras fallos repetidos y desescalado con histéresis"""
+        top = len(self.levels) - 1
+        if success:
+            state.consecutive_misses = 0
+            state.consecutive_hits += 1
+            state.backoff = 1
+            state.level = used_level
+            if state.level > min_level and state.consecutive_hits >= self.deescalate_after:
+                state.level -= 1
+                state.consecutive_hits = 0
+            return
+
+        state.consecutive_hits = 0
+        state.consecutive_misses += 1
+        if used_level >= top:
+            if state.consecutive_misses >= self.giveup_after:
+                # Nada que detectar: volver al nivel barato y espaciar escalados
+                state.level = 0
+                state.consecutive_misses = 0
+                state.backoff = min(self.max_backoff, state.backoff * 2)
+        elif state.consecutive_misses >= self.escalate_after * state.backoff:
+            state.level = used_level + 1
+            state.consecutive_misses = 0
+
+    def stats(self, state: CascadeState) -> Dict[str, Dict[str, float]]:
+        """Coste medio y tasa de acierto por configuración en la sesión"""
+        return {
+            entry.name: {
+                "cost_ms": float(stats.cost_ms or 0.0),
+                "attempts": int(stats.attempts),
+                "success_rate": float(stats.success_rate),
+            }
+            for entry, stats in zip(self.levels, state.levels)
+        }
+
+
+class SpeculativeRunner:
+    """
+    Ejecución en paralelo de varias configuraciones de Hands
+
+    Se queda con el primer resultado que pasa la validación; el resto se
+    cancela si aún no ha empezado o se devuelve al llamante, que debe esperar
+    a que termine antes de volver a usar los grafos. El pool es compartido
+    por todas las sesiones: una carrera solo se lanza si quedan hilos libres
+    para todos sus candidatos (si no, se omite en lugar de encolarse detrás
+    de la carrera de otra sesión). Un candidato que lanza una excepción
+    cuenta como fallo. Lleva la cuenta del CPU
+    extra gastado frente a la latencia ahorrada respecto a la versión
+    secuencial (primario y, si falla, el de respaldo); la espera por los
+    perdedores (``record_wait``) cuenta como latencia.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hands-speculative")
+        self.max_workers = max_workers
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0       # Tareas lanzadas aún sin terminar (de todas las sesiones)
+        self.skipped = 0          # Carreras omitidas por pool ocupado
+        self.failures = 0         # Candidatos que lanzaron una excepción
+        self.races = 0
+        self.cpu_ms = 0.0         # Tiempo de todos los grafos lanzados
+        self.latency_ms = 0.0     # Espera real hasta tener respuesta
+        self.sequential_ms = 0.0  # Tiempo que habría gastado la versión secuencial
+
+    def race(self, candidates: List[int], task: Callable[[int], Tuple[Any, list, list, float]]):
+        """
+        Ejecuta ``task(candidate)`` -> (resultados, manos_aceptadas, rechazos,
+        ms) para cada candidato (en orden de prioridad) y devuelve (ganador,
+        resultados, manos_aceptadas, rechazos, latencia_ms, perdedores), donde
+        perdedores son los futures que siguen en ejecución. Sin ningún
+        resultado válido gana el último candidato que respondió.
+
+        Devuelve None sin lanzar nada si el pool no tiene hilos libres para
+        todos los candidatos, o si todos los candidatos lanzaron excepción.
+        """
+        with self._stats_lock:
+            if self._in_flight + len(candidates) > self.max_workers:
+                self.skipped += 1
+                return None
+            self._in_flight += len(candidates)
+
+        def release(_future):
+            with self._stats_lock:
+                self._in_flight -= 1
+
+        start = time.perf_counter()
+        futures = {self.executor.submit(task, candidate): candidate for candidate in candidates}
+        for future in futures:
+            future.add_done_callback(release)
+        winner = None
+
+        for future in as_completed(futures):
+            candidate = futures[future]
+            try:
+                results, accepted, rejections, _ = future.result()
+            except Exception as e:
+                print(f"Error in speculative hand detection (level {candidate}): {e}")
+                with self._stats_lock:
+                    self.failures += 1
+                continue
+            if accepted or winner is None or candidate > winner[0]:
+                winner = (candidate, results, accepted, rejections)
+            if accepted:
+                break
+        wall_ms = (time.perf_counter() - start) * 1000
+
+        for future in futures:
+            future.cancel()  # Sin efecto si ya está en ejecución
+        losers = [future for future in futures if not future.done()]
+
+        remaining = [len(futures)]
+        remaining_lock = threading.Lock()
+
+        def account(_future):
+            # Contabilizar cuando todos los grafos lanzados hayan terminado
+            with remaining_lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            outcomes = {}
+            for future, candidate in futures.items():
+                if not future.cancelled() and future.exception() is None:
+                    _, accepted, _, elapsed_ms = future.result()
+                    outcomes[candidate] = (bool(accepted), elapsed_ms)
+            sequential = 0.0
+            for candidate in candidates:
+                accepted, elapsed_ms = outcomes.get(candidate, (False, 0.0))
+                sequential += elapsed_ms
+                if accepted:
+                    break
+            with self._stats_lock:
+                self.races += 1
+                self.latency_ms += wall_ms
+                self.cpu_ms += sum(elapsed for _, elapsed in outcomes.values())
+                self.sequential_ms += sequential
+
+        for future in futures:
+            future.add_done_callback(account)
+
+        if winner is None:
+            return None
+        winner_candidate, results, accepted, rejections = winner
+        return winner_candidate, results, accepted, rejections, wall_ms, losers
+
+    def record_wait(self, wait_ms: float):
+        """Suma a la latencia la espera de una sesión por un grafo perdedor"""
+        with self._stats_lock:
+            self.latency_ms += wait_ms
+
+    def stats(self) -> Dict[str, float]:
+        """CPU extra frente a latencia ahorrada acumulados"""
+        with self._stats_lock:
+            return {
+                "speculative_races": int(self.races),
+                "speculative_skipped": int(self.skipped),
+                "speculative_failures": int(self.failures),
+                "speculative_extra_cpu_ms": float(self.cpu_ms - self.sequential_ms),
+                "speculative_latency_saved_ms": float(self.sequential_ms - self.latency_ms),
+            }
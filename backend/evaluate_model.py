@@ -0,0 +1,222 @@
+"""
+Evaluation harness for exported ASL letter models.
+
+Loads any model the server or the trainers produce (.npz export, registry
+directory or pickle) and a held-out labeled feature shard set (see
+``feature_shards``), and writes a JSON report with:
+
+- accuracy, per-letter precision / recall / F1 / support and the
+  confusion matrix (rows: true letter, columns: predicted letter),
+- single-row predict latency (p50 / p90 / p99, overall and per true
+  letter), which is what the server pays per hand per frame,
+- batched predict latency for several batch sizes (the cross-session
+  batcher path).
+
+With ``--baseline`` the report is compared against a previous one and the
+command exits with status 1 if accuracy drops or single-row latency grows
+beyond the given tolerances, so a regression is caught before the model is
+published to the registry.
+
+Usage:
+    python evaluate_model.py asl_model.npz heldout_shards --report eval.json
+    python evaluate_model.py models/20261019-120000 heldout_shards --baseline eval.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from feature_shards import open_shard, read_manifest
+from model_registry import load_model_file
+
+REPORT_FORMAT_VERSION = 1
+BATCH_SIZES = (16, 64, 256)
+
+
+def load_features(shards_dir: str, shards: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """All rows of the shard set, or only of the named ``shards``."""
+    names = [shard["name"] for shard in read_manifest(shards_dir)["shards"]]
+    if shards:
+        missing = set(shards) - set(names)
+        if missing:
+            raise SystemExit(f"Shards {sorted(missing)} not found in '{shards_dir}'")
+        names = [name for name in names if name in shards]
+    if not names:
+        raise SystemExit(f"No feature shards in '{shards_dir}'")
+    parts = [open_shard(shards_dir, name) for name in names]
+    return np.concatenate([np.asarray(f) for f, _ in parts]), np.concatenate([np.asarray(l) for _, l in parts])
+
+
+def classification_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> Dict[str, Any]:
+    """Accuracy, per-letter precision/recall/F1 and the confusion matrix."""
+    labels, codes = np.unique(np.concatenate([y_true, y_pred]).astype(str), return_inverse=True)
+    true_codes, pred_codes = codes[:len(y_true)], codes[len(y_true):]
+    k = len(labels)
+    confusion = np.bincount(true_codes * k + pred_codes, minlength=k * k).reshape(k, k)
+
+    correct = np.diag(confusion)
+    support = confusion.sum(axis=1)
+    predicted = confusion.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, correct / predicted, 0.0)
+        recall = np.where(support > 0, correct / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    present = support > 0
+
+    return {
+        "accuracy": float(correct.sum() / max(len(y_true), 1)),
+        "macro_precision": float(precision[present].mean()) if present.any() else 0.0,
+        "macro_recall": float(recall[present].mean()) if present.any() else 0.0,
+        "macro_f1": float(f1[present].mean()) if present.any() else 0.0,
+        "per_letter": {
+            str(label): {"precision": float(p), "recall": float(r), "f1": float(f), "support": int(s)}
+            for label, p, r, f, s in zip(labels, precision, recall, f1, support)
+        },
+        "confusion": {"labels": labels.tolist(), "matrix": confusion.tolist()},
+    }
+
+
+def _percentiles(samples_s: Sequence[float]) -> Dict[str, float]:
+    p50, p90, p99 = np.percentile(np.asarray(samples_s) * 1e6, [50, 90, 99])
+    return {"p50": float(p50), "p90": float(p90), "p99": float(p99)}
+
+
+def latency_metrics(model: Any, X: np.ndarray, y: np.ndarray, rows_per_letter: int = 50,
+                    batch_repeats: int = 50) -> Dict[str, Any]:
+    """Single-row latency (overall and per true letter) and batched latency."""
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    model.predict(X[:1])  # warm-up
+
+    per_letter: Dict[str, List[float]] = {}
+    for letter in np.unique(y):
+        rows = X[np.flatnonzero(y == letter)[:rows_per_letter]]
+        samples = per_letter[str(letter)] = []
+        for row in rows:
+            row = row[None, :]
+            start = time.perf_counter()
+            model.predict(row)
+            samples.append(time.perf_counter() - start)
+
+    batched = {}
+    for batch_size in BATCH_SIZES:
+        batch = np.ascontiguousarray(np.resize(X, (batch_size, X.shape[1])))
+        samples = []
+        for _ in range(batch_repeats):
+            start = time.perf_counter()
+            model.predict(batch)
+            samples.append(time.perf_counter() - start)
+        median = float(np.median(samples))
+        batched[str(batch_size)] = {
+            "batch_us": median * 1e6,
+            "per_row_us": median * 1e6 / batch_size,
+            "rows_per_s": batch_size / median,
+        }
+
+    return {
+        "single_row_us": _percentiles([s for samples in per_letter.values() for s in samples]),
+        "single_row_us_per_letter": {letter: _percentiles(samples) for letter, samples in per_letter.items()},
+        "batched": batched,
+    }
+
+
+def evaluate(model_path: str, shards_dir: str, shards: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Full report for the model at ``model_path`` on the held-out shards."""
+    model = load_model_file(model_path)
+    X, y = load_features(shards_dir, shards)
+    start = time.perf_counter()
+    y_pred = np.asarray(model.predict(X)).astype(str)
+    predict_s = time.perf_counter() - start
+
+    return {
+        "format_version": REPORT_FORMAT_VERSION,
+        "model": os.path.abspath(model_path),
+        "model_type": type(model).__name__,
+        "feature_transform": getattr(model, "feature_transform", "raw"),
+        "shards_dir": os.path.abspath(shards_dir),
+        "rows": int(len(y)),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {"numpy": np.__version__, "cpus": os.cpu_count()},
+        **classification_metrics(y.astype(str), y_pred),
+        "latency": {
+            "full_set_rows_per_s": float(len(y) / predict_s) if predict_s > 0 else 0.0,
+            **latency_metrics(model, X, y.astype(str)),
+        },
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], max_accuracy_drop: float = 0.005,
+            max_recall_drop: float = 0.02, max_latency_ratio: float = 1.5) -> List[str]:
+    """Regressions of ``report`` with respect to ``baseline`` (empty if none)."""
+    regressions = []
+    drop = baseline["accuracy"] - report["accuracy"]
+    if drop > max_accuracy_drop:
+        regressions.append(f"accuracy {report['accuracy']:.4f} < baseline {baseline['accuracy']:.4f} "
+                           f"(drop {drop:.4f} > {max_accuracy_drop})")
+    for letter, metrics in report["per_letter"].items():
+        before = baseline["per_letter"].get(letter)
+        if before and before["recall"] - metrics["recall"] > max_recall_drop:
+            regressions.append(f"recall of {letter} {metrics['recall']:.3f} < baseline {before['recall']:.3f}")
+    latency = report["latency"]["single_row_us"]["p50"]
+    baseline_latency = baseline["latency"]["single_row_us"]["p50"]
+    if latency > baseline_latency * max_latency_ratio:
+        regressions.append(f"single-row p50 latency {latency:.1f}us > {max_latency_ratio}x "
+                           f"baseline {baseline_latency:.1f}us")
+    return regressions
+
+
+def print_summary(report: Dict[str, Any]) -> None:
+    latency = report["latency"]
+    print(f"{report['model_type']} on {report['rows']} rows: accuracy {report['accuracy']:.4f}, "
+          f"macro F1 {report['macro_f1']:.4f}")
+    worst = sorted(report["per_letter"].items(), key=lambda item: item[1]["f1"])[:5]
+    print("Lowest F1: " + ", ".join(f"{letter} {m['f1']:.3f}" for letter, m in worst))
+    single = latency["single_row_us"]
+    print(f"Single-row latency: p50 {single['p50']:.1f}us, p99 {single['p99']:.1f}us")
+    print("Batched: " + ", ".join(f"{size}: {m['per_row_us']:.2f}us/row"
+                                  for size, m in latency["batched"].items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("model", help="model to evaluate (.npz export, directory or pickle)")
+    parser.add_argument("shards_dir", help="held-out labeled feature shard set")
+    parser.add_argument("--shard", action="append", help="only evaluate this shard (repeatable)")
+    parser.add_argument("--report", help="write the JSON report to this file (default: stdout)")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.005,
+                        help="tolerated accuracy drop against the baseline (default: 0.005)")
+    parser.add_argument("--max-recall-drop", type=float, default=0.02,
+                        help="tolerated per-letter recall drop against the baseline (default: 0.02)")
+    parser.add_argument("--max-latency-ratio", type=float, default=1.5,
+                        help="tolerated single-row p50 latency growth against the baseline (default: 1.5)")
+    args = parser.parse_args()
+
+    # Read first: the new report may overwrite the baseline file
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    report = evaluate(args.model, args.shards_dir, args.shard)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print_summary(report)
+        print(f"Report written to {args.report}")
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.max_accuracy_drop, args.max_recall_drop,
+                              args.max_latency_ratio)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline", file=sys.stderr)
@@ -0,0 +1,124 @@
+"""
+Labeled landmark feature shards for out-of-core training.
+
+A shard set is a directory of append-only ``.npy`` shards plus a
+manifest::
+
+    training_shards/
+        manifest.json              # format version, classes, shards
+        shard-00000.features.npy   # (n, 63) float32
+        shard-00000.labels.npy     # (n,) str
+
+``ShardWriter`` buffers rows and writes a shard every ``shard_rows`` rows;
+the manifest is replaced atomically after the shard files exist.
+``iter_batches`` streams shuffled mini-batches from memory-mapped shards,
+so memory use depends on the batch and shard size, not on the size of the
+whole set.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SHARDS_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+
+def read_manifest(root: str) -> Dict[str, Any]:
+    """Manifest of the shard set at ``root`` (empty if it does not exist yet)."""
+    path = os.path.join(root, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {"format_version": SHARDS_FORMAT_VERSION, "classes": [], "shards": []}
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != SHARDS_FORMAT_VERSION:
+        raise ValueError(f"Unsupported shard set format in {root}")
+    return manifest
+
+
+class ShardWriter:
+    """Appends labeled feature rows to a shard set."""
+
+    def __init__(self, root: str, shard_rows: int = 50000):
+        self.root = root
+        self.shard_rows = shard_rows
+        self._manifest = read_manifest(root)
+        self._features: List[np.ndarray] = []
+        self._labels: List[np.ndarray] = []
+        self._pending = 0
+
+    def add(self, features: np.ndarray, labels: Sequence[str]) -> None:
+        """Queue (n, 63) ``features`` with their ``labels``."""
+        if len(labels) == 0:
+            return
+        features = np.asarray(features, dtype=np.float32).reshape(len(labels), -1)
+        self._features.append(features)
+        self._labels.append(np.asarray(labels).astype(str))
+        self._pending += len(features)
+        while self._pending >= self.shard_rows:
+            self._write(self.shard_rows)
+
+    def _write(self, rows: int) -> None:
+        features = np.concatenate(self._features)
+        labels = np.concatenate(self._labels)
+        self._features = [features[rows:]]
+        self._labels = [labels[rows:]]
+        self._pending = len(features) - rows
+        features, labels = features[:rows], labels[:rows]
+
+        os.makedirs(self.root, exist_ok=True)
+        name = f"shard-{len(self._manifest['shards']):05d}"
+        base = os.path.join(self.root, name)
+        np.save(base + ".features.npy", features)
+        np.save(base + ".labels.npy", labels)
+
+        classes = set(self._manifest["classes"]) | set(np.unique(labels).tolist())
+        self._manifest["classes"] = sorted(classes)
+        self._manifest["shards"].append({"name": name, "rows": int(rows)})
+        staging = os.path.join(self.root, f".{MANIFEST_FILE}.tmp")
+        with open(staging, "w") as f:
+            json.dump(self._manifest, f, indent=2)
+        os.replace(staging, os.path.join(self.root, MANIFEST_FILE))
+
+    def close(self) -> None:
+        """Write the remaining rows as a final (smaller) shard."""
+        if self._pending:
+            self._write(self._pending)
+
+
+def open_shard(root: str, name: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Memory-mapped (features, labels) of one shard."""
+    base = os.path.join(root, name)
+    features = np.load(base + ".features.npy", mmap_mode="r", allow_pickle=False)
+    labels = np.load(base + ".labels.npy", mmap_mode="r", allow_pickle=False)
+    return features, labels
+
+
+def iter_batches(root: str, batch_size: int, seed: Optional[int] = None, epoch: int = 0,
+                 start_shard: int = 0) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """
+    Yield (shard position, features, labels) mini-batches.
+
+    With ``seed`` the shard order and the rows inside each shard are
+    shuffled, differently for every ``epoch``. The shuffle only depends on
+    (seed, epoch, position), so skipping the first ``start_shard``
+    positions when resuming from a checkpoint yields exactly the batches
+    an uninterrupted run would have seen.
+    """
+    shards = read_manifest(root)["shards"]
+    if seed is None:
+        order = np.arange(len(shards))
+    else:
+        order = np.random.default_rng([seed, epoch]).permutation(len(shards))
+    for position in range(start_shard, len(order)):
+        features, labels = open_shard(root, shards[order[position]]["name"])
+        if seed is None:
+            rows = np.arange(len(features))
+        else:
+            rows = np.random.default_rng([seed, epoch, position]).permutation(len(features))
+        for start in range(0, len(rows), batch_size):
+            # Sorted indices read the memory map sequentially
+            batch = np.sort(rows[start:start + batch_size])
+            yield position, np.asarray(features[batch]), np.asarray(labels[batch])
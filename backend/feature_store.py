@@ -0,0 +1,132 @@
+"""
+Persistent landmark feature store for incremental retraining.
+
+Running MediaPipe over the whole dataset dominates training time, while
+the landmarks of an image only change when the file or the detector
+configuration changes. The store keeps the 63-float landmark vector of
+every processed image (a NaN row means "no hand found") under a content
+key derived from the file path, size, mtime and a hash of the detector
+configuration.
+
+Layout of the store directory::
+
+    feature_cache/
+        manifest.json              # format version + list of shards
+        shard-00000.keys.npy       # (n,) hex keys
+        shard-00000.features.npy   # (n, 63) float32
+
+Shards are append-only: new rows go to a new shard and the manifest is
+replaced atomically after the shard files are written, so an interrupted
+run never leaves a partial shard behind. Shards are memory-mapped on load.
+When a key appears in several shards the newest row wins.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+STORE_FORMAT_VERSION = 1
+NUM_FEATURES = 63
+MANIFEST_FILE = "manifest.json"
+
+
+def config_hash(config: Dict[str, Any]) -> str:
+    """Stable hash of a detector configuration."""
+    return hashlib.blake2b(json.dumps(config, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+
+class FeatureStore:
+    """Content-addressed cache of landmark features, one row per image."""
+
+    def __init__(self, root: str, config: Dict[str, Any], flush_every: int = 5000):
+        self.root = root
+        self.config = config
+        self.flush_every = flush_every
+        self._config_hash = config_hash(config)
+
+        self._shards: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._index: Dict[bytes, Tuple[int, int]] = {}
+        self._pending_keys: List[bytes] = []
+        self._pending_features: List[np.ndarray] = []
+        self._manifest: Dict[str, Any] = {"format_version": STORE_FORMAT_VERSION, "shards": []}
+        self._load()
+
+    def _load(self) -> None:
+        manifest_path = os.path.join(self.root, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != STORE_FORMAT_VERSION:
+            print(f"Warning: feature store '{self.root}' has an unsupported format; ignoring it")
+            return
+        self._manifest = manifest
+        for shard in manifest["shards"]:
+            base = os.path.join(self.root, shard["name"])
+            keys = np.load(base + ".keys.npy", mmap_mode="r", allow_pickle=False)
+            features = np.load(base + ".features.npy", mmap_mode="r", allow_pickle=False)
+            shard_index = len(self._shards)
+            self._shards.append((keys, features))
+            for row, key in enumerate(keys.tolist()):
+                self._index[key] = (shard_index, row)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def key_for(self, path: str, item: Optional[int] = None) -> bytes:
+        """
+        Key of ``path`` in its current state under this store's configuration
+        (of its ``item``-th row, for files holding several feature rows).
+        """
+        stat = os.stat(path)
+        identity = f"{os.path.abspath(path)}\0{stat.st_size}\0{stat.st_mtime_ns}\0{self._config_hash}"
+        if item is not None:
+            identity += f"\0{item}"
+        return hashlib.blake2b(identity.encode(), digest_size=16).hexdigest().encode()
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._index
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        """Stored features for ``key``, or None if no hand was found."""
+        shard_index, row = self._index[key]
+        features = self._shards[shard_index][1][row]
+        return None if np.isnan(features[0]) else np.array(features)
+
+    def add(self, key: bytes, features: Optional[List[float]]) -> None:
+        """Record the features of an image (None if no hand was found)."""
+        row = np.full(NUM_FEATURES, np.nan, dtype=np.float32)
+        if features is not None:
+            row[:] = features
+        self._pending_keys.append(key)
+        self._pending_features.append(row)
+        if len(self._pending_keys) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write pending rows as a new shard and publish it in the manifest."""
+        if not self._pending_keys:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        name = f"shard-{len(self._manifest['shards']):05d}"
+        base = os.path.join(self.root, name)
+        keys = np.array(self._pending_keys, dtype="S32")
+        features = np.stack(self._pending_features)
+        np.save(base + ".keys.npy", keys)
+        np.save(base + ".features.npy", features)
+
+        self._manifest["shards"].append({"name": name, "rows": len(keys)})
+        staging = os.path.join(self.root, f".{MANIFEST_FILE}.tmp")
+        with open(staging, "w") as f:
+            json.dump(self._manifest, f, indent=2)
+        os.replace(staging, os.path.join(self.root, MANIFEST_FILE))
+
+        shard_index = len(self._shards)
+        self._shards.append((keys, features))
+        for row, key in enumerate(self._pending_keys):
+            self._index[key] = (shard_index, row)
+        self._pending_keys = []
+        self._pending_features = []
@@ -0,0 +1,95 @@
+"""
+Pirámide gaussiana perezosa compartida por las etapas de un fotograma.
+
+Cada etapa (ROI de piel, contexto de caras/pose) pide la imagen al nivel
+más grueso que tolera en lugar de redimensionar por su cuenta. Los niveles
+se calculan con ``cv2.pyrDown`` solo la primera vez que se piden. Si el
+fotograma llega en NV21, los niveles en gris salen directamente del plano Y,
+sin ninguna conversión de color; la expansión de rango limitado a rango
+completo se hace la primera vez que se pide el gris.
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# El plano Y de NV21 es de rango limitado (16-235); los umbrales de las
+# etapas que usan el gris se ajustaron con COLOR_RGB2GRAY, de rango completo.
+# Tabla de expansión (Y - 16) * 255 / 219 con saturación
+_LIMITED_TO_FULL_RANGE = np.clip(
+    np.round((np.arange(256, dtype=np.float32) - 16.0) * 255.0 / 219.0), 0, 255
+).astype(np.uint8)
+
+
+class FramePyramid:
+    """Pirámide RGB/gris de un fotograma; el nivel 0 es la resolución completa"""
+
+    def __init__(self, image_rgb: np.ndarray, luma: Optional[np.ndarray] = None):
+        """``luma``: plano Y de rango limitado (16-235), p. ej. el de NV21"""
+        self._rgb: Dict[int, np.ndarray] = {0: image_rgb}
+        self._gray: Dict[int, np.ndarray] = {}
+        # Plano Y de rango limitado aún sin expandir (se expande en gray(0))
+        self._luma = luma
+
+    @classmethod
+    def from_nv21(cls, yuv_array: np.ndarray, width: int, height: int,
+                  image_rgb: np.ndarray) -> "FramePyramid":
+        """Pirámide cuyo gris de nivel 0 es el plano Y de NV21 (vista, sin copiar)"""
+        return cls(image_rgb, yuv_array[: width * height].reshape(height, width))
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self._rgb[0].shape
+
+    def rgb(self, level: int = 0) -> np.ndarray:
+        """Imagen RGB del nivel ``level`` (cada nivel es la mitad del anterior)"""
+        image = self._rgb.get(level)
+        if image is None:
+            image = self._rgb[level] = cv2.pyrDown(self.rgb(level - 1))
+        return image
+
+    def gray(self, level: int = 0) -> np.ndarray:
+        """Luminancia del nivel ``level``: plano Y si existe, si no desde RGB"""
+        image = self._gray.get(level)
+        if image is None:
+            if self._luma is not None:
+                if level == 0:
+                    image = cv2.LUT(self._luma, _LIMITED_TO_FULL_RANGE)
+                else:
+                    image = cv2.pyrDown(self.gray(level - 1))
+            else:
+                image = cv2.cvtColor(self.rgb(level), cv2.COLOR_RGB2GRAY)
+            self._gray[level] = image
+        return image
+
+    def level_size(self, level: int) -> Tuple[int, int]:
+        """(ancho, alto) del nivel sin necesidad de calcularlo"""
+        height, width = self.shape[:2]
+        for _ in range(level):
+            width, height = (width + 1) // 2, (height + 1) // 2
+        return width, height
+
+    def coarsest_level(self, min_side: int) -> int:
+        """Nivel más grueso cuyo lado menor sigue siendo >= ``min_side``"""
+        level = 0
+        while min(self.level_size(level + 1)) >= min_side:
+            level += 1
+        return level
+
+    def map_points(self, points: Sequence, from_level: int, to_level: int = 0) -> np.ndarray:
+        """Convierte coordenadas (x, y) en píxeles entre dos niveles"""
+        from_w, from_h = self.level_size(from_level)
+        to_w, to_h = self.level_size(to_level)
+        points = np.asarray(points, dtype=np.float32)
+        return points * np.array([to_w / from_w, to_h / from_h], dtype=np.float32)
+
+    def map_box(self, box: Tuple[int, int, int, int], from_level: int,
+                to_level: int = 0) -> Tuple[int, int, int, int]:
+        """Convierte un rectángulo (x, y, w, h) entre niveles, recortado a la imagen"""
+        x, y, w, h = box
+        (x0, y0), (x1, y1) = self.map_points([(x, y), (x + w, y + h)], from_level, to_level)
+        to_w, to_h = self.level_size(to_level)
+        x0, y0 = max(0, int(x0)), max(0, int(y0))
+        x1, y1 = min(to_w, int(np.ceil(x1))), min(to_h, int(np.ceil(y1)))
+        return x0, y0, x1 - x0, y1 - y0
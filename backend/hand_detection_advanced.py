@@ -1,8 +1,13 @@
-import cv2
 import numpy as np
 import mediapipe as mp
 import time
-from typing import Tuple, Optional, Dict, Any
+import weakref
+from typing import Tuple, Optional, Dict, Any, List
+
+from context_worker import FACE_EXPANSION, ContextWorker
+from frame_pyramid import FramePyramid
+from hand_observation import HandObservation, as_observation
+from hand_validation import EXCLUSION_RULES, QUICK_RULES, HandValidator, movement_is_consistent
 
 class AdvancedHandDetectionOptimizer:
     """
@@ -45,166 +50,145 @@ class AdvancedHandDetectionOptimizer:
             min_tracking_confidence=0.3
         )
         
+        # Contexto (caras, torso) en un hilo de baja prioridad a pocos Hz;
+        # la ruta del fotograma solo lee las últimas regiones publicadas. El
+        # hilo solo guarda una referencia débil al detector, para que
+        # __del__ pueda detenerlo
+        detect_context = weakref.WeakMethod(self.detect_context_regions)
+        self.context_worker = ContextWorker(lambda image: detect_context()(image), rate_hz=3.0, ttl_s=1.5)
+        # Fallos seguidos a partir de los que se alimenta el hilo de contexto
+        # (las regiones se usan a partir de 4, así llegan a tiempo)
+        self.context_after_failures = 2
+        
+        # Validación vectorizada: regiones excluidas + puntuación de calidad
+        self.context_validator = HandValidator(EXCLUSION_RULES, score=True)
+        self.quick_validator = HandValidator(QUICK_RULES)
+        
         self.consecutive_failures = 0
         self.max_consecutive_failures = 8
         self.last_hand_position = None
         self.position_history = []
         
-    def detect_faces_and_poses(self, image_rgb: np.ndarray) -> Dict[str, Any]:
+    def detect_context_regions(self, small_image: np.ndarray) -> Tuple[List, List, Any]:
+        """
+        Detecta caras y torso en una imagen reducida.
+
+        Devuelve (cajas_cara, cajas_torso, pose_landmarks) con cajas relativas
+        (x, y, w, h). Lo usa el hilo de contexto: los grafos de cara y pose
+        no deben llamarse desde otro hilo a la vez.
+        """
+        faces = []
+        torsos = []
+        pose_landmarks = None
+
+        # Detectar caras rápidamente
+        face_results = self.face_detector.process(small_image)
+        if face_results.detections:
+            for detection in face_results.detections:
+                bbox = detection.location_data.relative_bounding_box
+                faces.append((bbox.xmin, bbox.ymin, bbox.width, bbox.height))
+
+        # Detectar pose rápidamente
+        pose_results = self.pose_detector.process(small_image)
+        if pose_results.pose_landmarks:
+            pose_landmarks = pose_results.pose_landmarks
+
+            # Identificar regiones del torso/brazos para evitar
+            landmarks = pose_results.pose_landmarks.landmark
+
+            # Puntos clave del torso
+            shoulder_left = landmarks[11] if len(landmarks) > 11 else None
+            shoulder_right = landmarks[12] if len(landmarks) > 12 else None
+
+            if shoulder_left and shoulder_right:
+                # Región del torso a evitar
+                torso_x = min(shoulder_left.x, shoulder_right.x)
+                torso_y = min(shoulder_left.y, shoulder_right.y)
+                torso_w = abs(shoulder_right.x - shoulder_left.x) * 1.5
+                torso_h = 0.4  # 40% de la altura de la imagen
+                torsos.append((torso_x, torso_y, torso_w, torso_h))
+
+        return faces, torsos, pose_landmarks
+
+    def detect_faces_and_poses(self, image_rgb: np.ndarray,
+                               pyramid: Optional[FramePyramid] = None) -> Dict[str, Any]:
         """
-        Detecta caras y poses para evitar confusiones con manos
+        Detecta caras y poses para evitar confusiones con manos (síncrono).
+
+        La ruta por fotograma usa ``context_worker``; este método queda para
+        usos puntuales y no debe llamarse mientras el worker está activo.
         """
         height, width = image_rgb.shape[:2]
-        
-        # Reducir resolución para detección rápida de contexto
-        scale_factor = 0.5
-        small_image = cv2.resize(image_rgb, (int(width * scale_factor), int(height * scale_factor)))
-        
+        if pyramid is None:
+            pyramid = FramePyramid(image_rgb)
+
         faces_info = {"faces": [], "face_regions": []}
         pose_info = {"pose_landmarks": None, "excluded_regions": []}
-        
+
         try:
-            # Detectar caras rápidamente
-            face_results = self.face_detector.process(small_image)
-            if face_results.detections:
-                for detection in face_results.detections:
-                    bbox = detection.location_data.relative_bounding_box
-                    # Escalar de vuelta a imagen original
-                    x = int(bbox.xmin * width)
-                    y = int(bbox.ymin * height) 
-                    w = int(bbox.width * width)
-                    h = int(bbox.height * height)
-                    
-                    # Expandir región de cara para evitar detección de manos cerca
-                    expansion = 0.3
-                    x_exp = max(0, x - int(w * expansion))
-                    y_exp = max(0, y - int(h * expansion))
-                    w_exp = min(width - x_exp, w + int(w * expansion * 2))
-                    h_exp = min(height - y_exp, h + int(h * expansion * 2))
-                    
-                    faces_info["face_regions"].append((x_exp, y_exp, w_exp, h_exp))
-                    faces_info["faces"].append((x, y, w, h))
-            
-            # Detectar pose rápidamente
-            pose_results = self.pose_detector.process(small_image)
-            if pose_results.pose_landmarks:
-                pose_info["pose_landmarks"] = pose_results.pose_landmarks
-                
-                # Identificar regiones del torso/brazos para evitar
-                landmarks = pose_results.pose_landmarks.landmark
-                
-                # Puntos clave del torso (escalados)
-                shoulder_left = landmarks[11] if len(landmarks) > 11 else None
-                shoulder_right = landmarks[12] if len(landmarks) > 12 else None
-                
-                if shoulder_left and shoulder_right:
-                    # Región del torso a evitar
-                    torso_x = int(min(shoulder_left.x, shoulder_right.x) * width)
-                    torso_y = int(min(shoulder_left.y, shoulder_right.y) * height)
-                    torso_w = int(abs(shoulder_right.x - shoulder_left.x) * width * 1.5)
-                    torso_h = int(height * 0.4)  # 40% de la altura de la imagen
-                    
-                    pose_info["excluded_regions"].append((torso_x, torso_y, torso_w, torso_h))
-                    
+            # Media resolución de la pirámide para detección rápida de contexto
+            faces, torsos, pose_landmarks = self.detect_context_regions(pyramid.rgb(1))
         except Exception as e:
             # Si falla la detección de contexto, continuar sin ella
-            pass
-        
+            return {"faces": faces_info, "pose": pose_info}
+
+        for rx, ry, rw, rh in faces:
+            # Escalar de vuelta a imagen original
+            x, y = int(rx * width), int(ry * height)
+            w, h = int(rw * width), int(rh * height)
+
+            # Expandir región de cara para evitar detección de manos cerca
+            x_exp = max(0, x - int(w * FACE_EXPANSION))
+            y_exp = max(0, y - int(h * FACE_EXPANSION))
+            w_exp = min(width - x_exp, w + int(w * FACE_EXPANSION * 2))
+            h_exp = min(height - y_exp, h + int(h * FACE_EXPANSION * 2))
+
+            faces_info["face_regions"].append((x_exp, y_exp, w_exp, h_exp))
+            faces_info["faces"].append((x, y, w, h))
+
+        pose_info["pose_landmarks"] = pose_landmarks
+        for rx, ry, rw, rh in torsos:
+            pose_info["excluded_regions"].append(
+                (int(rx * width), int(ry * height), int(rw * width), int(rh * height))
+            )
+
         return {"faces": faces_info, "pose": pose_info}
-    
+
     def is_hand_in_excluded_region(self, hand_landmarks, width: int, height: int, context_info: Dict) -> bool:
         """
         Verifica si la mano detectada está en una región que debería ser excluida
         """
-        if not hand_landmarks or not hand_landmarks.landmark:
+        if not hand_landmarks:
             return False
-            
-        # Calcular centro de la mano
-        x_coords = [lm.x * width for lm in hand_landmarks.landmark]
-        y_coords = [lm.y * height for lm in hand_landmarks.landmark]
-        hand_center_x = sum(x_coords) / len(x_coords)
-        hand_center_y = sum(y_coords) / len(y_coords)
-        
-        # Verificar si está en región de cara
-        for face_region in context_info["faces"]["face_regions"]:
-            fx, fy, fw, fh = face_region
-            if (fx <= hand_center_x <= fx + fw and 
-                fy <= hand_center_y <= fy + fh):
-                return True
-        
-        # Verificar si está en región de torso
-        for excluded_region in context_info["pose"]["excluded_regions"]:
-            ex, ey, ew, eh = excluded_region
-            if (ex <= hand_center_x <= ex + ew and 
-                ey <= hand_center_y <= ey + eh):
-                return True
-                
-        return False
+        verdict = self.context_validator.evaluate(
+            [hand_landmarks], width, height, {"regions": self._excluded_regions(context_info)}
+        )
+        return verdict.reasons[0] == "excluded_region"
+    
+    @staticmethod
+    def _excluded_regions(context_info: Dict) -> list:
+        """Regiones de cara y torso en una sola lista (x, y, w, h)"""
+        return list(context_info["faces"]["face_regions"]) + list(context_info["pose"]["excluded_regions"])
     
     def calculate_hand_quality_score(self, hand_landmarks, width: int, height: int) -> float:
         """
         Calcula un score de calidad para determinar si es realmente una mano
         """
-        if not hand_landmarks or not hand_landmarks.landmark:
+        if not hand_landmarks:
             return 0.0
-            
-        landmarks = hand_landmarks.landmark
-        
-        # 1. Verificar proporciones típicas de una mano
-        x_coords = [lm.x * width for lm in landmarks]
-        y_coords = [lm.y * height for lm in landmarks]
-        
-        hand_width = max(x_coords) - min(x_coords)
-        hand_height = max(y_coords) - min(y_coords)
-        
-        # Ratio típico de una mano (debe ser entre 0.6 y 1.4)
-        aspect_ratio = hand_width / hand_height if hand_height > 0 else 0
-        aspect_score = 1.0 if 0.6 <= aspect_ratio <= 1.4 else 0.3
-        
-        # 2. Verificar que los dedos estén en posiciones lógicas
-        # Puntos clave de MediaPipe para dedos
-        finger_tips = [4, 8, 12, 16, 20]  # Puntas de dedos
-        finger_score = 0.0
-        
-        try:
-            wrist = landmarks[0]
-            wrist_y = wrist.y * height
-            
-            # Contar cuántas puntas están por encima de la muñeca (posición típica)
-            tips_above_wrist = 0
-            for tip_idx in finger_tips:
-                if tip_idx < len(landmarks):
-                    tip_y = landmarks[tip_idx].y * height
-                    if tip_y < wrist_y:  # Punta por encima de muñeca
-                        tips_above_wrist += 1
-            
-            finger_score = tips_above_wrist / len(finger_tips)
-            
-        except:
-            finger_score = 0.5  # Score neutral si no se puede calcular
-        
-        # 3. Verificar variabilidad en las posiciones (no todos los puntos iguales)
-        x_var = np.var(x_coords) if len(x_coords) > 1 else 0
-        y_var = np.var(y_coords) if len(y_coords) > 1 else 0
-        
-        variability_score = min(1.0, (x_var + y_var) / 1000.0)
-        
-        # Score final combinado
-        final_score = (aspect_score * 0.3 + finger_score * 0.5 + variability_score * 0.2)
-        
-        return min(1.0, max(0.0, final_score))
+        return float(self.context_validator.evaluate([hand_landmarks], width, height).scores[0])
     
     def track_hand_position(self, hand_landmarks, width: int, height: int):
         """
         Hace seguimiento de la posición de la mano para detectar movimientos consistentes
         """
-        if not hand_landmarks or not hand_landmarks.landmark:
+        hand = as_observation(hand_landmarks)
+        if hand is None:
             return
             
         # Calcular centro de la mano
-        x_coords = [lm.x * width for lm in hand_landmarks.landmark]
-        y_coords = [lm.y * height for lm in hand_landmarks.landmark]
-        center = (sum(x_coords) / len(x_coords), sum(y_coords) / len(y_coords))
+        center_x, center_y = hand.center(width, height)
+        center = (float(center_x), float(center_y))
         
         self.position_history.append(center)
         
@@ -218,41 +202,28 @@ class AdvancedHandDetectionOptimizer:
         """
         Verifica si el movimiento de la mano es consistente (no saltos erráticos)
         """
-        if len(self.position_history) < 3:
-            return True  # Pocas muestras, asumir consistente
-            
-        # Calcular distancias entre posiciones consecutivas
-        distances = []
-        for i in range(1, len(self.position_history)):
-            prev_x, prev_y = self.position_history[i-1]
-            curr_x, curr_y = self.position_history[i]
-            dist = np.sqrt((curr_x - prev_x)**2 + (curr_y - prev_y)**2)
-            distances.append(dist)
-        
-        if not distances:
-            return True
-            
-        # Si hay saltos muy grandes, probablemente es ruido
-        avg_distance = np.mean(distances)
-        max_distance = max(distances)
-        
-        # Si el salto máximo es más de 3x el promedio, es inconsistente
-        return max_distance <= avg_distance * 3.0
+        return movement_is_consistent(self.position_history)
     
-    def detect_hands_with_context(self, image_rgb: np.ndarray) -> Tuple[Any, Dict[str, Any]]:
+    def detect_hands_with_context(self, image_rgb: np.ndarray,
+                                  pyramid: Optional[FramePyramid] = None) -> Tuple[Any, Dict[str, Any]]:
         """
         Detección avanzada de manos considerando el contexto de personas/caras
         """
         start_time = time.perf_counter()
+        if pyramid is None:
+            pyramid = FramePyramid(image_rgb)
         
-        # 1. Detectar contexto (caras, poses) cada cierto tiempo para no ralentizar
+        # 1. Contexto (caras, poses): como antes, solo se filtra cuando hay
+        # problemas, así que solo mientras se acumulan fallos se entrega el
+        # fotograma al hilo de contexto (a media resolución, sin esperar)
+        height, width = image_rgb.shape[:2]
         context_info = {"faces": {"faces": [], "face_regions": []}, "pose": {"pose_landmarks": None, "excluded_regions": []}}
-        context_time = 0.0
-        
-        if self.consecutive_failures > 3:  # Solo cuando hay problemas
-            context_start = time.perf_counter()
-            context_info = self.detect_faces_and_poses(image_rgb)
-            context_time = float((time.perf_counter() - context_start) * 1000)
+        context_start = time.perf_counter()
+        if self.consecutive_failures >= self.context_after_failures:
+            self.context_worker.submit(pyramid.rgb(1))
+        if self.consecutive_failures > 3:
+            context_info = self.context_worker.context_info(width, height)
+        context_time = float((time.perf_counter() - context_start) * 1000)
         
         # 2. Detección inicial de manos
         detection_start = time.perf_counter()
@@ -269,38 +240,42 @@ class AdvancedHandDetectionOptimizer:
             results = self.hands_sensitive.process(image_rgb)
             detection_time += float((time.perf_counter() - sensitive_start) * 1000)
         
-        # 4. Filtrar y evaluar manos detectadas
-        if results.multi_hand_landmarks:
-            height, width = image_rgb.shape[:2]
-            
-            for hand_landmarks in results.multi_hand_landmarks:
-                # Verificar si está en región excluida
-                if self.is_hand_in_excluded_region(hand_landmarks, width, height, context_info):
+        # 4. Filtrar y evaluar manos detectadas: regiones excluidas y
+        #    puntuación de calidad de todas las candidatas en una pasada
+        best_observation = None
+        hands = HandObservation.from_results(results)
+        if hands:
+            verdict = self.context_validator.evaluate(
+                hands, width, height, {"regions": self._excluded_regions(context_info)}
+            )
+            for hand_landmarks, hand, accepted, quality_score in zip(
+                    results.multi_hand_landmarks, hands, verdict.accepted, verdict.scores):
+                # Mano en región excluida
+                if not accepted:
                     filtered_hands += 1
                     continue
                 
-                # Calcular score de calidad
-                quality_score = self.calculate_hand_quality_score(hand_landmarks, width, height)
-                
                 # Verificar consistencia de movimiento
-                self.track_hand_position(hand_landmarks, width, height)
+                self.track_hand_position(hand, width, height)
                 movement_consistent = self.is_hand_movement_consistent()
                 
                 # Score final considerando calidad y movimiento
-                final_score = quality_score * (1.2 if movement_consistent else 0.8)
+                final_score = float(quality_score) * (1.2 if movement_consistent else 0.8)
                 
                 if final_score > best_score:
                     best_score = final_score
                     best_hand = hand_landmarks
+                    best_observation = hand
         
         # 5. Crear resultado final
+        final_results = type('Results', (), {})()
         if best_hand and best_score >= 0.3:  # Umbral mínimo de calidad
-            final_results = type('Results', (), {})()
             final_results.multi_hand_landmarks = [best_hand]
+            final_results.hand_observations = [best_observation]
             self.consecutive_failures = 0
         else:
-            final_results = type('Results', (), {})()
             final_results.multi_hand_landmarks = None
+            final_results.hand_observations = []
             self.consecutive_failures += 1
         
         # Reset contador si es muy alto
@@ -321,7 +296,8 @@ class AdvancedHandDetectionOptimizer:
             "consecutive_failures": int(self.consecutive_failures),
             "faces_detected": len(context_info["faces"]["faces"]),
             "pose_detected": bool(context_info["pose"]["pose_landmarks"]),
-            "movement_consistent": self.is_hand_movement_consistent()
+            "movement_consistent": self.is_hand_movement_consistent(),
+            **self.context_worker.stats()
         }
         
         return final_results, metadata
@@ -330,20 +306,15 @@ class AdvancedHandDetectionOptimizer:
         """
         Validación básica de landmarks
         """
-        if not hand_landmarks or not hand_landmarks.landmark:
-            return False
-        
-        # Verificar variación mínima
-        x_coords = [lm.x for lm in hand_landmarks.landmark[:5]]
-        y_coords = [lm.y for lm in hand_landmarks.landmark[:5]]
-        
-        x_var = max(x_coords) - min(x_coords)
-        y_var = max(y_coords) - min(y_coords)
-        
-        return bool(x_var > 0.02 and y_var > 0.02)
+        return self.quick_validator.check(hand_landmarks, image_width, image_height)
     
-    def __del__(self):
-        """Cleanup MediaPipe resources"""
+    def close(self):
+        """Detiene el hilo de contexto y libera los grafos de MediaPipe"""
+        if getattr(self, '_closed', False):
+            return
+        self._closed = True
+        if hasattr(self, 'context_worker'):
+            self.context_worker.stop()
         if hasattr(self, 'hands_detector'):
             self.hands_detector.close()
         if hasattr(self, 'hands_sensitive'):
@@ -352,6 +323,10 @@ class AdvancedHandDetectionOptimizer:
             self.face_detector.close()
         if hasattr(self, 'pose_detector'):
             self.pose_detector.close()
+    
+    def __del__(self):
+        """Cleanup MediaPipe resources"""
+        self.close()
 
 # Función de conveniencia
 def create_advanced_detector():
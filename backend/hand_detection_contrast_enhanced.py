@@ -4,6 +4,13 @@ import mediapipe as mp
 import time
 from typing import Tuple, Optional, Dict, Any
 
+from detector_cascade import CascadeState, DetectorCascade
+from frame_pyramid import FramePyramid
+from hand_observation import HandObservation
+from hand_validation import CHALLENGING_CONTEXT_RULES, CONTEXT_RULES, HandValidator
+from image_ops import MASK_SCALE, apply_masked_gain, get_clahe, morphology_scaled, skin_mask_reduced
+from smoothing import EdgePreservingSmoother
+
 class ContrastEnhancedHandDetector:
     """
     Detector súper avanzado para manos en fondos de color similar
@@ -12,7 +19,6 @@ class ContrastEnhancedHandDetector:
     
     def __init__(self):
         self.mp_hands = mp.solutions.hands
-        self.mp_face = mp.solutions.face_detection
         
         # Detector principal con configuración balanced
         self.hands_detector = self.mp_hands.Hands(
@@ -30,11 +36,20 @@ class ContrastEnhancedHandDetector:
             min_tracking_confidence=0.15,
         )
         
-        # Detector de caras para contexto
-        self.face_detector = self.mp_face.FaceDetection(
-            model_selection=0,
-            min_detection_confidence=0.3
-        )
+        # Cascada: el detector ultra (detección de palma en cada fotograma) solo
+        # se usa tras fallos repetidos, no mientras el fondo parezca difícil
+        self.detection_cascade = DetectorCascade([
+            ("standard", self.hands_detector),
+            ("ultra_sensitive", self.hands_ultra_sensitive),
+        ])
+        # Estado de la cascada cuando el llamante no aporta uno por sesión
+        self.cascade_state = self.detection_cascade.new_state()
+        # Presupuesto para un segundo grafo en el mismo fotograma (None = nunca)
+        self.detection_budget_ms = None
+        
+        # Reglas de validación (fondo normal / fondo desafiante)
+        self.context_validator = HandValidator(CONTEXT_RULES)
+        self.challenging_validator = HandValidator(CHALLENGING_CONTEXT_RULES)
         
         self.consecutive_failures = 0
         self.max_failures = 10
@@ -45,6 +60,9 @@ class ContrastEnhancedHandDetector:
         self.adaptive_gamma = 1.0
         self.adaptive_contrast = 1.0
         
+        # Suavizado bilateral: el modo se elige según su coste medido
+        self.smoother = EdgePreservingSmoother(budget_ms=12.0)
+        
     def analyze_skin_background_similarity(self, image_rgb: np.ndarray) -> Dict[str, float]:
         """
         Analiza qué tan similar es el fondo al color de piel
@@ -122,7 +140,7 @@ class ContrastEnhancedHandDetector:
             
             # B. CLAHE adaptativo en canal L (luminancia)
             clahe_strength = min(4.0, 2.0 + skin_analysis["skin_percentage_combined"] / 20)
-            clahe = cv2.createCLAHE(clipLimit=clahe_strength, tileGridSize=(6, 6))
+            clahe = get_clahe(clahe_strength, (6, 6))
             l_enhanced = clahe.apply(l_channel)
             
             # C. Realce sutil de canales a* y b* (cromaticidad)
@@ -138,7 +156,7 @@ class ContrastEnhancedHandDetector:
             # Preservar bordes mientras suaviza áreas uniformes
             bilateral_d = 9 if skin_analysis["is_challenging_background"] else 7
             bilateral_sigma = 75 if skin_analysis["is_challenging_background"] else 50
-            enhanced_image = cv2.bilateralFilter(enhanced_image, bilateral_d, bilateral_sigma, bilateral_sigma)
+            enhanced_image = self.smoother.smooth(enhanced_image, bilateral_d, bilateral_sigma)
         
         # Técnica 3: Corrección gamma adaptativa
         if skin_analysis["skin_percentage_combined"] > 30:
@@ -174,58 +192,43 @@ class ContrastEnhancedHandDetector:
         """
         Realza específicamente las características espectrales de las manos
         """
-        # Convertir a HSV para manipulación selectiva
-        hsv = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2HSV)
-        h, s, v = cv2.split(hsv)
-        
         # Crear máscara más precisa para tonos de piel de manos
         # Rango más específico que excluye fondos similares
-        hand_hue_lower = 5   # Más específico que el rango general de piel
-        hand_hue_upper = 25
-        hand_sat_lower = 30  # Manos tienden a tener más saturación que paredes
-        hand_val_lower = 60
+        # (H 5-25, S >= 30 porque las manos tienen más saturación que las
+        # paredes, V >= 60). Se calcula a 1/4 de resolución: solo sirve como
+        # peso suave para el realce y apply_masked_gain la sube al aplicarla.
+        hand_mask = skin_mask_reduced(image_rgb, (5, 30, 60), (25, 255, 255), MASK_SCALE)
         
-        # Máscara para posibles regiones de mano
-        mask_h = cv2.inRange(h, hand_hue_lower, hand_hue_upper)
-        mask_s = cv2.inRange(s, hand_sat_lower, 255)
-        mask_v = cv2.inRange(v, hand_val_lower, 255)
+        # Limpiar la máscara con operaciones morfológicas (5x5 a resolución completa)
+        hand_mask = morphology_scaled(hand_mask, cv2.MORPH_OPEN, 5, MASK_SCALE)
+        hand_mask = morphology_scaled(hand_mask, cv2.MORPH_CLOSE, 5, MASK_SCALE)
         
-        # Combinar máscaras
-        hand_mask = cv2.bitwise_and(cv2.bitwise_and(mask_h, mask_s), mask_v)
+        # Si hay suficiente área potencial (umbral expresado a resolución completa)
+        if np.sum(hand_mask) / (MASK_SCALE * MASK_SCALE) > 1000:
+            # Realzar contraste local en regiones de mano en una sola pasada
+            return apply_masked_gain(image_rgb, hand_mask, 0.2)
         
-        # Limpiar la máscara con operaciones morfológicas
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-        hand_mask = cv2.morphologyEx(hand_mask, cv2.MORPH_OPEN, kernel)
-        hand_mask = cv2.morphologyEx(hand_mask, cv2.MORPH_CLOSE, kernel)
-        
-        # Aplicar realce solo en regiones potenciales de mano
-        enhanced_image = image_rgb.copy()
-        
-        if np.sum(hand_mask) > 1000:  # Si hay suficiente área potencial
-            # Realzar contraste local en regiones de mano
-            mask_normalized = hand_mask.astype(np.float32) / 255.0
-            
-            # Aplicar realce gradual
-            for i in range(3):  # Para cada canal RGB
-                channel = enhanced_image[:, :, i].astype(np.float32)
-                
-                # Realzar contraste local
-                enhanced_channel = cv2.multiply(channel, 1.0 + 0.2 * mask_normalized)
-                
-                # Asegurar rango válido
-                enhanced_image[:, :, i] = np.clip(enhanced_channel, 0, 255).astype(np.uint8)
-        
-        return enhanced_image
+        return image_rgb.copy()
     
-    def detect_hands_with_contrast_enhancement(self, image_rgb: np.ndarray) -> Tuple[Any, Dict[str, Any]]:
+    def detect_hands_with_contrast_enhancement(self, image_rgb: np.ndarray,
+                                               pyramid: Optional[FramePyramid] = None,
+                                               cascade_state: Optional[CascadeState] = None) -> Tuple[Any, Dict[str, Any]]:
         """
         Detección de manos con realce de contraste avanzado
+
+        ``cascade_state`` es el estado de la cascada de la sesión (ver
+        ``DetectorCascade.new_state``); sin él se usa el del detector.
         """
         start_time = time.perf_counter()
+        if pyramid is None:
+            pyramid = FramePyramid(image_rgb)
+        if cascade_state is None:
+            cascade_state = self.cascade_state
         
-        # 1. Analizar similaridad con color de piel
+        # 1. Analizar similaridad con color de piel (a resolución completa: los
+        # umbrales 25/35/30 y la fuerza del CLAHE se ajustaron sobre el nivel 0)
         analysis_start = time.perf_counter()
-        skin_analysis = self.analyze_skin_background_similarity(image_rgb)
+        skin_analysis = self.analyze_skin_background_similarity(pyramid.rgb(0))
         analysis_time = float((time.perf_counter() - analysis_start) * 1000)
         
         # 2. Decidir si aplicar técnicas avanzadas
@@ -250,27 +253,33 @@ class ContrastEnhancedHandDetector:
             
             enhancement_time = float((time.perf_counter() - enhance_start) * 1000)
         
-        # 4. Detección con configuración apropiada
-        detection_start = time.perf_counter()
+        # 4. Detección con la configuración que elige la cascada
+        # 5. Post-procesamiento y validación (un fallo de validación cuenta
+        #    como fallo para la cascada)
+        height, width = image_rgb.shape[:2]
         
-        if skin_analysis["is_challenging_background"]:
-            # Usar detector ultra-sensible para casos difíciles
-            results = self.hands_ultra_sensitive.process(processed_image)
-        else:
-            # Usar detector estándar
-            results = self.hands_detector.process(processed_image)
-            
-        detection_time = float((time.perf_counter() - detection_start) * 1000)
+        validator = (self.challenging_validator if skin_analysis["is_challenging_background"]
+                     else self.context_validator)
+        
+        def validate(results, rejections):
+            # Validar que la mano sea consistente con el contexto; cada mano se
+            # convierte a HandObservation una sola vez y todas se validan juntas
+            hands = HandObservation.from_results(results)
+            if not hands:
+                return []
+            verdict = validator.evaluate(hands, width, height)
+            rejections.extend(reason for reason in verdict.reasons if reason)
+            return [
+                (hand_landmarks, hand)
+                for hand_landmarks, hand, accepted in zip(results.multi_hand_landmarks, hands, verdict.accepted)
+                if accepted
+            ]
         
-        # 5. Post-procesamiento y validación
-        valid_hands = []
-        if results.multi_hand_landmarks:
-            height, width = image_rgb.shape[:2]
-            
-            for hand_landmarks in results.multi_hand_landmarks:
-                # Validar que la mano sea consistente con el contexto
-                if self.validate_hand_in_context(hand_landmarks, width, height, skin_analysis):
-                    valid_hands.append(hand_landmarks)
+        detection_start = time.perf_counter()
+        results, valid_hands, cascade_info = self.detection_cascade.process(
+            processed_image, cascade_state, validate, budget_ms=self.detection_budget_ms
+        )
+        detection_time = float((time.perf_counter() - detection_start) * 1000)
         
         # 6. Actualizar contadores y adaptación
         if valid_hands:
@@ -289,7 +298,8 @@ class ContrastEnhancedHandDetector:
         
         # 7. Crear resultado final
         final_results = type('Results', (), {})()
-        final_results.multi_hand_landmarks = valid_hands if valid_hands else None
+        final_results.multi_hand_landmarks = [hand_landmarks for hand_landmarks, _ in valid_hands] or None
+        final_results.hand_observations = [hand for _, hand in valid_hands]
         
         end_time = time.perf_counter()
         total_time = float((end_time - start_time) * 1000)
@@ -304,7 +314,8 @@ class ContrastEnhancedHandDetector:
             "needs_enhancement": needs_enhancement,
             "consecutive_failures": int(self.consecutive_failures),
             "adaptive_gamma": float(self.adaptive_gamma),
-            "adaptive_contrast": float(self.adaptive_contrast)
+            "adaptive_contrast": float(self.adaptive_contrast),
+            **cascade_info
         }
         
         return final_results, metadata
@@ -313,39 +324,9 @@ class ContrastEnhancedHandDetector:
         """
         Validación contextual de la mano detectada
         """
-        if not hand_landmarks or not hand_landmarks.landmark:
-            return False
-        
-        # 1. Validación básica de variabilidad
-        x_coords = [lm.x for lm in hand_landmarks.landmark]
-        y_coords = [lm.y for lm in hand_landmarks.landmark]
-        
-        x_var = max(x_coords) - min(x_coords)
-        y_var = max(y_coords) - min(y_coords)
-        
-        if x_var < 0.02 or y_var < 0.02:
-            return False
-        
-        # 2. Validación específica para fondos desafiantes
-        if skin_analysis["is_challenging_background"]:
-            # Requerir mayor variabilidad en fondos similares
-            if x_var < 0.05 or y_var < 0.05:
-                return False
-            
-            # Verificar que tenga estructura de mano realista
-            wrist = hand_landmarks.landmark[0]
-            middle_finger_tip = hand_landmarks.landmark[12]
-            
-            # La distancia muñeca-dedo medio debe ser razonable
-            distance = np.sqrt(
-                (wrist.x - middle_finger_tip.x)**2 + 
-                (wrist.y - middle_finger_tip.y)**2
-            )
-            
-            if distance < 0.08:  # Muy pequeña para ser una mano real
-                return False
-        
-        return True
+        validator = (self.challenging_validator if skin_analysis["is_challenging_background"]
+                     else self.context_validator)
+        return validator.check(hand_landmarks, width, height)
     
     def simple_landmark_validation(self, hand_landmarks, image_width: int, image_height: int) -> bool:
         """Validación básica rápida"""
@@ -360,8 +341,6 @@ class ContrastEnhancedHandDetector:
             self.hands_detector.close()
         if hasattr(self, 'hands_ultra_sensitive'):
             self.hands_ultra_sensitive.close()
-        if hasattr(self, 'face_detector'):
-            self.face_detector.close()
 
 def create_contrast_enhanced_detector():
     """Crear instancia del detector con realce de contraste"""
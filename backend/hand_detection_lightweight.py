@@ -4,6 +4,11 @@ import mediapipe as mp
 import time
 from typing import Tuple, Optional, Dict, Any
 
+from detector_cascade import DetectorCascade
+from frame_pyramid import FramePyramid
+from hand_validation import QUICK_RULES, HandValidator
+from image_ops import get_clahe, morphology_scaled
+
 class LightweightHandDetectionOptimizer:
     """
     Optimizador ligero y eficiente para detección de manos en fondos complejos
@@ -30,16 +35,32 @@ class LightweightHandDetectionOptimizer:
         )
         
         self.use_fallback = False
+        # Validación rápida vectorizada (variación de los 5 primeros puntos)
+        self.quick_validator = HandValidator(QUICK_RULES)
         self.consecutive_failures = 0
         self.max_consecutive_failures = 5
         
-    def quick_background_check(self, image: np.ndarray) -> bool:
+        # Cascada principal -> fallback (escala tras max_consecutive_failures)
+        self.detection_cascade = DetectorCascade(
+            [("standard", self.hands_detector), ("fallback", self.hands_fallback)],
+            escalate_after=self.max_consecutive_failures,
+        )
+        self.cascade_state = self.detection_cascade.new_state()
+        
+        # Niveles de la pirámide que toleran el chequeo de fondo y la ROI
+        self.check_level = 1
+        self.roi_level = 2  # 1/4 de resolución, solo se necesita la caja
+        
+    def quick_background_check(self, image: np.ndarray,
+                               pyramid: Optional[FramePyramid] = None) -> bool:
         """
         Verificación rápida si el fondo es problemático
         Returns True si es un fondo complejo que necesita procesamiento extra
         """
-        # Convertir a escala de grises para análisis rápido
-        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        # Escala de grises reducida para análisis rápido (plano Y si hay NV21)
+        if pyramid is None:
+            pyramid = FramePyramid(image)
+        gray = pyramid.gray(self.check_level)
         
         # Calcular estadísticas básicas muy rápido
         mean_intensity = float(np.mean(gray))
@@ -74,22 +95,29 @@ class LightweightHandDetectionOptimizer:
             l_channel = lab[:, :, 0]
             
             # CLAHE ligero solo en canal L
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(4, 4))
+            clahe = get_clahe(2.0, (4, 4))
             lab[:, :, 0] = clahe.apply(l_channel)
             
             image = cv2.cvtColor(lab, cv2.COLOR_LAB2RGB)
         
         return image
     
-    def smart_roi_detection(self, image: np.ndarray) -> Optional[Tuple]:
+    def smart_roi_detection(self, image: np.ndarray,
+                            pyramid: Optional[FramePyramid] = None) -> Optional[Tuple]:
         """
         Detecta región de interés probable para la mano (muy rápido)
         Reduce el área de procesamiento para MediaPipe
+        
+        La máscara se calcula sobre el nivel ``roi_level`` de la pirámide y la
+        caja se traslada al nivel 0 para recortar ``image``.
         """
+        if pyramid is None:
+            pyramid = FramePyramid(image)
         height, width = image.shape[:2]
+        level_width, level_height = pyramid.level_size(self.roi_level)
         
         # Convertir a HSV para detección de piel rápida
-        hsv = cv2.cvtColor(image, cv2.COLOR_RGB2HSV)
+        hsv = cv2.cvtColor(pyramid.rgb(self.roi_level), cv2.COLOR_RGB2HSV)
         
         # Rango amplio de tonos de piel
         lower_skin = np.array([0, 15, 50])
@@ -99,9 +127,10 @@ class LightweightHandDetectionOptimizer:
         skin_mask = cv2.inRange(hsv, lower_skin, upper_skin)
         
         # Limpiar ruido rápido
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (7, 7))
-        skin_mask = cv2.morphologyEx(skin_mask, cv2.MORPH_OPEN, kernel)
-        skin_mask = cv2.morphologyEx(skin_mask, cv2.MORPH_CLOSE, kernel)
+        # (7x7 a resolución completa, reescalado al nivel de la máscara)
+        mask_scale = 1.0 / (1 << self.roi_level)
+        skin_mask = morphology_scaled(skin_mask, cv2.MORPH_OPEN, 7, mask_scale)
+        skin_mask = morphology_scaled(skin_mask, cv2.MORPH_CLOSE, 7, mask_scale)
         
         # Encontrar el contorno más grande (posible mano)
         contours, _ = cv2.findContours(skin_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -114,12 +143,12 @@ class LightweightHandDetectionOptimizer:
         area = cv2.contourArea(largest_contour)
         
         # Verificar que el área sea significativa
-        min_area = (width * height) * 0.01  # Al menos 1% de la imagen
+        min_area = (level_width * level_height) * 0.01  # Al menos 1% de la imagen
         if area < min_area:
             return None
         
-        # Obtener bounding box expandido
-        x, y, w, h = cv2.boundingRect(largest_contour)
+        # Obtener bounding box expandido, en coordenadas de resolución completa
+        x, y, w, h = pyramid.map_box(cv2.boundingRect(largest_contour), self.roi_level)
         
         # Expandir ROI un poco para capturar toda la mano
         expansion = 0.2
@@ -133,15 +162,18 @@ class LightweightHandDetectionOptimizer:
         
         return roi, (x_exp, y_exp, w_exp, h_exp)
     
-    def detect_hands_optimized(self, image_rgb: np.ndarray) -> Tuple[Any, Dict[str, Any]]:
+    def detect_hands_optimized(self, image_rgb: np.ndarray,
+                               pyramid: Optional[FramePyramid] = None) -> Tuple[Any, Dict[str, Any]]:
         """
         Detección optimizada y ligera de manos
         """
         start_time = time.perf_counter()
         original_height, original_width = image_rgb.shape[:2]
+        if pyramid is None:
+            pyramid = FramePyramid(image_rgb)
         
         # 1. Verificación rápida del fondo
-        needs_enhancement = self.quick_background_check(image_rgb)
+        needs_enhancement = self.quick_background_check(image_rgb, pyramid)
         
         # 2. Procesar imagen solo si es necesario
         processed_image = image_rgb
@@ -155,51 +187,34 @@ class LightweightHandDetectionOptimizer:
         # 3. Intentar detección con ROI inteligente para acelerar
         roi_time = 0.0
         use_roi = False
+        detection_image = processed_image
         
         if needs_enhancement and self.consecutive_failures > 2:
             roi_start = time.perf_counter()
-            roi_result = self.smart_roi_detection(processed_image)
+            # La máscara de piel sale de la pirámide del fotograma original;
+            # el recorte se hace sobre la imagen ya realzada
+            roi_result = self.smart_roi_detection(processed_image, pyramid)
             roi_time = float((time.perf_counter() - roi_start) * 1000)
             
             if roi_result is not None:
-                roi_image, (roi_x, roi_y, roi_w, roi_h) = roi_result
-                
                 # Procesar solo el ROI con MediaPipe (mucho más rápido)
-                detection_start = time.perf_counter()
-                results = self.hands_detector.process(roi_image)
-                detection_time = float((time.perf_counter() - detection_start) * 1000)
-                
-                # Ajustar coordenadas de vuelta a imagen completa
-                if results.multi_hand_landmarks:
-                    for hand_landmarks in results.multi_hand_landmarks:
-                        for landmark in hand_landmarks.landmark:
-                            # Convertir coordenadas ROI a coordenadas globales
-                            landmark.x = (landmark.x * roi_w + roi_x) / original_width
-                            landmark.y = (landmark.y * roi_h + roi_y) / original_height
-                
+                detection_image, (roi_x, roi_y, roi_w, roi_h) = roi_result
                 use_roi = True
-            else:
-                # Fallback: procesar imagen completa
-                detection_start = time.perf_counter()
-                results = self.hands_detector.process(processed_image)
-                detection_time = float((time.perf_counter() - detection_start) * 1000)
-        else:
-            # Procesamiento estándar rápido
-            detection_start = time.perf_counter()
-            results = self.hands_detector.process(processed_image)
-            detection_time = float((time.perf_counter() - detection_start) * 1000)
-        
-        # 4. Usar fallback solo si es crítico y no se detectó nada
-        used_fallback = False
-        if not results.multi_hand_landmarks and self.consecutive_failures >= self.max_consecutive_failures:
-            fallback_start = time.perf_counter()
-            fallback_results = self.hands_fallback.process(processed_image)
-            fallback_time = float((time.perf_counter() - fallback_start) * 1000)
-            
-            if fallback_results.multi_hand_landmarks:
-                results = fallback_results
-                detection_time += fallback_time
-                used_fallback = True
+        
+        # 4. Detección con la cascada: el fallback solo tras fallos repetidos,
+        #    o en paralelo con el principal si el modo especulativo está activo
+        detection_start = time.perf_counter()
+        results, _, cascade_info = self.detection_cascade.process(detection_image, self.cascade_state)
+        detection_time = float((time.perf_counter() - detection_start) * 1000)
+        used_fallback = cascade_info["cascade_config"] == "fallback"
+        
+        # Ajustar coordenadas de vuelta a imagen completa
+        if use_roi and results.multi_hand_landmarks:
+            for hand_landmarks in results.multi_hand_landmarks:
+                for landmark in hand_landmarks.landmark:
+                    # Convertir coordenadas ROI a coordenadas globales
+                    landmark.x = (landmark.x * roi_w + roi_x) / original_width
+                    landmark.y = (landmark.y * roi_h + roi_y) / original_height
         
         # 5. Actualizar contador de fallos
         if results.multi_hand_landmarks:
@@ -223,7 +238,8 @@ class LightweightHandDetectionOptimizer:
             "needs_enhancement": bool(needs_enhancement),
             "used_roi": bool(use_roi),
             "used_fallback": bool(used_fallback),
-            "consecutive_failures": int(self.consecutive_failures)
+            "consecutive_failures": int(self.consecutive_failures),
+            **cascade_info
         }
         
         return results, metadata
@@ -232,18 +248,9 @@ class LightweightHandDetectionOptimizer:
         """
         Validación muy básica y rápida de landmarks
         """
-        if not hand_landmarks or not hand_landmarks.landmark:
-            return False
-        
-        # Solo verificar que no estén todos en el mismo punto (detección fallida)
-        x_coords = [lm.x for lm in hand_landmarks.landmark[:5]]  # Solo primeros 5 puntos
-        y_coords = [lm.y for lm in hand_landmarks.landmark[:5]]
-        
-        # Si la variación es muy pequeña, probablemente es un error
-        x_var = max(x_coords) - min(x_coords)
-        y_var = max(y_coords) - min(y_coords)
-        
-        return bool(x_var > 0.02 and y_var > 0.02)  # Al menos 2% de variación
+        # Solo verificar que no estén todos en el mismo punto (detección
+        # fallida): al menos 2% de variación en los 5 primeros puntos
+        return self.quick_validator.check(hand_landmarks, image_width, image_height)
     
     def __del__(self):
         """Cleanup MediaPipe resources"""
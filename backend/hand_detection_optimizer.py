@@ -4,6 +4,12 @@ import mediapipe as mp
 import time
 from typing import Tuple, Optional, Dict, Any
 
+from detector_cascade import DetectorCascade
+from frame_pyramid import FramePyramid
+from hand_validation import REALISM_RULES, HandValidator
+from image_ops import MASK_SCALE, apply_masked_gain, blur_scaled, get_clahe, morphology_scaled, skin_mask_reduced
+from smoothing import EdgePreservingSmoother
+
 class HandDetectionOptimizer:
     """
     Optimizador de detección de manos para fondos complejos
@@ -37,17 +43,38 @@ class HandDetectionOptimizer:
             min_tracking_confidence=0.1,
         )
         
+        # Cascada simple -> complex -> ultra: escala tras fallos repetidos en
+        # vez de ejecutar dos grafos completos en el mismo fotograma
+        self.detection_cascade = DetectorCascade([
+            ("simple", self.hands_simple),
+            ("complex", self.hands_complex),
+            ("ultra_sensitive", self.hands_ultra_sensitive),
+        ])
+        self.cascade_state = self.detection_cascade.new_state()
+        # Presupuesto para un segundo grafo en el mismo fotograma (None = nunca)
+        self.detection_budget_ms = None
+        
         self.background_complexity_threshold = 30.0
         
-    def analyze_background_complexity(self, image: np.ndarray) -> float:
+        # Validación vectorizada de realismo de los landmarks
+        self.landmark_validator = HandValidator(REALISM_RULES)
+        
+        # Suavizado bilateral: el modo se elige según su coste medido
+        self.smoother = EdgePreservingSmoother(budget_ms=12.0)
+        
+    def analyze_background_complexity(self, image: np.ndarray,
+                                      pyramid: Optional[FramePyramid] = None) -> float:
         """
         Analiza la complejidad del fondo usando varianza de gradientes
         
         Returns:
             float: Score de complejidad (>30 = complejo, <30 = simple)
         """
-        # Convertir a escala de grises
-        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        # Escala de grises a resolución completa (los umbrales dependen de la
+        # escala); con NV21 es directamente el plano Y
+        if pyramid is None:
+            pyramid = FramePyramid(image)
+        gray = pyramid.gray(0)
         
         # Calcular gradientes usando Sobel
         sobel_x = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
@@ -67,12 +94,12 @@ class HandDetectionOptimizer:
         """
         # 1. Mejora de contraste adaptativa (CLAHE)
         lab = cv2.cvtColor(image, cv2.COLOR_RGB2LAB)
-        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+        clahe = get_clahe(3.0, (8, 8))
         lab[:, :, 0] = clahe.apply(lab[:, :, 0])
         enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2RGB)
         
         # 2. Suavizado bilateral para reducir ruido manteniendo bordes
-        smooth = cv2.bilateralFilter(enhanced, 9, 75, 75)
+        smooth = self.smoother.smooth(enhanced, 9, 75)
         
         # 3. Ajuste de gamma para resaltar tonos de piel
         gamma = 0.8  # Slightly darker to enhance skin tones
@@ -85,40 +112,23 @@ class HandDetectionOptimizer:
         """
         Mejora específicamente los tonos de piel para mejor detección
         """
-        # Convertir a HSV para manipulación de color más fácil
-        hsv = cv2.cvtColor(image, cv2.COLOR_RGB2HSV)
-        
-        # Rangos de color de piel en HSV
-        lower_skin = np.array([0, 20, 70], dtype=np.uint8)
-        upper_skin = np.array([20, 255, 255], dtype=np.uint8)
-        
-        # Crear máscara de piel
-        skin_mask = cv2.inRange(hsv, lower_skin, upper_skin)
+        # Rangos de color de piel en HSV. La máscara solo se usa como peso
+        # suave, así que se calcula a 1/4 de resolución con kernels escalados
+        # (11x11 y 15x15 a resolución completa).
+        skin_mask = skin_mask_reduced(image, (0, 20, 70), (20, 255, 255), MASK_SCALE)
         
         # Dilatar la máscara para incluir más área
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (11, 11))
-        skin_mask = cv2.morphologyEx(skin_mask, cv2.MORPH_CLOSE, kernel)
-        skin_mask = cv2.dilate(skin_mask, kernel, iterations=2)
+        skin_mask = morphology_scaled(skin_mask, cv2.MORPH_CLOSE, 11, MASK_SCALE)
+        skin_mask = morphology_scaled(skin_mask, cv2.MORPH_DILATE, 11, MASK_SCALE, iterations=2)
         
         # Aplicar un ligero desenfoque gaussiano a la máscara
-        skin_mask = cv2.GaussianBlur(skin_mask, (15, 15), 0)
-        
-        # Crear imagen mejorada donde las áreas de piel son más brillantes
-        enhanced = image.copy()
-        
-        # Normalizar máscara a 0-1
-        skin_mask_norm = skin_mask.astype(np.float32) / 255.0
-        
-        # Aumentar brillo en áreas de piel
-        for i in range(3):  # Para cada canal RGB
-            enhanced[:, :, i] = enhanced[:, :, i] * (1 + 0.3 * skin_mask_norm)
+        skin_mask = blur_scaled(skin_mask, 15, MASK_SCALE)
         
-        # Clip valores para evitar overflow
-        enhanced = np.clip(enhanced, 0, 255).astype(np.uint8)
-        
-        return enhanced
+        # Aumentar brillo en áreas de piel (uint8 saturado, sin desbordes)
+        return apply_masked_gain(image, skin_mask, 0.3)
     
-    def detect_hands_adaptive(self, image_rgb: np.ndarray) -> Tuple[Any, Dict[str, Any]]:
+    def detect_hands_adaptive(self, image_rgb: np.ndarray,
+                              pyramid: Optional[FramePyramid] = None) -> Tuple[Any, Dict[str, Any]]:
         """
         Detección adaptativa de manos basada en complejidad del fondo
         
@@ -128,37 +138,35 @@ class HandDetectionOptimizer:
         start_time = time.perf_counter()
         
         # Analizar complejidad del fondo
-        complexity_score = self.analyze_background_complexity(image_rgb)
+        complexity_score = self.analyze_background_complexity(image_rgb, pyramid)
         
         # Determinar estrategia basada en complejidad
         if complexity_score < 15:
             # Fondo muy simple - usar configuración estándar
             strategy = "simple"
             processed_image = image_rgb
-            hands_detector = self.hands_simple
+            min_level = 0
             
         elif complexity_score < 40:
             # Fondo moderadamente complejo
             strategy = "moderate"
             processed_image = self.preprocess_for_complex_background(image_rgb)
-            hands_detector = self.hands_complex
+            min_level = 1
             
         else:
             # Fondo muy complejo - usar todas las optimizaciones
             strategy = "complex"
             processed_image = self.preprocess_for_complex_background(image_rgb)
             processed_image = self.skin_color_enhancement(processed_image)
-            hands_detector = self.hands_complex
-        
-        # Detección inicial
-        results = hands_detector.process(processed_image)
+            min_level = 1
         
-        # Si no se detecta nada en fondo complejo, intentar con configuración ultra-sensible
-        if not results.multi_hand_landmarks and strategy in ["moderate", "complex"]:
-            results_ultra = self.hands_ultra_sensitive.process(processed_image)
-            if results_ultra.multi_hand_landmarks:
-                results = results_ultra
-                strategy += "_ultra"
+        # Detección con la configuración de la cascada (al menos la que pide
+        # la complejidad del fondo); ultra-sensible solo tras fallos repetidos
+        results, _, cascade_info = self.detection_cascade.process(
+            processed_image, self.cascade_state, min_level=min_level, budget_ms=self.detection_budget_ms
+        )
+        if cascade_info["cascade_config"] == "ultra_sensitive":
+            strategy += "_ultra"
         
         end_time = time.perf_counter()
         processing_time = (end_time - start_time) * 1000
@@ -167,7 +175,8 @@ class HandDetectionOptimizer:
             "complexity_score": complexity_score,
             "strategy": strategy,
             "processing_time_ms": processing_time,
-            "hands_detected": len(results.multi_hand_landmarks) if results.multi_hand_landmarks else 0
+            "hands_detected": len(results.multi_hand_landmarks) if results.multi_hand_landmarks else 0,
+            **cascade_info
         }
         
         return results, metadata
@@ -176,26 +185,8 @@ class HandDetectionOptimizer:
         """
         Valida que los landmarks detectados sean realistas
         """
-        if not hand_landmarks or not hand_landmarks.landmark:
-            return False
-        
-        # Verificar que los landmarks estén dentro de la imagen
-        for lm in hand_landmarks.landmark:
-            x, y = lm.x * image_width, lm.y * image_height
-            if x < 0 or x >= image_width or y < 0 or y >= image_height:
-                return False
-        
-        # Verificar que la mano tenga un tamaño razonable
-        x_coords = [lm.x * image_width for lm in hand_landmarks.landmark]
-        y_coords = [lm.y * image_height for lm in hand_landmarks.landmark]
-        
-        hand_width = max(x_coords) - min(x_coords)
-        hand_height = max(y_coords) - min(y_coords)
-        
-        # La mano debe ocupar al menos 5% del ancho/alto de la imagen
-        min_size = min(image_width, image_height) * 0.05
-        
-        return hand_width > min_size and hand_height > min_size
+        # Landmarks dentro de la imagen y mano de al menos 5% del lado menor
+        return self.landmark_validator.check(hand_landmarks, image_width, image_height)
     
     def __del__(self):
         """Cleanup MediaPipe resources"""
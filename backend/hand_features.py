@@ -0,0 +1,80 @@
+"""
+Landmark features shared by training and serving.
+
+MediaPipe returns 21 (x, y, z) landmarks in image-normalized coordinates,
+so the raw 63-float vector encodes where the hand is and how large it
+appears as much as its shape. ``normalize_landmarks`` removes both: points
+are taken relative to the wrist and divided by the palm size (mean wrist
+to index/middle/pinky MCP distance). It works on a whole (N, 21, 3) batch
+at once.
+
+Which transform a model expects is part of the model: scikit-learn
+pipelines carry it as a step, and the NumPy export records its name
+(``FEATURE_TRANSFORMS``) so ``LinearClassifier`` applies the same function
+before scoring. Callers always pass raw landmarks.
+"""
+
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+NUM_LANDMARKS = 21
+NUM_FEATURES = NUM_LANDMARKS * 3
+
+WRIST = 0
+INDEX_MCP = 5
+MIDDLE_MCP = 9
+PINKY_MCP = 17
+_PALM = [INDEX_MCP, MIDDLE_MCP, PINKY_MCP]
+
+
+def landmarks_array(hand_landmarks) -> np.ndarray:
+    """(21, 3) float32 array of a NormalizedLandmarkList (exact: protobuf values are float32)."""
+    return np.array([(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark],
+                    dtype=np.float32).reshape(-1, 3)
+
+
+def as_points(features: np.ndarray) -> np.ndarray:
+    """(N, 21, 3) float32 view of (N, 63), (N, 21, 3) or (21, 3) landmarks."""
+    return np.asarray(features, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3)
+
+
+def mirror_left_hands(features: np.ndarray, is_left: np.ndarray) -> np.ndarray:
+    """
+    Raw landmarks with every hand flagged in ``is_left`` mirrored
+    horizontally (x -> 1 - x), so all hands look like right hands.
+    """
+    points = as_points(features).copy()
+    is_left = np.asarray(is_left, dtype=bool)
+    points[is_left, :, 0] = 1 - points[is_left, :, 0]
+    return points.reshape(len(points), -1)
+
+
+def normalize_landmarks(features: np.ndarray, is_left: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Translation- and scale-invariant (N, 63) features: wrist-relative and
+    divided by the palm size. With ``is_left`` those hands are mirrored to
+    right hands first.
+    """
+    points = as_points(features)
+    relative = points - points[:, WRIST:WRIST + 1]
+    if is_left is not None:
+        relative[np.asarray(is_left, dtype=bool), :, 0] *= -1
+    palm = np.sqrt(np.square(relative[:, _PALM]).sum(axis=2)).mean(axis=1)
+    palm[palm < 1e-6] = 1.0
+    relative /= palm[:, None, None]
+    return relative.reshape(len(points), -1)
+
+
+FEATURE_TRANSFORMS: Dict[str, Optional[Callable[[np.ndarray], np.ndarray]]] = {
+    "raw": None,
+    "hand": normalize_landmarks,
+}
+
+
+def feature_transform_name(function: Optional[Callable]) -> str:
+    """Name under which ``function`` is exported (ValueError if it has none)."""
+    for name, transform in FEATURE_TRANSFORMS.items():
+        if transform is function:
+            return name
+    raise ValueError(f"Feature transform {function!r} cannot be exported")
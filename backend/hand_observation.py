@@ -0,0 +1,94 @@
+"""
+Observación de mano compacta respaldada por un array NumPy.
+
+Los landmarks de MediaPipe llegan como objetos protobuf; recorrerlos en
+Python en cada consumidor (validación, puntos clave, características del
+clasificador) repite el mismo trabajo varias veces por fotograma. Una
+HandObservation se construye una sola vez por detección y guarda las 21
+coordenadas normalizadas en un único array (21, 3) float32 contiguo; el
+resto de la ruta opera sobre ese array con expresiones vectorizadas.
+"""
+
+import math
+from typing import Any, List, Optional
+
+import numpy as np
+
+from hand_features import NUM_LANDMARKS, landmarks_array
+
+
+class HandObservation:
+    """Landmarks (x, y, z) normalizados de una mano, lateralidad y confianza"""
+
+    __slots__ = ("points", "handedness", "score")
+
+    def __init__(self, points: np.ndarray, handedness: str = "", score: float = 0.0):
+        self.points = np.ascontiguousarray(points, dtype=np.float32)
+        self.handedness = handedness
+        self.score = score
+
+    @classmethod
+    def from_landmarks(cls, hand_landmarks, handedness=None) -> "HandObservation":
+        """
+        Convierte un NormalizedLandmarkList (y opcionalmente su entrada de
+        ``multi_handedness``) en una observación. Los valores del protobuf
+        son float32, así que la conversión es exacta.
+        """
+        points = landmarks_array(hand_landmarks)
+        label, score = "", 0.0
+        if handedness is not None and handedness.classification:
+            classification = handedness.classification[0]
+            label, score = classification.label, float(classification.score)
+        return cls(points, label, score)
+
+    @classmethod
+    def from_results(cls, results) -> List["HandObservation"]:
+        """Observaciones de todas las manos de un resultado de MediaPipe Hands"""
+        hands = getattr(results, "multi_hand_landmarks", None) or []
+        handedness = getattr(results, "multi_handedness", None) or [None] * len(hands)
+        return [cls.from_landmarks(hand, side) for hand, side in zip(hands, handedness)]
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    @property
+    def xy(self) -> np.ndarray:
+        """Vista (N, 2) de las coordenadas x, y normalizadas"""
+        return self.points[:, :2]
+
+    def features(self) -> np.ndarray:
+        """Vector (1, 63) x0, y0, z0, x1... para el clasificador (vista, sin copia)"""
+        return self.points.reshape(1, -1)
+
+    def normalized_pose(self) -> np.ndarray:
+        """
+        Forma de la mano (N, 3) independiente de posición y tamaño: relativa
+        al centroide y dividida por la distancia RMS de los puntos a él
+        """
+        relative = self.points - self.points.sum(axis=0) / len(self.points)
+        xy = relative[:, :2]
+        scale = math.sqrt(float((xy * xy).sum()) / xy.size)
+        return relative / scale if scale > 0 else relative
+
+    def pixels(self, width: int, height: int) -> np.ndarray:
+        """Puntos clave (N, 2) en píxeles enteros (truncados como ``int()``)"""
+        # En float64, como ``int(lm.x * width)`` con floats de Python
+        return (self.xy * np.array([width, height], dtype=np.float64)).astype(np.int32)
+
+    def extent(self, count: Optional[int] = None) -> np.ndarray:
+        """Rango (x, y) normalizado de los primeros ``count`` landmarks, en float64"""
+        xy = self.xy[:count].astype(np.float64)
+        return xy.max(axis=0) - xy.min(axis=0)
+
+    def center(self, width: int = 1, height: int = 1) -> np.ndarray:
+        """Centro medio de los landmarks (en píxeles si se indica el tamaño)"""
+        return (self.xy * np.array([width, height], dtype=np.float64)).mean(axis=0)
+
+
+def as_observation(hand: Any) -> Optional[HandObservation]:
+    """Acepta una HandObservation o un protobuf de landmarks (rutas antiguas)"""
+    if hand is None or isinstance(hand, HandObservation):
+        return hand
+    if not hand.landmark:
+        return None
+    return HandObservation.from_landmarks(hand)
@@ -0,0 +1,264 @@
+"""
+Motor de validación vectorizado para manos candidatas.
+
+Las comprobaciones geométricas de los distintos detectores (extensión,
+proporciones, orden de las puntas, distancia muñeca-dedo medio, regiones
+excluidas, tamaño en píxeles) se calculan para las N manos de un fotograma
+a la vez sobre un array (N, 21, 3). Cada detector declara su conjunto de
+reglas; el resultado incluye qué manos se aceptan, la puntuación de calidad
+y la primera regla que ha fallado en cada mano.
+
+Las reglas reproducen exactamente los umbrales y comparaciones de las
+validaciones originales (mismos ``<`` / ``<=`` y aritmética en float64).
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from hand_observation import as_observation
+
+# Índices de MediaPipe Hands
+WRIST = 0
+MIDDLE_FINGER_TIP = 12
+FINGER_TIPS = np.array([4, 8, 12, 16, 20])
+
+
+class _lazy:
+    """Propiedad calculada la primera vez y guardada en la instancia"""
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.name = fn.__name__
+        self.__doc__ = fn.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = instance.__dict__[self.name] = self.fn(instance)
+        return value
+
+
+class HandGeometry:
+    """Características geométricas de N manos, calculadas bajo demanda y una vez"""
+
+    def __init__(self, points: np.ndarray, width: int, height: int):
+        self.points = points  # (N, 21, 3) float32 normalizado
+        self.width = width
+        self.height = height
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    @_lazy
+    def xy(self) -> np.ndarray:
+        """(N, 21, 2) normalizado en float64"""
+        return self.points[:, :, :2].astype(np.float64)
+
+    @_lazy
+    def pixels(self) -> np.ndarray:
+        """(N, 21, 2) en píxeles (float64)"""
+        return self.xy * np.array([self.width, self.height], dtype=np.float64)
+
+    @_lazy
+    def extent(self) -> np.ndarray:
+        """(N, 2) rango x, y normalizado de todos los landmarks"""
+        return self.xy.max(axis=1) - self.xy.min(axis=1)
+
+    @_lazy
+    def extent_first5(self) -> np.ndarray:
+        """(N, 2) rango x, y normalizado de los 5 primeros landmarks"""
+        xy = self.xy[:, :5]
+        return xy.max(axis=1) - xy.min(axis=1)
+
+    @_lazy
+    def pixel_extent(self) -> np.ndarray:
+        """(N, 2) ancho y alto de la mano en píxeles"""
+        return self.pixels.max(axis=1) - self.pixels.min(axis=1)
+
+    @_lazy
+    def in_image(self) -> np.ndarray:
+        """(N,) todos los landmarks dentro de la imagen"""
+        size = np.array([self.width, self.height], dtype=np.float64)
+        return ((self.pixels >= 0) & (self.pixels < size)).all(axis=(1, 2))
+
+    @_lazy
+    def center(self) -> np.ndarray:
+        """(N, 2) centro medio en píxeles"""
+        return np.add.reduce(self.pixels, axis=1) / self.points.shape[1]
+
+    @_lazy
+    def wrist_middle_distance(self) -> np.ndarray:
+        """(N,) distancia normalizada muñeca-punta del dedo medio"""
+        delta = self.xy[:, WRIST] - self.xy[:, MIDDLE_FINGER_TIP]
+        return np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+
+    @_lazy
+    def pixel_variance(self) -> np.ndarray:
+        """(N, 2) varianza x, y en píxeles (mismas operaciones que ``np.var``)"""
+        coords = np.ascontiguousarray(self.pixels.transpose(0, 2, 1))
+        count = coords.shape[2]
+        deviation = coords - np.add.reduce(coords, axis=2, keepdims=True) / count
+        return np.add.reduce(deviation * deviation, axis=2) / count
+
+    @_lazy
+    def quality_score(self) -> np.ndarray:
+        """(N,) puntuación de calidad (proporciones, puntas, variabilidad)"""
+        hand_width, hand_height = self.pixel_extent[:, 0], self.pixel_extent[:, 1]
+
+        # Ratio típico de una mano (debe ser entre 0.6 y 1.4)
+        aspect_ratio = np.divide(hand_width, hand_height, out=np.zeros_like(hand_width),
+                                 where=hand_height > 0)
+        aspect_score = np.where((aspect_ratio >= 0.6) & (aspect_ratio <= 1.4), 1.0, 0.3)
+
+        # Proporción de puntas por encima de la muñeca (posición típica)
+        y = self.pixels[:, :, 1]
+        finger_score = (y[:, FINGER_TIPS] < y[:, :1]).sum(axis=1) / len(FINGER_TIPS)
+
+        # Variabilidad en las posiciones (no todos los puntos iguales)
+        variance = self.pixel_variance
+        variability_score = np.minimum(1.0, (variance[:, 0] + variance[:, 1]) / 1000.0)
+
+        final_score = aspect_score * 0.3 + finger_score * 0.5 + variability_score * 0.2
+        return np.clip(final_score, 0.0, 1.0)
+
+
+# Una regla recibe la geometría y el contexto y devuelve (N,) bool de aprobadas
+Rule = Tuple[str, Callable[[HandGeometry, Dict[str, Any]], np.ndarray]]
+
+
+def min_extent(threshold: float, first5: bool = False, strict: bool = False) -> Rule:
+    """Extensión x e y normalizada mínima (``> threshold`` si strict)"""
+    def check(geometry: HandGeometry, context: Dict[str, Any]) -> np.ndarray:
+        extent = geometry.extent_first5 if first5 else geometry.extent
+        passed = extent > threshold if strict else extent >= threshold
+        return passed.all(axis=1)
+    return (f"extent_{'5_' if first5 else ''}{threshold:g}", check)
+
+
+def min_wrist_middle_distance(threshold: float) -> Rule:
+    """Distancia muñeca-dedo medio mínima (normalizada)"""
+    def check(geometry: HandGeometry, context: Dict[str, Any]) -> np.ndarray:
+        return geometry.wrist_middle_distance >= threshold
+    return ("wrist_middle_distance", check)
+
+
+def inside_image() -> Rule:
+    """Todos los landmarks dentro de la imagen"""
+    def check(geometry: HandGeometry, context: Dict[str, Any]) -> np.ndarray:
+        return geometry.in_image
+    return ("outside_image", check)
+
+
+def min_pixel_size(fraction: float) -> Rule:
+    """Ancho y alto de la mano mayores que ``fraction`` del lado menor"""
+    def check(geometry: HandGeometry, context: Dict[str, Any]) -> np.ndarray:
+        min_size = min(geometry.width, geometry.height) * fraction
+        return (geometry.pixel_extent > min_size).all(axis=1)
+    return ("too_small", check)
+
+
+def outside_excluded_regions() -> Rule:
+    """Centro fuera de las regiones de cara/torso de ``context["regions"]``"""
+    def check(geometry: HandGeometry, context: Dict[str, Any]) -> np.ndarray:
+        regions = context.get("regions")
+        if not regions:
+            return np.ones(len(geometry), dtype=bool)
+        boxes = np.asarray(regions, dtype=np.float64).reshape(-1, 4)
+        cx, cy = geometry.center[:, :1], geometry.center[:, 1:]
+        inside = ((boxes[:, 0] <= cx) & (cx <= boxes[:, 0] + boxes[:, 2])
+                  & (boxes[:, 1] <= cy) & (cy <= boxes[:, 1] + boxes[:, 3]))
+        return ~inside.any(axis=1)
+    return ("excluded_region", check)
+
+
+# Conjuntos de reglas de cada detector
+CONTEXT_RULES: List[Rule] = [min_extent(0.02)]
+CHALLENGING_CONTEXT_RULES: List[Rule] = [
+    min_extent(0.02), min_extent(0.05), min_wrist_middle_distance(0.08),
+]
+QUICK_RULES: List[Rule] = [min_extent(0.02, first5=True, strict=True)]
+REALISM_RULES: List[Rule] = [inside_image(), min_pixel_size(0.05)]
+EXCLUSION_RULES: List[Rule] = [outside_excluded_regions()]
+
+
+class ValidationResult:
+    """Resultado por mano: aceptada, puntuación y primera regla fallida"""
+
+    __slots__ = ("accepted", "scores", "reasons", "geometry")
+
+    def __init__(self, accepted: np.ndarray, scores: Optional[np.ndarray],
+                 reasons: List[Optional[str]], geometry: HandGeometry):
+        self.accepted = accepted
+        self.scores = scores
+        self.reasons = reasons
+        self.geometry = geometry
+
+
+class HandValidator:
+    """Aplica un conjunto de reglas a todas las manos candidatas en una pasada"""
+
+    def __init__(self, rules: Sequence[Rule], score: bool = False):
+        self.rules = list(rules)
+        self.score = score
+
+    def evaluate(self, hands: Sequence[Any], width: int, height: int,
+                 context: Optional[Dict[str, Any]] = None) -> ValidationResult:
+        """
+        Valida ``hands`` (HandObservation o landmarks protobuf).
+
+        ``context`` se pasa a las reglas (p. ej. ``{"regions": [...]}``).
+        """
+        observations = [as_observation(hand) for hand in hands]
+        valid = [obs is not None for obs in observations]
+        points = np.stack([obs.points for obs in observations if obs is not None]) \
+            if any(valid) else np.zeros((0, 21, 3), dtype=np.float32)
+        return self.evaluate_points(points, width, height, context, valid)
+
+    def evaluate_points(self, points: np.ndarray, width: int, height: int,
+                        context: Optional[Dict[str, Any]] = None,
+                        valid: Optional[Sequence[bool]] = None) -> ValidationResult:
+        """Valida un array (N, 21, 3); ``valid`` marca entradas vacías"""
+        context = context or {}
+        geometry = HandGeometry(points, width, height)
+        passed = np.ones(len(points), dtype=bool)
+        reasons: List[Optional[str]] = [None] * len(points)
+
+        for name, check in self.rules:
+            failed = passed & ~check(geometry, context)
+            if failed.any():
+                for index in np.flatnonzero(failed):
+                    reasons[index] = name
+                passed &= ~failed
+
+        scores = geometry.quality_score if self.score else None
+
+        if valid is not None and not all(valid):
+            # Reinsertar las entradas sin landmarks como rechazadas
+            full_passed = np.zeros(len(valid), dtype=bool)
+            full_reasons: List[Optional[str]] = ["no_landmarks"] * len(valid)
+            full_scores = np.zeros(len(valid)) if scores is not None else None
+            slots = np.flatnonzero(valid)
+            full_passed[slots] = passed
+            for slot, reason in zip(slots, reasons):
+                full_reasons[slot] = reason
+            if scores is not None:
+                full_scores[slots] = scores
+            passed, reasons, scores = full_passed, full_reasons, full_scores
+
+        return ValidationResult(passed, scores, reasons, geometry)
+
+    def check(self, hand: Any, width: int, height: int,
+              context: Optional[Dict[str, Any]] = None) -> bool:
+        """Atajo para una sola mano"""
+        return bool(self.evaluate([hand], width, height, context).accepted[0])
+
+
+def movement_is_consistent(history: Sequence[Tuple[float, float]], factor: float = 3.0) -> bool:
+    """Sin saltos mayores que ``factor`` veces el desplazamiento medio"""
+    if len(history) < 3:
+        return True  # Pocas muestras, asumir consistente
+    positions = np.asarray(history, dtype=np.float64)
+    delta = np.diff(positions, axis=0)
+    distances = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+    return bool(distances.max() <= np.mean(distances) * factor)
@@ -0,0 +1,132 @@
+"""
+Operadores de imagen compartidos por los detectores de manos.
+
+Las funciones de imagen trabajan con RGB uint8 y devuelven uint8 con
+aritmética saturada, sin pasar por float32 en la ruta caliente. Los objetos
+de OpenCV costosos de construir (CLAHE, kernels morfológicos) se reutilizan
+mediante una caché por hilo.
+"""
+
+import threading
+
+import cv2
+import numpy as np
+from typing import Optional, Tuple
+
+# Caché de operadores por hilo: los objetos CLAHE guardan buffers internos y
+# no deben compartirse entre hilos del servidor
+_operator_cache = threading.local()
+
+# Paso de cuantización del clip limit de CLAHE
+CLAHE_CLIP_STEP = 0.5
+
+# Escala a la que se calculan las máscaras de piel (1/4 por lado = 1/16 de
+# píxeles); solo se usan para cajas o pesos suaves
+MASK_SCALE = 0.25
+
+
+def _thread_cache() -> dict:
+    """Diccionario de operadores del hilo actual"""
+    cache = getattr(_operator_cache, "operators", None)
+    if cache is None:
+        cache = _operator_cache.operators = {}
+    return cache
+
+
+def get_clahe(clip_limit: float, tile_grid_size: Tuple[int, int]):
+    """
+    Objeto CLAHE reutilizable para el hilo actual.
+
+    El clip limit se cuantiza a múltiplos de CLAHE_CLIP_STEP, de modo que un
+    valor que varía de forma continua (p. ej. con el porcentaje de piel)
+    reutiliza unos pocos objetos en vez de crear uno por fotograma.
+    """
+    clip_bucket = max(CLAHE_CLIP_STEP, round(clip_limit / CLAHE_CLIP_STEP) * CLAHE_CLIP_STEP)
+    key = ("clahe", clip_bucket, tuple(tile_grid_size))
+    cache = _thread_cache()
+    clahe = cache.get(key)
+    if clahe is None:
+        clahe = cache[key] = cv2.createCLAHE(clipLimit=clip_bucket, tileGridSize=tuple(tile_grid_size))
+    return clahe
+
+
+def get_structuring_element(shape: int, ksize: Tuple[int, int]) -> np.ndarray:
+    """Kernel morfológico reutilizable para el hilo actual (no modificar)"""
+    key = ("kernel", shape, tuple(ksize))
+    cache = _thread_cache()
+    kernel = cache.get(key)
+    if kernel is None:
+        kernel = cache[key] = cv2.getStructuringElement(shape, tuple(ksize))
+    return kernel
+
+
+def downscale(image: np.ndarray, scale: float) -> np.ndarray:
+    """Reduce la imagen por ``scale`` (INTER_AREA); scale=1.0 no copia."""
+    if scale >= 1.0:
+        return image
+    height, width = image.shape[:2]
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def upscale_mask(mask: np.ndarray, shape: Tuple[int, ...]) -> np.ndarray:
+    """Lleva una máscara uint8 a la resolución ``shape`` (alto, ancho)."""
+    height, width = shape[:2]
+    if mask.shape[:2] == (height, width):
+        return mask
+    return cv2.resize(mask, (width, height), interpolation=cv2.INTER_LINEAR)
+
+
+def skin_mask_reduced(image_rgb: np.ndarray, lower, upper, scale: float = MASK_SCALE) -> np.ndarray:
+    """
+    Máscara HSV de piel calculada sobre una versión reducida de la imagen.
+
+    Devuelve la máscara a la resolución reducida; el consumidor decide si
+    necesita subirla a resolución completa.
+    """
+    small = downscale(image_rgb, scale)
+    hsv = cv2.cvtColor(small, cv2.COLOR_RGB2HSV)
+    return cv2.inRange(hsv, np.asarray(lower, dtype=np.uint8), np.asarray(upper, dtype=np.uint8))
+
+
+def scaled_ksize(ksize: int, scale: float) -> int:
+    """Tamaño impar de kernel equivalente a ``ksize`` (resolución completa) a ``scale``"""
+    return max(1, int(round(ksize * scale))) | 1
+
+
+def morphology_scaled(mask: np.ndarray, op: int, ksize: int, scale: float,
+                      iterations: int = 1) -> np.ndarray:
+    """
+    ``cv2.morphologyEx`` con un kernel elíptico de ``ksize`` px a resolución
+    completa, reescalado para una máscara calculada a ``scale``. Si el kernel
+    equivalente queda en 1x1 la operación es la identidad y se omite.
+    """
+    k = scaled_ksize(ksize, scale)
+    if k == 1:
+        return mask
+    kernel = get_structuring_element(cv2.MORPH_ELLIPSE, (k, k))
+    return cv2.morphologyEx(mask, op, kernel, iterations=iterations)
+
+
+def blur_scaled(mask: np.ndarray, ksize: int, scale: float) -> np.ndarray:
+    """``cv2.GaussianBlur`` con un kernel de ``ksize`` px a resolución completa"""
+    k = scaled_ksize(ksize, scale)
+    if k == 1:
+        return mask
+    return cv2.GaussianBlur(mask, (k, k), 0)
+
+
+def apply_masked_gain(image_rgb: np.ndarray, mask: np.ndarray, gain: float,
+                      out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Ganancia enmascarada fusionada: ``out = sat(image * (1 + gain * mask / 255))``.
+
+    ``mask`` es uint8 de un canal y puede estar a menor resolución; se sube
+    con interpolación lineal, lo que además suaviza los bordes. Se opera
+    sobre la vista HxWx3 completa en uint8 con saturación, sin bucle por
+    canal ni conversión a float.
+    """
+    mask = upscale_mask(mask, image_rgb.shape)
+    weight = cv2.cvtColor(mask, cv2.COLOR_GRAY2RGB)
+    boost = cv2.multiply(image_rgb, weight, scale=gain / 255.0)
+    return cv2.add(image_rgb, boost, dst=out)
@@ -0,0 +1,102 @@
+"""
+On-the-fly augmentation of hand landmarks for training.
+
+Augmenting in landmark space instead of pixel space costs a few floating
+point operations per point, so a training loop can draw a fresh random
+variant of every row on every epoch instead of extracting more images.
+``augment`` transforms a whole batch of raw (N, 63) or (N, 21, 3)
+landmarks at once; every hand gets its own random:
+
+- mirror (x -> -x around the wrist, i.e. the other hand),
+- 3D rotation around the wrist: a wider in-plane angle and a smaller
+  out-of-plane tilt, as a real hand turns in front of the camera,
+- scale around the wrist (distance to the camera),
+- translation in the image plane,
+- per-point jitter proportional to the palm length (detector noise).
+
+Results stay raw image-normalized landmarks, so they feed any
+``hand_features`` transform. ``train_streaming.py --augment N`` calls
+``augment`` per batch, so the augmented set is never materialized.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from hand_features import MIDDLE_MCP, NUM_LANDMARKS, WRIST, as_points
+
+
+class Augmentation:
+    """Ranges of the random landmark transforms (zero disables one)."""
+
+    __slots__ = ("mirror_p", "roll", "tilt", "scale", "shift", "jitter")
+
+    def __init__(self, mirror_p: float = 0.5, roll: float = 0.35, tilt: float = 0.25,
+                 scale: float = 0.25, shift: float = 0.15, jitter: float = 0.03):
+        self.mirror_p = mirror_p  # probability of mirroring a hand
+        self.roll = roll          # max in-plane rotation (radians)
+        self.tilt = tilt          # max rotation around the x and y axes (radians)
+        self.scale = scale        # max relative scale change
+        self.shift = shift        # max translation (image-normalized units)
+        self.jitter = jitter      # per-point noise std, relative to the wrist-middle MCP distance
+
+
+def _rotation(rng: np.random.Generator, n: int, roll: float, tilt: float) -> np.ndarray:
+    """(n, 3, 3) rotations Rz(roll) @ Ry(tilt) @ Rx(tilt) with uniform random angles."""
+    a = rng.uniform(-roll, roll, n).astype(np.float32)
+    b = rng.uniform(-tilt, tilt, n).astype(np.float32)
+    c = rng.uniform(-tilt, tilt, n).astype(np.float32)
+    ca, sa, cb, sb, cc, sc = np.cos(a), np.sin(a), np.cos(b), np.sin(b), np.cos(c), np.sin(c)
+    rotation = np.empty((n, 3, 3), dtype=np.float32)
+    rotation[:, 0, 0] = ca * cb
+    rotation[:, 0, 1] = ca * sb * sc - sa * cc
+    rotation[:, 0, 2] = ca * sb * cc + sa * sc
+    rotation[:, 1, 0] = sa * cb
+    rotation[:, 1, 1] = sa * sb * sc + ca * cc
+    rotation[:, 1, 2] = sa * sb * cc - ca * sc
+    rotation[:, 2, 0] = -sb
+    rotation[:, 2, 1] = cb * sc
+    rotation[:, 2, 2] = cb * cc
+    return rotation
+
+
+def augment(features: np.ndarray, rng: np.random.Generator,
+            augmentation: Optional[Augmentation] = None) -> np.ndarray:
+    """Randomly transformed copy of a batch of raw landmarks, shape (N, 63) float32."""
+    augmentation = augmentation or Augmentation()
+    points = as_points(features)
+    n = len(points)
+    wrist = points[:, WRIST]
+    x, y, z = (points[:, :, axis] - wrist[:, axis:axis + 1] for axis in range(3))
+
+    # Mirror, rotation and scale folded into one 3x3 matrix per hand
+    if augmentation.roll > 0 or augmentation.tilt > 0:
+        matrix = _rotation(rng, n, augmentation.roll, augmentation.tilt)
+    else:
+        matrix = np.broadcast_to(np.eye(3, dtype=np.float32), (n, 3, 3)).copy()
+    if augmentation.mirror_p > 0:
+        matrix[rng.random(n) < augmentation.mirror_p, :, 0] *= -1
+    scale = np.ones(n, dtype=np.float32)
+    if augmentation.scale > 0:
+        scale = rng.uniform(1 - augmentation.scale, 1 + augmentation.scale, n).astype(np.float32)
+        matrix *= scale[:, None, None]
+
+    offset = wrist.copy()
+    if augmentation.shift > 0:
+        offset[:, :2] += rng.uniform(-augmentation.shift, augmentation.shift, (n, 2)).astype(np.float32)
+    if augmentation.jitter > 0:
+        # Uniform noise with the same standard deviation: 4x cheaper to draw than normal
+        palm = np.sqrt(np.square(x[:, MIDDLE_MCP]) + np.square(y[:, MIDDLE_MCP])) * scale
+        amplitude = (np.sqrt(3.0) * augmentation.jitter * palm).astype(np.float32)
+        out = rng.random((n, NUM_LANDMARKS, 3), dtype=np.float32)
+        out -= 0.5
+        out *= 2 * amplitude[:, None, None]
+    else:
+        out = np.zeros((n, NUM_LANDMARKS, 3), dtype=np.float32)
+
+    for axis in range(3):
+        row = matrix[:, axis]
+        out[:, :, axis] += (x * row[:, 0:1] + y * row[:, 1:2] + z * row[:, 2:3]
+                            + offset[:, axis:axis + 1])
+    return out.reshape(n, -1)
+
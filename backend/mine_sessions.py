@@ -0,0 +1,216 @@
+"""
+Mine training features from recorded production sessions.
+
+With ``SESSION_RECORD_DIR`` set, the server saves the landmarks it already
+computed for every validated hand (see ``session_recorder``). Those frames
+come from the real clients: NV21, rotated, against the backgrounds the
+contrast-enhanced detector handles, which the Kaggle images do not cover.
+
+This script reads the recorded parts, drops near-identical consecutive
+frames of the same hand (a held letter produces dozens of them per
+second) and writes the rest to a feature store, keyed by part file and
+row, without running MediaPipe again. Re-running it only adds frames that
+are not in the store yet. The store only holds keys and features, so every
+added frame also gets a line in ``SAMPLES_FILE`` next to it: the session,
+part file and row it came from, its timestamp, the letter the server
+served, handedness, score, frame size and rotation (and the pseudo-label,
+if any), for reviewing, labelling and tracing samples back to a session.
+Optionally, frames that a model classifies with high confidence are written
+with that pseudo-label to a shard set for ``train_streaming.py``.
+
+Usage:
+    python mine_sessions.py sessions
+    python mine_sessions.py sessions --pseudo-label asl_model.npz --export-shards session_shards
+"""
+
+import argparse
+import json
+import os
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from feature_shards import ShardWriter
+from feature_store import FeatureStore
+from hand_features import normalize_landmarks
+from model_registry import load_model_file
+from session_recorder import SESSION_FORMAT_VERSION
+
+# Session features are not comparable with image features (different
+# detector settings and sources), so they live under their own config
+SESSION_STORE_CONFIG = {"source": "session_recordings", "format_version": SESSION_FORMAT_VERSION}
+
+# Sidecar with the provenance of every mined row, one JSON object per line
+SAMPLES_FILE = "session_samples.jsonl"
+
+_PART_NAME = re.compile(r"^(?P<session>.+)-(?P<part>\d{4})\.npz$")
+
+
+def list_sessions(record_dir: str) -> Dict[str, List[str]]:
+    """Part files of every recorded session, in part order."""
+    sessions: Dict[str, List[str]] = defaultdict(list)
+    for name in sorted(os.listdir(record_dir)):
+        match = _PART_NAME.match(name)
+        if match and not name.startswith("."):
+            sessions[match.group("session")].append(os.path.join(record_dir, name))
+    return dict(sessions)
+
+
+def load_session(parts: List[str]) -> Dict[str, np.ndarray]:
+    """Concatenated rows of a session, plus the (part path, row) of each."""
+    columns: Dict[str, List[np.ndarray]] = defaultdict(list)
+    for path in parts:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format_version"]) != SESSION_FORMAT_VERSION:
+                raise ValueError(f"Unsupported session recording format in {path}")
+            for name in ("timestamps", "slots", "points", "handedness", "scores", "letters",
+                         "frame_sizes", "rotations"):
+                columns[name].append(data[name])
+            rows = len(data["timestamps"])
+        columns["part"].append(np.full(rows, len(columns["paths"]), dtype=np.int32))
+        columns["row"].append(np.arange(rows, dtype=np.int32))
+        columns["paths"].append(np.array([path]))
+    return {name: np.concatenate(values) for name, values in columns.items()}
+
+
+def deduplicate(timestamps: np.ndarray, slots: np.ndarray, points: np.ndarray,
+                min_change: float = 0.05, max_gap_s: float = 1.0) -> np.ndarray:
+    """
+    Indices of the frames to keep.
+
+    Frames are compared per hand slot, as wrist-relative, palm-normalized
+    shapes (``hand_features``). A frame is kept when its RMS difference to
+    the last kept frame of its slot exceeds ``min_change`` (palm lengths),
+    or when the slot had no frame for ``max_gap_s`` (the hand was lost and
+    came back).
+    """
+    shapes = normalize_landmarks(points)
+    keep: List[np.ndarray] = []
+    for slot in np.unique(slots):
+        frames = np.flatnonzero(slots == slot)
+        frames = frames[np.argsort(timestamps[frames], kind="stable")]
+        gaps = np.diff(timestamps[frames], prepend=-np.inf) > max_gap_s
+        kept = np.zeros(len(frames), dtype=bool)
+        last = None
+        for i, frame in enumerate(frames):
+            if last is not None and not gaps[i]:
+                delta = shapes[frame] - last
+                if np.sqrt(delta.dot(delta) / delta.size) <= min_change:
+                    continue
+            kept[i] = True
+            last = shapes[frame]
+        keep.append(frames[kept])
+    return np.sort(np.concatenate(keep)) if keep else np.zeros(0, dtype=np.intp)
+
+
+def read_samples(store_dir: str) -> Dict[str, Dict]:
+    """Provenance of the mined rows of ``store_dir``, by store key."""
+    samples: Dict[str, Dict] = {}
+    path = os.path.join(store_dir, SAMPLES_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                sample = json.loads(line)
+                # A re-run after an interrupted flush appends the same key again
+                samples[sample["key"]] = sample
+    return samples
+
+
+def _sample(data: Dict[str, np.ndarray], session: str, key: bytes, i: int) -> Dict:
+    width, height = data["frame_sizes"][i]
+    return {
+        "key": key.decode(),
+        "session": session,
+        "part": os.path.basename(str(data["paths"][data["part"][i]])),
+        "row": int(data["row"][i]),
+        "timestamp": float(data["timestamps"][i]),
+        "slot": int(data["slots"][i]),
+        "letter": str(data["letters"][i]),
+        "handedness": str(data["handedness"][i]),
+        "score": float(data["scores"][i]),
+        "frame_size": [int(width), int(height)],
+        "rotation": int(data["rotations"][i]),
+    }
+
+
+def mine(record_dir: str, store_dir: str, min_change: float = 0.05, max_gap_s: float = 1.0,
+         pseudo_label: Optional[str] = None, min_confidence: float = 0.9,
+         shards_dir: Optional[str] = None) -> Tuple[int, int, int]:
+    """Mine every recorded session; returns (frames read, frames kept, frames added)."""
+    store = FeatureStore(store_dir, SESSION_STORE_CONFIG)
+    model = load_model_file(pseudo_label) if pseudo_label else None
+    if model is not None and not hasattr(model, "predict_proba"):
+        raise SystemExit(f"Pseudo-label model {pseudo_label} ({type(model).__name__}) has no "
+                         "predict_proba; use a model with probability estimates")
+    writer = ShardWriter(shards_dir) if shards_dir and model is not None else None
+
+    os.makedirs(store_dir, exist_ok=True)
+    samples_file = open(os.path.join(store_dir, SAMPLES_FILE), "a")
+    read = kept_total = added = labeled = 0
+    try:
+        for session, parts in list_sessions(record_dir).items():
+            data = load_session(parts)
+            keep = deduplicate(data["timestamps"], data["slots"], data["points"], min_change, max_gap_s)
+            read += len(data["timestamps"])
+            kept_total += len(keep)
+
+            new, samples = [], []
+            for i in keep:
+                key = store.key_for(str(data["paths"][data["part"][i]]), int(data["row"][i]))
+                if key not in store:
+                    new.append(i)
+                    samples.append(_sample(data, session, key, i))
+            added += len(new)
+
+            if model is not None and new:
+                features = data["points"][new].reshape(len(new), -1)
+                probabilities = model.predict_proba(features)
+                confidences = probabilities.max(axis=1)
+                labels = np.asarray(model.classes_)[probabilities.argmax(axis=1)]
+                for sample, label, confidence in zip(samples, labels, confidences):
+                    sample["pseudo_label"] = str(label)
+                    sample["pseudo_label_confidence"] = float(confidence)
+                if writer is not None:
+                    confident = confidences >= min_confidence
+                    writer.add(features[confident], labels[confident])
+                    labeled += int(confident.sum())
+
+            # Provenance first: the store may flush on add, and a stored row
+            # must never lack its sample line
+            for sample in samples:
+                samples_file.write(json.dumps(sample) + "\n")
+            samples_file.flush()
+            for i, sample in zip(new, samples):
+                store.add(sample["key"].encode(), data["points"][i].reshape(-1))
+            print(f"Session {session}: {len(data['timestamps'])} frames, {len(keep)} kept, {len(new)} new")
+    finally:
+        samples_file.close()
+
+    store.flush()
+    if writer is not None:
+        writer.close()
+        print(f"{labeled} frames pseudo-labeled with confidence >= {min_confidence} into {shards_dir}")
+    return read, kept_total, added
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("record_dir", help="SESSION_RECORD_DIR of the server")
+    parser.add_argument("--store", default="session_features",
+                        help="feature store directory (default: session_features)")
+    parser.add_argument("--min-change", type=float, default=0.05,
+                        help="RMS shape change (palm lengths) that makes a frame new (default: 0.05)")
+    parser.add_argument("--max-gap-s", type=float, default=1.0,
+                        help="keep the first frame after a gap this long (default: 1.0)")
+    parser.add_argument("--pseudo-label", help="model (.npz export, directory or pickle) used to label frames")
+    parser.add_argument("--min-confidence", type=float, default=0.9,
+                        help="minimum probability of a pseudo-label (default: 0.9)")
+    parser.add_argument("--export-shards", help="with --pseudo-label: append labeled frames to this shard set")
+    args = parser.parse_args()
+    if args.export_shards and not args.pseudo_label:
+        parser.error("--export-shards needs --pseudo-label")
+    read, kept, added = mine(args.record_dir, args.store, args.min_change, args.max_gap_s,
+                             args.pseudo_label, args.min_confidence, args.export_shards)
+    print(f"{read} frames read, {kept} kept after deduplication, {added} added to {args.store}")
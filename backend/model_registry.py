@@ -0,0 +1,218 @@
+"""
+Hot-reloadable registry for the ASL letter classifier.
+
+Layout of the model directory::
+
+    models/
+        canary.npz           # optional: "features" and expected "labels"
+        20261019-120000/     # one directory per version
+            weights.npy  intercept.npy  classes.npy  model.json
+
+Versions are ordered by directory name, with digit runs compared as
+numbers (``publish`` suffixes ``-2`` < ``-10``), and the newest one that
+passes validation is served. Rolling back is removing the bad version's directory.
+``publish`` writes a version into a hidden temporary directory and renames
+it into place, so the watcher never sees a half-written model.
+
+A candidate is validated before it is swapped in: it must accept the same
+number of features as the model being served (at startup, the model the
+server loaded on its own, if any) and, if ``canary.npz``
+exists, reach ``min_canary_accuracy`` on it. Sessions read
+``registry.model`` on every prediction, so the swap is a single reference
+assignment and in-flight predictions finish on the old version.
+
+Weights are memory-mapped read-only, so every worker process serving the
+same version shares one resident copy through the page cache.
+
+Usage:
+    python model_registry.py publish asl_model.npz models
+"""
+
+import os
+import pickle
+import re
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from asl_classifier import MODEL_METADATA_FILE, LinearClassifier, export_linear_model_dir
+
+CANARY_FILE = "canary.npz"
+
+_DIGITS = re.compile(r"(\d+)")
+
+
+def _version_key(name: str) -> List[Any]:
+    # Text and digit runs alternate (starting with text), so keys always compare
+    return [int(part) if i % 2 else part for i, part in enumerate(_DIGITS.split(name))]
+
+
+def list_versions(root: str) -> List[str]:
+    """Complete versions under ``root``, oldest first."""
+    try:
+        entries = os.listdir(root)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        (name for name in entries
+         if not name.startswith(".") and os.path.isfile(os.path.join(root, name, MODEL_METADATA_FILE))),
+        key=_version_key,
+    )
+
+
+def publish(model: Any, root: str, version: Optional[str] = None) -> str:
+    """Atomically add ``model`` to the registry at ``root``; returns the version."""
+    os.makedirs(root, exist_ok=True)
+    version = version or time.strftime("%Y%m%d-%H%M%S")
+    base, suffix = version, 1
+    while os.path.exists(os.path.join(root, version)):
+        version = f"{base}-{suffix}"
+        suffix += 1
+
+    staging = os.path.join(root, f".tmp-{version}-{os.getpid()}")
+    export_linear_model_dir(model, staging)
+    os.rename(staging, os.path.join(root, version))
+    return version
+
+
+def write_canary(root: str, features: np.ndarray, labels: np.ndarray) -> None:
+    """Store the canary feature set used to validate new versions."""
+    os.makedirs(root, exist_ok=True)
+    staging = os.path.join(root, f".tmp-canary-{os.getpid()}.npz")
+    np.savez(staging, features=np.asarray(features, dtype=np.float32), labels=np.asarray(labels).astype(str))
+    os.replace(staging, os.path.join(root, CANARY_FILE))
+
+
+class ModelRegistry:
+    """
+    Serves the newest valid model version and reloads it when it changes.
+
+    ``initial_model`` is the model the caller already serves without the
+    registry (e.g. loaded from ``asl_model.npz``); the first version is
+    validated against it.
+    """
+
+    def __init__(self, root: str, poll_interval_s: float = 2.0, min_canary_accuracy: float = 0.9,
+                 on_swap: Optional[Callable[[Any], None]] = None, initial_model: Optional[Any] = None):
+        self.root = root
+        self.poll_interval_s = poll_interval_s
+        self.min_canary_accuracy = min_canary_accuracy
+        self.on_swap = on_swap
+
+        self.model: Optional[Any] = initial_model
+        self.version: Optional[str] = None
+        self.reloads = 0
+        self.rejections = 0
+        self._rejected = set()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def validate(self, model: LinearClassifier) -> Optional[str]:
+        """Reason to reject ``model``, or None if it can be served."""
+        serving_features = getattr(self.model, "n_features_in_", None)
+        if serving_features is not None and model.n_features_in_ != serving_features:
+            return f"expects {model.n_features_in_} features, serving model expects {serving_features}"
+
+        canary_path = os.path.join(self.root, CANARY_FILE)
+        if not os.path.exists(canary_path):
+            # No canary: only check that the model runs and returns its classes
+            predictions = model.predict(np.zeros((4, model.n_features_in_), dtype=np.float32))
+            if not np.isin(predictions, model.classes_).all():
+                return "predictions outside the model classes"
+            return None
+
+        with np.load(canary_path, allow_pickle=False) as canary:
+            features, labels = canary["features"], canary["labels"]
+        if features.shape[1] != model.n_features_in_:
+            return f"expects {model.n_features_in_} features, canary has {features.shape[1]}"
+        accuracy = float(np.mean(model.predict(features) == labels))
+        if accuracy < self.min_canary_accuracy:
+            return f"canary accuracy {accuracy:.3f} < {self.min_canary_accuracy:.3f}"
+        return None
+
+    def refresh(self) -> bool:
+        """Swap in the newest valid version if it differs from the served one."""
+        with self._refresh_lock:
+            for version in reversed(list_versions(self.root)):
+                if version in self._rejected:
+                    continue
+                if version == self.version:
+                    return False
+                try:
+                    candidate = LinearClassifier.load_dir(os.path.join(self.root, version))
+                    reason = self.validate(candidate)
+                except Exception as e:
+                    reason = str(e)
+                if reason is not None:
+                    print(f"Model version {version} rejected: {reason}")
+                    self._rejected.add(version)
+                    self.rejections += 1
+                    continue
+
+                self.model, self.version = candidate, version
+                self.reloads += 1
+                print(f"ASL model version {version} loaded from {self.root}")
+                if self.on_swap is not None:
+                    self.on_swap(candidate)
+                return True
+            return False
+
+    def start(self) -> None:
+        """Load the current version and watch ``root`` for new ones."""
+        self.refresh()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+            self._thread.start()
+
+    def _watch(self) -> None:
+        last_mtime = None
+        while not self._stop.wait(self.poll_interval_s):
+            try:
+                mtime = os.stat(self.root).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            # Adding (rename) or removing a version changes the directory mtime
+            if mtime != last_mtime:
+                last_mtime = mtime
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Error refreshing model registry: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model_version": self.version or "",
+            "model_reloads": int(self.reloads),
+            "model_rejections": int(self.rejections),
+        }
+
+
+def load_model_file(path: str) -> Any:
+    """Load a model from a .npz export, an exported directory or a pickle."""
+    if os.path.isdir(path):
+        return LinearClassifier.load_dir(path, mmap=False)
+    if path.endswith(".npz"):
+        return LinearClassifier.load(path)
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def main(argv: List[str]) -> None:
+    if len(argv) != 3 or argv[0] != "publish":
+        print("Usage: python model_registry.py publish asl_model.npz models")
+        sys.exit(1)
+    version = publish(load_model_file(argv[1]), argv[2])
+    print(f"Model published as version {version} in {argv[2]}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,194 @@
+"""
+Model-family and hyperparameter search for the ASL letter classifier.
+
+Every candidate is a (feature normalization, classifier) pair. Candidates
+are cross-validated in a process pool and refitted on all rows. Once the
+pool has shut down, every candidate is timed one row at a time in the idle
+parent process, the way the server calls the model once per hand per
+frame. Logistic regression candidates are timed as the NumPy
+``LinearClassifier`` the server would load; the others as their
+scikit-learn pipeline, which is what the server would unpickle.
+
+The selected model is the most accurate one whose median single-row
+latency fits the budget.
+"""
+
+import multiprocessing
+import pickle
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.model_selection import StratifiedKFold
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.neural_network import MLPClassifier
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import FunctionTransformer, StandardScaler
+from sklearn.svm import LinearSVC
+
+from asl_classifier import LinearClassifier, model_probability_mode
+from hand_features import feature_transform_name, normalize_landmarks
+
+# Default single-row latency budget for the per-frame path (microseconds)
+DEFAULT_LATENCY_BUDGET_US = 200.0
+
+
+# Preprocessing steps of each normalization (see hand_features)
+NORMALIZATIONS: Dict[str, Callable[[], List[Any]]] = {
+    "raw": lambda: [],
+    "standard": lambda: [StandardScaler()],
+    "hand": lambda: [FunctionTransformer(normalize_landmarks)],
+    "hand_standard": lambda: [FunctionTransformer(normalize_landmarks), StandardScaler()],
+}
+
+CLASSIFIERS: Dict[str, Callable[[], Any]] = {
+    "logreg_C0.1": lambda: LogisticRegression(C=0.1, max_iter=1000),
+    "logreg_C1": lambda: LogisticRegression(C=1.0, max_iter=1000),
+    "logreg_C10": lambda: LogisticRegression(C=10.0, max_iter=1000),
+    "linear_svm_C1": lambda: LinearSVC(C=1.0),
+    "knn_5": lambda: KNeighborsClassifier(n_neighbors=5),
+    "mlp_64": lambda: MLPClassifier(hidden_layer_sizes=(64,), max_iter=300, random_state=0),
+}
+
+
+def build_candidate(normalization: str, classifier: str) -> Any:
+    """Unfitted estimator for a (normalization, classifier) pair."""
+    steps = NORMALIZATIONS[normalization]()
+    estimator = CLASSIFIERS[classifier]()
+    return make_pipeline(*steps, estimator) if steps else estimator
+
+
+def as_linear_classifier(model: Any) -> Optional[LinearClassifier]:
+    """
+    NumPy LinearClassifier equivalent of ``model`` if it is a logistic
+    regression (or a logistic-loss SGDClassifier, as train_streaming
+    saves), optionally after an exportable feature transform and a
+    StandardScaler; None otherwise.
+
+    LinearSVC is linear too, but has no predict_proba: exported, its
+    probabilities would be uncalibrated sigmoids of the margins, which the
+    pseudo-labeling confidence threshold would take at face value.
+    """
+    steps = [step for _, step in model.steps] if isinstance(model, Pipeline) else [model]
+    model = steps.pop()
+    feature_transform, scaler = "raw", None
+    if steps and isinstance(steps[0], FunctionTransformer):
+        try:
+            feature_transform = feature_transform_name(steps.pop(0).func)
+        except ValueError:
+            return None
+    if steps and isinstance(steps[0], StandardScaler):
+        scaler = steps.pop(0)
+    logistic = isinstance(model, LogisticRegression) or (
+        isinstance(model, SGDClassifier) and model.loss == "log_loss"
+    )
+    if steps or not logistic:
+        return None
+    coef = np.asarray(model.coef_, dtype=np.float64)
+    intercept = np.asarray(model.intercept_, dtype=np.float64)
+    if scaler is not None:
+        # w . (x - mean) / scale + b  ==  (w / scale) . x + (b - (w / scale) . mean)
+        coef = coef / scaler.scale_
+        intercept = intercept - coef @ scaler.mean_
+    return LinearClassifier(coef, intercept, model.classes_, model_probability_mode(model), feature_transform)
+
+
+# --- Worker process state (set once per worker by _init_worker) ---
+_X: Optional[np.ndarray] = None
+_y: Optional[np.ndarray] = None
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray) -> None:
+    global _X, _y
+    _X, _y = X, y
+    warnings.simplefilter("ignore")
+
+
+def _score_fold(normalization: str, classifier: str, train: np.ndarray, test: np.ndarray) -> float:
+    model = build_candidate(normalization, classifier)
+    model.fit(_X[train], _y[train])
+    return float(np.mean(model.predict(_X[test]) == _y[test]))
+
+
+def _fit_full(normalization: str, classifier: str) -> bytes:
+    model = build_candidate(normalization, classifier)
+    model.fit(_X, _y)
+    return pickle.dumps(model)
+
+
+def single_row_latency_us(model: Any, X: np.ndarray, repeats: int = 300) -> float:
+    """Median latency of ``predict`` on one (1, n_features) float32 row."""
+    rows = np.ascontiguousarray(X[:repeats], dtype=np.float32)
+    model.predict(rows[:1])
+    samples = []
+    for i in range(repeats):
+        row = rows[i % len(rows)][None, :]
+        start = time.perf_counter()
+        model.predict(row)
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples) * 1e6)
+
+
+def search(X: np.ndarray, y: np.ndarray, candidates: Optional[Sequence[Tuple[str, str]]] = None,
+           folds: int = 3, workers: int = 1, latency_budget_us: float = DEFAULT_LATENCY_BUDGET_US,
+           seed: int = 0) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Cross-validate, refit and time every candidate.
+
+    Returns the report rows (sorted by accuracy) and the selected row, or
+    None if no candidate fits the latency budget. Each row holds the model
+    refitted on all rows in ``model`` and, for linear candidates, its NumPy
+    equivalent in ``linear``.
+    """
+    if candidates is None:
+        candidates = [(n, c) for n in NORMALIZATIONS for c in CLASSIFIERS]
+    splits = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed).split(X, y))
+
+    # spawn: the caller may already have run MediaPipe in this process
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(X, y)) as pool:
+        fold_futures = {
+            candidate: [pool.submit(_score_fold, *candidate, train, test) for train, test in splits]
+            for candidate in candidates
+        }
+        fit_futures = {candidate: pool.submit(_fit_full, *candidate) for candidate in candidates}
+        scores = {candidate: [future.result() for future in fold_futures[candidate]] for candidate in candidates}
+        models = {candidate: fit_futures[candidate].result() for candidate in candidates}
+
+    # Timed only after the pool has shut down, so that the latency (and the
+    # budget check) does not depend on the cross-validation load
+    report = []
+    for candidate in candidates:
+        normalization, classifier = candidate
+        model = pickle.loads(models[candidate])
+        linear = as_linear_classifier(model)
+        report.append({
+            "normalization": normalization,
+            "classifier": classifier,
+            "cv_accuracy": float(np.mean(scores[candidate])),
+            "cv_std": float(np.std(scores[candidate])),
+            "latency_us": single_row_latency_us(linear or model, X),
+            "model": model,
+            "linear": linear,
+        })
+
+    report.sort(key=lambda row: row["cv_accuracy"], reverse=True)
+    within_budget = [row for row in report if row["latency_us"] <= latency_budget_us]
+    return report, (within_budget[0] if within_budget else None)
+
+
+def print_report(report: List[Dict[str, Any]], selected: Optional[Dict[str, Any]],
+                 latency_budget_us: float) -> None:
+    print(f"{'normalization':<14}{'classifier':<16}{'cv accuracy':>14}{'latency (us)':>14}  export")
+    for row in report:
+        marker = " <- selected" if row is selected else ""
+        over = " (over budget)" if row["latency_us"] > latency_budget_us else ""
+        print(f"{row['normalization']:<14}{row['classifier']:<16}"
+              f"{row['cv_accuracy']:>9.4f}±{row['cv_std']:.3f}{row['latency_us']:>14.1f}  "
+              f"{'npz' if row['linear'] is not None else 'pickle'}{over}{marker}")
+    if selected is None:
+        print(f"No candidate fits the {latency_budget_us:.0f} us latency budget")
@@ -0,0 +1,90 @@
+"""
+Caché de predicción de letra por sesión.
+
+Mientras el usuario mantiene una letra la pose apenas cambia y el
+clasificador devuelve lo mismo fotograma tras fotograma. La caché guarda la
+forma normalizada de la mano (independiente de posición y escala) y la
+última predicción; si la forma nueva está dentro de la tolerancia se
+reutiliza la predicción sin llamar al modelo. Pasado ``max_age_s`` se
+vuelve a predecir siempre, para no arrastrar un error indefinidamente.
+"""
+
+import math
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+
+from hand_observation import HandObservation
+
+
+class PredictionCache:
+    """
+    Reutiliza la última predicción si la pose no ha cambiado
+
+    - tolerance: diferencia RMS máxima entre formas normalizadas (unidades
+      de tamaño de mano) para reutilizar la predicción
+    - max_age_s: antigüedad máxima de una predicción reutilizada
+    """
+
+    def __init__(self, tolerance: float = 0.1, max_age_s: float = 0.5):
+        self.tolerance = tolerance
+        self.max_age_s = max_age_s
+
+        self._pose: Optional[np.ndarray] = None
+        self._prediction = ""
+        self._predicted_at = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.predict_ms: Optional[float] = None  # EMA del coste del modelo
+
+    def predict(self, hand: HandObservation, predict_fn: Callable[[HandObservation], str],
+                now: Optional[float] = None) -> str:
+        """Predicción de ``hand``: cacheada si la pose no ha cambiado"""
+        now = time.monotonic() if now is None else now
+        pose = hand.normalized_pose()
+
+        if self._pose is not None and now - self._predicted_at <= self.max_age_s:
+            delta = (pose - self._pose).ravel()
+            if math.sqrt(float(delta.dot(delta)) / delta.size) <= self.tolerance:
+                self.hits += 1
+                return self._prediction
+
+        start = time.perf_counter()
+        prediction = predict_fn(hand)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.predict_ms = elapsed_ms if self.predict_ms is None else 0.8 * self.predict_ms + 0.2 * elapsed_ms
+        self.misses += 1
+
+        self._pose = pose
+        self._prediction = prediction
+        self._predicted_at = now
+        return prediction
+
+    def reset(self):
+        """Olvida la última predicción (p. ej. al perder la mano)"""
+        self._pose = None
+
+    def stats(self) -> Dict[str, float]:
+        """Tasa de acierto y tiempo de clasificador ahorrado (estimado)"""
+        total = self.hits + self.misses
+        return {
+            "prediction_cache_hit_rate": float(self.hits / total) if total else 0.0,
+            "prediction_time_saved_ms": float(self.hits * (self.predict_ms or 0.0)),
+        }
+
+
+def combined_stats(caches: Iterable[PredictionCache]) -> Dict[str, float]:
+    """``stats`` de varias cachés (una por mano de la sesión) sumando aciertos y fallos"""
+    hits = misses = 0
+    saved_ms = 0.0
+    for cache in caches:
+        hits += cache.hits
+        misses += cache.misses
+        saved_ms += cache.hits * (cache.predict_ms or 0.0)
+    total = hits + misses
+    return {
+        "prediction_cache_hit_rate": float(hits / total) if total else 0.0,
+        "prediction_time_saved_ms": float(saved_ms),
+    }
@@ -0,0 +1,136 @@
+"""
+Grabación de landmarks de las sesiones de producción.
+
+El servidor ya paga MediaPipe (y el realce de contraste) por cada
+fotograma de los clientes Android; guardar los 21 landmarks que obtuvo
+cuesta 252 bytes por mano y permite reutilizarlos como datos de
+entrenamiento (ver ``mine_sessions.py``) sin volver a procesar imágenes.
+No se guardan píxeles.
+
+Cada sesión escribe partes ``<sesión>-NNNN.npz`` en el directorio de
+grabación cada ``flush_every`` manos y al cerrarse. El bucle de la sesión
+solo entrega las filas pendientes a un único hilo de escritura compartido
+por todas las sesiones, que arma los arrays y escribe la parte sin parar el
+fotograma. Cada parte se escribe en un fichero temporal oculto y se
+renombra, así que un lector nunca ve una parte a medias.
+
+Contenido de cada parte (una fila por mano validada):
+    timestamps (n,) float64, slots (n,) int16 (posición de la mano en el
+    fotograma), points (n, 21, 3) float32 crudos, handedness (n,) str,
+    scores (n,) float32, letters (n,) str (predicción servida),
+    frame_sizes (n, 2) int32 y rotations (n,) int16
+"""
+
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+import numpy as np
+
+from hand_observation import HandObservation
+
+SESSION_FORMAT_VERSION = 1
+
+
+def _write_part(directory: str, name: str, rows: List[tuple]) -> None:
+    """Escribe ``rows`` como la parte ``name`` (temporal oculto + renombrado)"""
+    timestamps, slots, points, handedness, scores, letters, widths, heights, rotations = zip(*rows)
+    os.makedirs(directory, exist_ok=True)
+    staging = os.path.join(directory, f".tmp-{name}")
+    np.savez(
+        staging,
+        format_version=np.int32(SESSION_FORMAT_VERSION),
+        timestamps=np.array(timestamps, dtype=np.float64),
+        slots=np.array(slots, dtype=np.int16),
+        points=np.stack(points).astype(np.float32),
+        handedness=np.array(handedness).astype(str),
+        scores=np.array(scores, dtype=np.float32),
+        letters=np.array(letters).astype(str),
+        frame_sizes=np.stack([widths, heights], axis=1).astype(np.int32),
+        rotations=np.array(rotations, dtype=np.int16),
+    )
+    os.replace(staging, os.path.join(directory, name))
+
+
+class _PartWriter:
+    """Hilo único que escribe las partes de todas las sesiones en orden de llegada"""
+
+    def __init__(self):
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name="session-recorder", daemon=True)
+        self._thread.start()
+
+    def submit(self, directory: str, name: str, rows: List[tuple]) -> threading.Event:
+        """Encola una parte; el evento se activa cuando está escrita (o ha fallado)"""
+        done = threading.Event()
+        self._queue.put((directory, name, rows, done))
+        return done
+
+    def _run(self):
+        while True:
+            directory, name, rows, done = self._queue.get()
+            try:
+                _write_part(directory, name, rows)
+            except Exception as e:
+                # Una parte perdida no debe tirar la sesión ni el servidor
+                self.errors += 1
+                print(f"Error writing session recording {name}: {e}")
+            finally:
+                done.set()
+
+
+_writer: Optional[_PartWriter] = None
+_writer_lock = threading.Lock()
+
+
+def _part_writer() -> _PartWriter:
+    """Hilo de escritura compartido, creado con la primera parte"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _PartWriter()
+        return _writer
+
+
+class SessionRecorder:
+    """Acumula las manos de una sesión y las escribe por partes"""
+
+    def __init__(self, directory: str, flush_every: int = 512):
+        self.directory = directory
+        self.flush_every = flush_every
+        self.session_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.recorded = 0
+        self._parts = 0
+        self._rows: List[tuple] = []
+        self._pending: List[threading.Event] = []
+
+    def record(self, timestamp: float, slot: int, hand: HandObservation, letter: str,
+               width: int, height: int, rotation: int = 0) -> None:
+        """Añade una mano (landmarks crudos, sin filtro temporal)"""
+        self._rows.append((timestamp, slot, hand.points.copy(), hand.handedness, hand.score,
+                           letter, width, height, rotation))
+        if len(self._rows) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Entrega las manos pendientes al hilo de escritura como una parte nueva"""
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+        name = f"{self.session_id}-{self._parts:04d}.npz"
+        self._pending = [done for done in self._pending if not done.is_set()]
+        self._pending.append(_part_writer().submit(self.directory, name, rows))
+        self._parts += 1
+        self.recorded += len(rows)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Entrega lo pendiente y espera a que las partes de la sesión estén escritas"""
+        self.flush()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for done in self._pending:
+            done.wait(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        self._pending = []
@@ -0,0 +1,179 @@
+"""
+Etapa de suavizado con preservación de bordes intercambiable.
+
+Sustituye a la llamada fija ``cv2.bilateralFilter(img, 9, 75, 75)`` sobre el
+fotograma RGB completo por varios modos de coste decreciente. Cada modo tiene
+un modelo de coste (ms por megapíxel), sembrado con valores de referencia y
+refinado con las mediciones reales, de forma que ``select_mode`` puede elegir
+el de mayor fidelidad que quepa en el presupuesto de tiempo del detector.
+"""
+
+import time
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from image_ops import downscale
+
+# Modos ordenados de mayor a menor fidelidad respecto al bilateral completo
+# (PSNR medio sobre los fondos sintéticos, ver benchmark_smoothing.py). Cada
+# modo es más barato que el anterior: uno más caro y menos fiel que otro
+# nunca se elegiría por presupuesto
+SMOOTHING_MODES = ("bilateral", "guided", "bilateral_half")
+
+# Coste inicial por modo en ms por megapíxel (fondo texturizado 640x480 en un
+# núcleo, ver benchmark_smoothing.py). Solo siembra la EMA: las mediciones
+# reales lo sustituyen en pocos fotogramas, sin calibrar en la ruta del frame
+DEFAULT_COST_MS_PER_MPX = {
+    "bilateral": 180.0,
+    "guided": 22.0,
+    "bilateral_half": 6.0,
+}
+
+# Cada cuántas llamadas con presupuesto se vuelve a medir un modo de mayor
+# fidelidad que el elegido, para que su estimación pueda recuperarse
+PROBE_INTERVAL = 120
+
+
+def bilateral_full(image_rgb: np.ndarray, d: int, sigma: float) -> np.ndarray:
+    """Bilateral original a resolución completa"""
+    return cv2.bilateralFilter(image_rgb, d, sigma, sigma)
+
+
+def bilateral_half(image_rgb: np.ndarray, d: int, sigma: float) -> np.ndarray:
+    """Bilateral a media escala (diámetro y sigma espacial escalados) y subida lineal"""
+    height, width = image_rgb.shape[:2]
+    small = downscale(image_rgb, 0.5)
+    half_d = max(3, (d // 2) | 1)
+    smoothed = cv2.bilateralFilter(small, half_d, sigma, sigma / 2.0)
+    return cv2.resize(smoothed, (width, height), interpolation=cv2.INTER_LINEAR)
+
+
+def guided_luminance(image_rgb: np.ndarray, d: int, sigma: float) -> np.ndarray:
+    """
+    Filtro guiado (guía = propio canal) aplicado solo sobre la luminancia.
+
+    Se usa la Y de YCrCb en lugar de L* de L*a*b*: la conversión es mucho
+    más barata y la crominancia queda intacta igualmente.
+    """
+    ycrcb = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2YCrCb)
+    luma = ycrcb[:, :, 0].astype(np.float32)
+
+    ksize = (d, d)
+    eps = (sigma / 2.0) ** 2
+    mean_i = cv2.boxFilter(luma, -1, ksize)
+    var_i = cv2.boxFilter(cv2.multiply(luma, luma), -1, ksize) - cv2.multiply(mean_i, mean_i)
+    a = cv2.divide(var_i, var_i + eps)
+    b = mean_i - cv2.multiply(a, mean_i)
+    smoothed = cv2.multiply(cv2.boxFilter(a, -1, ksize), luma) + cv2.boxFilter(b, -1, ksize)
+
+    ycrcb[:, :, 0] = cv2.convertScaleAbs(smoothed)
+    return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2RGB)
+
+
+_MODE_FUNCTIONS = {
+    "bilateral": bilateral_full,
+    "guided": guided_luminance,
+    "bilateral_half": bilateral_half,
+}
+
+
+class EdgePreservingSmoother:
+    """
+    Suavizado con preservación de bordes con selección de modo por presupuesto
+
+    mode="auto" elige en cada llamada el modo de mayor fidelidad cuyo coste
+    previsto cabe en ``budget_ms``; cualquier otro valor de SMOOTHING_MODES
+    fuerza ese modo.
+
+    Solo se mide el modo que se ejecuta, así que un modo descartado por una
+    medición lenta no volvería a medirse nunca: cada ``probe_interval``
+    llamadas se ejecuta en su lugar el modo de mayor fidelidad que el elegido
+    cuyo coste de referencia (DEFAULT_COST_MS_PER_MPX) cabe en el
+    presupuesto, y su estimación se actualiza con esa medición. Los modos
+    que ni con su coste de referencia caben no se prueban nunca.
+    """
+
+    def __init__(self, mode: str = "auto", budget_ms: Optional[float] = None,
+                 probe_interval: int = PROBE_INTERVAL):
+        if mode != "auto" and mode not in _MODE_FUNCTIONS:
+            raise ValueError(f"Modo de suavizado desconocido: {mode}")
+        self.mode = mode
+        self.budget_ms = budget_ms
+        # Coste por modo en ms por megapíxel
+        self.cost_ms_per_mpx: Dict[str, float] = dict(DEFAULT_COST_MS_PER_MPX)
+        self.cost_smoothing = 0.2  # Peso EMA de las mediciones en producción
+        self.probe_interval = probe_interval
+        self._calls_since_probe = 0
+        self.last_mode = None
+
+    def calibrate(self, image_rgb: np.ndarray, d: int = 9, sigma: float = 75,
+                  repeats: int = 3) -> Dict[str, float]:
+        """Mide el coste de cada modo sobre ``image_rgb`` (mediana de ``repeats``)"""
+        megapixels = image_rgb.shape[0] * image_rgb.shape[1] / 1e6
+        for mode, fn in _MODE_FUNCTIONS.items():
+            samples = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                fn(image_rgb, d, sigma)
+                samples.append((time.perf_counter() - start) * 1000)
+            self.cost_ms_per_mpx[mode] = float(np.median(samples)) / megapixels
+        return dict(self.cost_ms_per_mpx)
+
+    def predict_cost_ms(self, mode: str, shape: Tuple[int, ...]) -> float:
+        """Coste previsto de ``mode`` para una imagen de forma ``shape``"""
+        return self.cost_ms_per_mpx[mode] * shape[0] * shape[1] / 1e6
+
+    def select_mode(self, shape: Tuple[int, ...], budget_ms: Optional[float]) -> str:
+        """Modo de mayor fidelidad que cabe en el presupuesto, o el más barato"""
+        if budget_ms is None:
+            return SMOOTHING_MODES[0]
+        for mode in SMOOTHING_MODES:
+            if self.predict_cost_ms(mode, shape) <= budget_ms:
+                return mode
+        return min(SMOOTHING_MODES, key=lambda m: self.cost_ms_per_mpx[m])
+
+    def _probe_mode(self, mode: str, shape: Tuple[int, ...], budget_ms: float) -> str:
+        """``mode`` o, una vez cada ``probe_interval`` llamadas, uno de fidelidad superior"""
+        if self.probe_interval <= 0:
+            return mode
+        megapixels = shape[0] * shape[1] / 1e6
+        # De más cercano a más lejano en fidelidad; solo los que caben en el
+        # presupuesto con su coste de referencia
+        candidates = [
+            candidate for candidate in reversed(SMOOTHING_MODES[:SMOOTHING_MODES.index(mode)])
+            if DEFAULT_COST_MS_PER_MPX[candidate] * megapixels <= budget_ms
+        ]
+        if not candidates:
+            return mode
+        self._calls_since_probe += 1
+        if self._calls_since_probe < self.probe_interval:
+            return mode
+        self._calls_since_probe = 0
+        return candidates[0]
+
+    def smooth(self, image_rgb: np.ndarray, d: int = 9, sigma: float = 75,
+               budget_ms: Optional[float] = None) -> np.ndarray:
+        """Aplica el suavizado con el modo fijo o el elegido por presupuesto"""
+        if budget_ms is None:
+            budget_ms = self.budget_ms
+
+        if self.mode != "auto":
+            mode = self.mode
+        else:
+            mode = self.select_mode(image_rgb.shape, budget_ms)
+            if budget_ms is not None:
+                mode = self._probe_mode(mode, image_rgb.shape, budget_ms)
+
+        start = time.perf_counter()
+        result = _MODE_FUNCTIONS[mode](image_rgb, d, sigma)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        # Actualizar el modelo de coste con la medición real
+        megapixels = image_rgb.shape[0] * image_rgb.shape[1] / 1e6
+        measured = elapsed_ms / megapixels
+        previous = self.cost_ms_per_mpx[mode]
+        self.cost_ms_per_mpx[mode] = (1 - self.cost_smoothing) * previous + self.cost_smoothing * measured
+        self.last_mode = mode
+        return result
@@ -0,0 +1,163 @@
+"""
+Filtrado temporal de landmarks por sesión.
+
+Dos filtros sobre arrays (21, 3) float32, sin bucles en Python por
+landmark:
+
+- ``TemporalLandmarkFilter``: media ponderada por confianza de las últimas
+  ``window_size`` detecciones, guardadas en un buffer circular de tamaño
+  fijo (window, 21, 3).
+- ``OneEuroFilter``: filtro adaptativo One-Euro (Casiez et al., 2012);
+  suaviza mucho cuando la mano está quieta y poco cuando se mueve rápido,
+  con menos retardo que una media de ventana.
+
+Cada conexión WebSocket crea sus propios filtros: el historial de un
+cliente nunca se mezcla con el de otro.
+"""
+
+import math
+import time
+from typing import Optional
+
+import numpy as np
+
+from hand_observation import NUM_LANDMARKS
+
+
+class OneEuroFilter:
+    """
+    Filtro One-Euro vectorizado para un array de landmarks
+
+    - min_cutoff: frecuencia de corte (Hz) con la mano quieta; menor = más suave
+    - beta: cuánto sube el corte con la velocidad; mayor = menos retardo
+    - d_cutoff: corte del filtro de la derivada
+    """
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 10.0, d_cutoff: float = 1.0,
+                 shape=(NUM_LANDMARKS, 3)):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self._x = np.zeros(shape, dtype=np.float32)
+        self._dx = np.zeros(shape, dtype=np.float32)
+        self._t: Optional[float] = None
+
+    @staticmethod
+    def _alpha(cutoff, dt: float):
+        """Factor de suavizado exponencial para un corte y un intervalo"""
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def reset(self):
+        self._t = None
+
+    def __call__(self, x: np.ndarray, timestamp: float) -> np.ndarray:
+        """Filtra ``x`` (mismo shape que el filtro) tomada en ``timestamp`` (s)"""
+        if self._t is None or timestamp <= self._t:
+            self._x[...] = x
+            self._dx.fill(0.0)
+            self._t = timestamp
+            return self._x.copy()
+
+        dt = timestamp - self._t
+        self._t = timestamp
+
+        # Derivada suavizada
+        dx = (x - self._x) / dt
+        self._dx += self._alpha(self.d_cutoff, dt) * (dx - self._dx)
+
+        # Corte adaptativo por coordenada según la velocidad
+        cutoff = self.min_cutoff + self.beta * np.abs(self._dx)
+        alpha = 1.0 / (1.0 + 1.0 / (2.0 * math.pi * cutoff * dt))
+        self._x += alpha * (x - self._x)
+        return self._x.copy()
+
+
+class TemporalLandmarkFilter:
+    """
+    Media ponderada por confianza sobre un buffer circular de detecciones
+
+    Mantiene la interfaz del filtro anterior (add_detection,
+    get_filtered_landmarks, should_use_detection). Si entre dos detecciones
+    pasan más de ``max_gap_s`` segundos se vacía el historial, para no
+    promediar con una mano que ya no está ahí. Con ``one_euro`` el resultado
+    es la salida del filtro One-Euro en lugar de la media de ventana.
+    """
+
+    def __init__(self, window_size: int = 3, confidence_threshold: float = 0.7,
+                 max_gap_s: float = 0.5, one_euro: Optional[OneEuroFilter] = None):
+        self.window_size = window_size
+        self.confidence_threshold = confidence_threshold
+        self.max_gap_s = max_gap_s
+        self.one_euro = one_euro
+
+        self._points = np.zeros((window_size, NUM_LANDMARKS, 3), dtype=np.float32)
+        self._confidence = np.zeros(window_size, dtype=np.float64)
+        self._head = 0   # Próxima posición a escribir
+        self._count = 0  # Detecciones válidas en el buffer
+        self._last_time: Optional[float] = None
+        self._smoothed: Optional[np.ndarray] = None
+
+    def reset(self):
+        """Vacía el historial (p. ej. al perder la mano)"""
+        self._confidence.fill(0.0)
+        self._head = 0
+        self._count = 0
+        self._smoothed = None
+        if self.one_euro is not None:
+            self.one_euro.reset()
+
+    def add_detection(self, landmarks, confidence: float, timestamp: Optional[float] = None):
+        """Agregar nueva detección (21, 3) al historial"""
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        if self._last_time is not None and timestamp - self._last_time > self.max_gap_s:
+            self.reset()
+        self._last_time = timestamp
+
+        self._points[self._head] = landmarks
+        self._confidence[self._head] = confidence
+        latest = self._points[self._head]
+        self._head = (self._head + 1) % self.window_size
+        self._count = min(self._count + 1, self.window_size)
+
+        if self.one_euro is not None:
+            self._smoothed = self.one_euro(latest, timestamp)
+
+    def _latest(self) -> np.ndarray:
+        return self._points[(self._head - 1) % self.window_size]
+
+    def get_filtered_landmarks(self) -> Optional[np.ndarray]:
+        """Landmarks (21, 3) filtrados temporalmente"""
+        if not self._count:
+            return None
+        if self.one_euro is not None:
+            return self._smoothed
+
+        # Si tenemos pocas detecciones, usar la más reciente
+        if self._count < 2:
+            return self._latest().copy()
+
+        # Promedio ponderado por confianza (las posiciones vacías pesan 0)
+        total_weight = self._confidence.sum()
+        if total_weight == 0:
+            return self._latest().copy()
+        weights = self._confidence / total_weight
+        return np.tensordot(weights, self._points, axes=1).astype(np.float32)
+
+    def should_use_detection(self) -> bool:
+        """Determinar si usar la detección actual basado en confianza histórica"""
+        if not self._count:
+            return True
+        last = (self._head - 1) % self.window_size
+        if self._count >= 2:
+            recent_confidence = (self._confidence[last] + self._confidence[last - 1]) / 2
+        else:
+            recent_confidence = self._confidence[last]
+        return recent_confidence >= self.confidence_threshold
+
+    def filter(self, landmarks, confidence: float, timestamp: Optional[float] = None) -> np.ndarray:
+        """Añade la detección y devuelve los landmarks a mostrar"""
+        self.add_detection(landmarks, confidence, timestamp)
+        if self.should_use_detection():
+            return self.get_filtered_landmarks()
+        return self._latest().copy()
@@ -1,16 +1,57 @@
 """Training script for the ASL alphabet model."""
 
+import argparse
+import json
+import multiprocessing
 import os
-import sys
 import pickle
-from typing import List, Tuple
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import cv2
 import numpy as np
 import mediapipe as mp
 from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import FunctionTransformer
 
-LETTERS: List[str] = [chr(c) for c in range(ord("A"), ord("Z") + 1)]
+import evaluate_model
+import model_search
+from asl_classifier import export_linear_model
+from dedup_images import list_images, read_manifest as read_image_manifest
+from feature_shards import ShardWriter
+from feature_store import FeatureStore
+from hand_features import FEATURE_TRANSFORMS, landmarks_array
+
+
+# Images per task sent to a worker process
+CHUNK_SIZE = 64
+
+# Smallest image side kept when a JPEG is decoded at reduced resolution.
+# MediaPipe resizes to 192x192 (palm) and 224x224 (landmarks) anyway.
+MIN_DECODE_SIDE = 256
+
+# libjpeg can decode directly at 1/4 or 1/2 scale (largest factor first)
+_REDUCED_DECODE = ((4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+# Everything that affects the extracted landmarks; part of the feature
+# store key, so changing any of it invalidates cached features
+DETECTOR_CONFIG = {
+    "static_image_mode": True,
+    "max_num_hands": 1,
+    "min_detection_confidence": 0.5,
+    "crop": "center_square",
+    "min_decode_side": MIN_DECODE_SIDE,
+    "mediapipe": mp.__version__,
+}
+
+# One static-mode Hands instance per worker process (see _init_worker)
+_hands = None
+
+# Per-process buffers reused across images: raw file bytes and RGB crop
+_file_buffer = bytearray()
+_rgb_buffers: Dict[Tuple[int, int, int], np.ndarray] = {}
 
 
 def _center_crop_square(img: np.ndarray) -> np.ndarray:
@@ -24,67 +65,290 @@ def _center_crop_square(img: np.ndarray) -> np.ndarray:
     return img[y0 : y0 + side, x0 : x0 + side]
 
 
-def _extract_features(hand_landmarks) -> List[float]:
-    """Return a flat list of x, y, z coordinates from hand landmarks."""
-    feats: List[float] = []
-    for lm in hand_landmarks.landmark:
-        feats.extend([lm.x, lm.y, lm.z])
-    return feats
-
-
-def _load_dataset(data_dir: str) -> Tuple[np.ndarray, np.ndarray]:
-    """Load images and extract landmark features from the Kaggle dataset."""
-
-    features: List[List[float]] = []
-    labels: List[str] = []
-
-    mp_hands = mp.solutions.hands
-    with mp_hands.Hands(
-        static_image_mode=True,
-        max_num_hands=1,
-        min_detection_confidence=0.5,
-    ) as hands:
-        for letter in LETTERS:
-            letter_dir = os.path.join(data_dir, letter)
-            if not os.path.isdir(letter_dir):
-                print(f"Warning: directory '{letter_dir}' not found; skipping")
-                continue
-
-            for fname in os.listdir(letter_dir):
-                if not fname.lower().endswith((".jpg", ".jpeg", ".png")):
-                    continue
-                path = os.path.join(letter_dir, fname)
-                img = cv2.imread(path)
-                if img is None:
-                    continue
-                img = _center_crop_square(img)
-                img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                results = hands.process(img_rgb)
-                if not results.multi_hand_landmarks:
-                    continue
-                feats = _extract_features(results.multi_hand_landmarks[0])
-                features.append(feats)
-                labels.append(letter)
+def _list_images(data_dir: str, manifest: Optional[str] = None) -> List[Tuple[str, str]]:
+    """
+    Return (path, letter) for every image, in a deterministic order: the
+    images of a pruned manifest (see dedup_images.py) if given.
+    """
+    if manifest:
+        items = read_image_manifest(manifest, data_dir)
+        print(f"Image manifest {manifest}: {len(items)} images")
+        return items
+    return list_images(data_dir)
+
+
+def _init_worker() -> None:
+    """Create the worker's Hands instance once instead of per image."""
+    global _hands
+    # The pool already uses every core; keep OpenCV single-threaded per worker
+    cv2.setNumThreads(1)
+    _hands = mp.solutions.hands.Hands(
+        static_image_mode=DETECTOR_CONFIG["static_image_mode"],
+        max_num_hands=DETECTOR_CONFIG["max_num_hands"],
+        min_detection_confidence=DETECTOR_CONFIG["min_detection_confidence"],
+    )
+
+
+def _jpeg_size(data: memoryview) -> Optional[Tuple[int, int]]:
+    """Return (width, height) from a JPEG header without decoding the image."""
+    if data[:2] != b"\xff\xd8":
+        return None
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # markers without a length
+            i += 2
+            continue
+        # SOFn frame header (C4, C8 and CC are DHT, JPG and DAC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height = int.from_bytes(data[i + 5:i + 7], "big")
+            width = int.from_bytes(data[i + 7:i + 9], "big")
+            return width, height
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+    return None
+
+
+def _decode_flag(data: memoryview) -> int:
+    """Pick the cheapest decode that keeps at least MIN_DECODE_SIDE pixels."""
+    size = _jpeg_size(data)
+    if size is not None:
+        for factor, flag in _REDUCED_DECODE:
+            if min(size) // factor >= MIN_DECODE_SIDE:
+                return flag
+    return cv2.IMREAD_COLOR
+
+
+def _read_file(path: str) -> memoryview:
+    """Read ``path`` into the reusable file buffer."""
+    global _file_buffer
+    size = os.path.getsize(path)
+    if len(_file_buffer) < size:
+        _file_buffer = bytearray(size)
+    with open(path, "rb") as f:
+        read = f.readinto(memoryview(_file_buffer)[:size])
+    return memoryview(_file_buffer)[:read]
+
+
+def _load_image_rgb(path: str) -> Optional[np.ndarray]:
+    """
+    Decode ``path`` as a square RGB crop.
+
+    Large JPEGs are decoded at reduced resolution, the crop is a view of
+    the decoded BGR image, and the color conversion writes into a reused
+    buffer. The result is only valid until the next call.
+    """
+    data = _read_file(path)
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), _decode_flag(data))
+    if img is None:
+        return None
+    img = _center_crop_square(img)
+    buffer = _rgb_buffers.get(img.shape)
+    if buffer is None:
+        if len(_rgb_buffers) >= 8:
+            _rgb_buffers.clear()
+        buffer = _rgb_buffers[img.shape] = np.empty(img.shape, dtype=np.uint8)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=buffer)
 
+
+def _extract_image(path: str) -> Optional[List[float]]:
+    """Return the landmark features of one image, or None if no hand is found."""
+    img_rgb = _load_image_rgb(path)
+    if img_rgb is None:
+        return None
+    results = _hands.process(img_rgb)
+    if not results.multi_hand_landmarks:
+        return None
+    # Raw landmarks, as the server passes them; normalization is part of the model
+    return landmarks_array(results.multi_hand_landmarks[0]).ravel().tolist()
+
+
+def _extract_chunk(chunk: Sequence[Tuple[int, str]]) -> List[Tuple[int, Optional[List[float]]]]:
+    """Extract a chunk of (index, path) items; results keep their index."""
+    return [(index, _extract_image(path)) for index, path in chunk]
+
+
+def _load_dataset(data_dir: str, workers: int = 1, cache_dir: Optional[str] = None,
+                  manifest: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Load images and extract landmark features from the Kaggle dataset.
+
+    Images are processed in chunks by ``workers`` processes. Static-mode
+    detection makes every image independent of the others, and results are
+    put back in file order, so the output does not depend on the worker count.
+    With ``cache_dir`` only new or modified images go through MediaPipe; the
+    rest are read from the feature store. With ``manifest`` only the images
+    it lists are used.
+    """
+    items = _list_images(data_dir, manifest)
+    extracted: List[Optional[List[float]]] = [None] * len(items)
+
+    store = FeatureStore(cache_dir, DETECTOR_CONFIG) if cache_dir else None
+    keys: List[bytes] = []
+    pending = list(range(len(items)))
+    if store is not None:
+        keys = [store.key_for(path) for path, _ in items]
+        pending = []
+        for index, key in enumerate(keys):
+            if key in store:
+                extracted[index] = store.get(key)
+            else:
+                pending.append(index)
+        print(f"Feature cache: {len(items) - len(pending)}/{len(items)} images cached, "
+              f"{len(pending)} to extract")
+
+    chunks = [
+        [(index, items[index][0]) for index in pending[start:start + CHUNK_SIZE]]
+        for start in range(0, len(pending), CHUNK_SIZE)
+    ]
+
+    start_time = last_report = time.perf_counter()
+    done = 0
+
+    def collect(chunk_results):
+        nonlocal done, last_report
+        for index, feats in chunk_results:
+            extracted[index] = feats
+            if store is not None:
+                store.add(keys[index], feats)
+        done += len(chunk_results)
+        now = time.perf_counter()
+        if now - last_report >= 5.0 or done == len(pending):
+            rate = done / (now - start_time)
+            eta = (len(pending) - done) / rate if rate else 0.0
+            print(f"Extracted {done}/{len(pending)} images ({rate:.1f} images/sec, ETA {eta:.0f}s)")
+            last_report = now
+
+    # Spawning workers costs seconds; do not start more than there are chunks
+    workers = min(workers, len(chunks))
+    if chunks and workers <= 1:
+        _init_worker()
+        for chunk in chunks:
+            collect(_extract_chunk(chunk))
+    elif chunks:
+        # spawn: forking a process that already ran a MediaPipe graph crashes
+        # the child, and _init_worker may have run here (workers=1)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+            futures = [pool.submit(_extract_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                collect(future.result())
+    if store is not None:
+        store.flush()
+
+    features = [feats for feats in extracted if feats is not None]
+    labels = [letter for (_, letter), feats in zip(items, extracted) if feats is not None]
+    print(f"Hands found in {len(features)}/{len(items)} images")
     return np.array(features, dtype=np.float32), np.array(labels)
 
 
-def main(dataset_dir: str, out_model: str) -> None:
-    """Train a logistic regression model using MediaPipe hand landmarks."""
+def _search_model(X: np.ndarray, y: np.ndarray, workers: int, latency_budget_us: float,
+                  report_path: Optional[str]) -> Tuple[object, Optional[object]]:
+    """Run the model search; returns the selected (model, NumPy export or None)."""
+    report, selected = model_search.search(X, y, workers=workers, latency_budget_us=latency_budget_us)
+    model_search.print_report(report, selected, latency_budget_us)
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump({
+                "latency_budget_us": latency_budget_us,
+                "rows": len(X),
+                "candidates": [
+                    {key: value for key, value in row.items() if key not in ("model", "linear")}
+                    | {"selected": row is selected, "numpy_export": row["linear"] is not None}
+                    for row in report
+                ],
+            }, f, indent=2)
+        print(f"Search report written to {report_path}")
+    if selected is None:
+        raise SystemExit("No model fits the latency budget; raise --latency-budget-us")
+    return selected["model"], selected["linear"]
+
 
-    X, y = _load_dataset(dataset_dir)
+def main(dataset_dir: str, out_model: str, workers: int = 1,
+         cache_dir: Optional[str] = "feature_cache", shards_dir: Optional[str] = None,
+         search: bool = False, latency_budget_us: float = model_search.DEFAULT_LATENCY_BUDGET_US,
+         search_report: Optional[str] = None, features: str = "raw",
+         manifest: Optional[str] = None, eval_shards: Optional[str] = None) -> None:
+    """
+    Train a logistic regression model using MediaPipe hand landmarks
+    (optionally behind a hand_features transform), or with ``search`` the
+    most accurate candidate of model_search that fits the single-row
+    latency budget.
+    """
+
+    X, y = _load_dataset(dataset_dir, workers, cache_dir, manifest)
     if len(X) == 0:
         raise SystemExit("Dataset is empty or path is incorrect")
 
-    clf = LogisticRegression(max_iter=1000)
-    clf.fit(X, y)
+    if shards_dir:
+        # Labeled shards for out-of-core training (train_streaming.py)
+        writer = ShardWriter(shards_dir)
+        writer.add(X, y)
+        writer.close()
+        print(f"Features exported to shard set {shards_dir}")
+
+    if search:
+        clf, linear = _search_model(X, y, workers, latency_budget_us, search_report)
+    else:
+        transform = FEATURE_TRANSFORMS[features]
+        clf = LogisticRegression(max_iter=1000)
+        if transform is not None:
+            clf = make_pipeline(FunctionTransformer(transform), clf)
+        clf.fit(X, y)
+        linear = model_search.as_linear_classifier(clf)
     with open(out_model, 'wb') as f:
         pickle.dump(clf, f)
     print(f"Model saved to {out_model}")
 
+    # NumPy export loaded by the server (the pickle stays as fallback)
+    export_path = os.path.splitext(out_model)[0] + ".npz"
+    if linear is not None:
+        export_linear_model(linear, export_path)
+        print(f"Model exported to {export_path}")
+    elif os.path.exists(export_path):
+        # The server prefers the export; a stale one would shadow the new pickle
+        os.remove(export_path)
+        print(f"Selected model has no NumPy export; removed stale export {export_path}")
+
+    if eval_shards:
+        # Evaluate what the server will load: the export if there is one
+        report = evaluate_model.evaluate(export_path if linear is not None else out_model, eval_shards)
+        report_path = os.path.splitext(out_model)[0] + ".eval.json"
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+        evaluate_model.print_summary(report)
+        print(f"Evaluation report written to {report_path}")
+
 
 if __name__ == '__main__':
-    if len(sys.argv) != 3:
-        print('Usage: python train_model.py /path/to/asl_alphabet_train asl_model.pkl')
-        sys.exit(1)
-    main(sys.argv[1], sys.argv[2])
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('dataset_dir', help='path to asl_alphabet_train')
+    parser.add_argument('out_model', help='output pickle, e.g. asl_model.pkl')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='processes used for landmark extraction (default: all cores)')
+    parser.add_argument('--feature-cache', default='feature_cache',
+                        help='landmark feature store directory (default: feature_cache)')
+    parser.add_argument('--no-feature-cache', action='store_true',
+                        help='always run MediaPipe on every image')
+    parser.add_argument('--export-shards',
+                        help='also append the labeled features to this shard set (see train_streaming.py)')
+    parser.add_argument('--search', action='store_true',
+                        help='cross-validate several model families and normalizations (see model_search.py)')
+    parser.add_argument('--latency-budget-us', type=float, default=model_search.DEFAULT_LATENCY_BUDGET_US,
+                        help='with --search: max median single-row predict latency (default: %(default)s)')
+    parser.add_argument('--search-report', help='with --search: write the results as JSON to this file')
+    parser.add_argument('--features', choices=sorted(FEATURE_TRANSFORMS), default='raw',
+                        help='feature transform of the model (see hand_features.py; default: raw)')
+    parser.add_argument('--manifest',
+                        help='train only on the images of this pruned manifest (see dedup_images.py)')
+    parser.add_argument('--evaluate', metavar='SHARDS_DIR',
+                        help='evaluate the saved model on this held-out shard set (see evaluate_model.py)')
+    args = parser.parse_args()
+    cache_dir = None if args.no_feature_cache else args.feature_cache
+    main(args.dataset_dir, args.out_model, args.workers, cache_dir, args.export_shards,
+         args.search, args.latency_budget_us, args.search_report, args.features, args.manifest,
+         args.evaluate)
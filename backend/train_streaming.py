@@ -0,0 +1,265 @@
+"""
+Out-of-core training of the ASL letter classifier.
+
+Streams mini-batches from a labeled feature shard set (see
+``feature_shards``; ``train_model.py --export-shards`` writes one) into an
+``SGDClassifier`` with ``partial_fit``, so memory use does not grow with
+the dataset. SGD converges poorly on raw landmark coordinates, so a first
+streaming pass computes per-feature mean and standard deviation; training
+runs on standardized features and the scaling is folded back into the
+weights at the end, so the saved model takes raw features like the one
+``train_model.py`` produces. With ``--features hand`` the batches go
+through the same landmark normalization as ``train_model.py --features
+hand`` first (see ``hand_features``), and the saved model and export
+record it. Training state is checkpointed after every shard and can be
+resumed, and the classifier can be warm-started from the production model;
+a warm-started model keeps the feature transform of the model it starts
+from.
+With ``--augment N`` every batch is also trained on N randomly
+transformed copies (see ``landmark_augment``), generated per batch and
+never stored. The result is saved like ``train_model.py`` does: a pickle
+plus the NumPy export the server loads.
+
+Usage:
+    python train_streaming.py training_shards asl_model.pkl --epochs 5
+    python train_streaming.py training_shards asl_model.pkl --resume
+    python train_streaming.py training_shards asl_model.pkl --warm-start asl_model.npz
+    python train_streaming.py training_shards asl_model.pkl --augment 4
+    python train_streaming.py training_shards asl_model.pkl --features hand
+"""
+
+import argparse
+import os
+import pickle
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import sklearn
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import FunctionTransformer
+
+from asl_classifier import export_linear_model, model_feature_transform
+from feature_shards import iter_batches, read_manifest
+from hand_features import FEATURE_TRANSFORMS
+from landmark_augment import augment
+from model_registry import load_model_file
+from model_search import as_linear_classifier
+
+# partial_fit cannot take initial weights, so _warm_start fills
+# SGDClassifier's private averaging buffers; their layout was checked
+# against these scikit-learn releases
+_WARM_START_SKLEARN_VERSIONS = ("1.7", "1.8", "1.9")
+
+
+def _new_classifier(alpha: float, seed: int, fine_tune_eta: Optional[float] = None) -> SGDClassifier:
+    """
+    Logistic-loss averaged SGD classifier trained one mini-batch at a time.
+
+    Averaging smooths out the noisy late steps of the "optimal" schedule.
+    When fine-tuning a warm-started model that schedule starts with steps
+    large enough to wipe the initial weights, so a small constant rate is
+    used instead.
+    """
+    if fine_tune_eta is not None:
+        return SGDClassifier(loss="log_loss", alpha=alpha, learning_rate="constant", eta0=fine_tune_eta,
+                             average=True, random_state=seed)
+    return SGDClassifier(loss="log_loss", alpha=alpha, learning_rate="optimal", average=True,
+                         random_state=seed)
+
+
+def _feature_stats(shards_dir: str, batch_size: int,
+                   transform: Optional[Callable[[np.ndarray], np.ndarray]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-feature mean and standard deviation (after ``transform``), in one streaming pass."""
+    count, total, total_sq = 0, 0.0, 0.0
+    for _, X, _ in iter_batches(shards_dir, batch_size):
+        if transform is not None:
+            X = transform(X)
+        X = X.astype(np.float64)
+        count += len(X)
+        total = total + X.sum(axis=0)
+        total_sq = total_sq + np.square(X).sum(axis=0)
+    mean = total / count
+    std = np.sqrt(np.maximum(total_sq / count - np.square(mean), 0.0))
+    std[std < 1e-8] = 1.0
+    return mean.astype(np.float32), std.astype(np.float32)
+
+
+def _load_warm_start(path: str) -> Any:
+    """Linear model to warm-start from: its coef_ apply after its feature_transform."""
+    version = ".".join(sklearn.__version__.split(".")[:2])
+    if version not in _WARM_START_SKLEARN_VERSIONS:
+        raise SystemExit(f"--warm-start relies on SGDClassifier internals checked on scikit-learn "
+                         f"{', '.join(_WARM_START_SKLEARN_VERSIONS)}, not {sklearn.__version__}")
+    model = load_model_file(path)
+    if isinstance(model, Pipeline):
+        linear = as_linear_classifier(model)
+        if linear is None:
+            raise SystemExit(f"Warm-start model {path} is not an exportable linear pipeline "
+                             f"({' -> '.join(name for name, _ in model.steps)})")
+        return linear
+    if not hasattr(model, "coef_"):
+        raise SystemExit(f"Warm-start model {path} ({type(model).__name__}) is not a linear model")
+    return model
+
+
+def _warm_start(clf: SGDClassifier, model: Any, classes: np.ndarray, mean: np.ndarray,
+                std: np.ndarray, rows: int) -> None:
+    """
+    Initialize ``clf`` with the weights of a fitted linear model. ``mean``
+    and ``std`` must be those of the features the model's coef_ apply to.
+    """
+    model_classes = np.asarray(model.classes_).astype(str)
+    if not np.array_equal(model_classes, classes):
+        raise SystemExit(f"Warm-start model classes {model_classes.tolist()} "
+                         f"do not match the shard classes {classes.tolist()}")
+    coef = np.asarray(model.coef_, dtype=np.float64)
+    # Same scores on standardized features: w' = w * std, b' = b + w . mean.
+    # Same dtype as the float32 shard batches, as partial_fit would allocate.
+    clf.classes_ = classes
+    clf.coef_ = np.ascontiguousarray(coef * std, dtype=np.float32)
+    clf.intercept_ = np.asarray(model.intercept_ + coef @ mean, dtype=np.float32)
+    clf.n_features_in_ = clf.coef_.shape[1]
+    # Averaging buffers, as SGDClassifier allocates them on the first
+    # partial_fit; the average starts at the warm-start weights
+    clf._standard_coef = clf.coef_
+    clf._standard_intercept = clf.intercept_
+    clf._average_coef = clf.coef_.copy()
+    clf._average_intercept = clf.intercept_.copy()
+    # Weigh the warm-start weights in the running average like one epoch
+    clf.t_ = float(rows)
+
+
+def _fold_scaling(clf: SGDClassifier, mean: np.ndarray, std: np.ndarray) -> None:
+    """Make ``clf`` take raw features: w = w' / std, b = b' - w . mean."""
+    coef = clf.coef_ / std
+    clf.intercept_ = (clf.intercept_ - coef @ mean).astype(clf.intercept_.dtype)
+    clf.coef_ = coef.astype(clf.coef_.dtype)
+
+
+def _save_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    """Write the training state atomically."""
+    staging = path + ".tmp"
+    with open(staging, "wb") as f:
+        pickle.dump(state, f)
+    os.replace(staging, path)
+
+
+def train(shards_dir: str, epochs: int = 5, batch_size: int = 1024, alpha: float = 1e-6,
+          seed: int = 0, checkpoint: Optional[str] = None, resume: bool = False,
+          warm_start: Optional[str] = None, fine_tune_eta: float = 1e-4,
+          augment_copies: int = 0, feature_transform: Optional[str] = None) -> Any:
+    """
+    Train over the shard set and return the fitted model, which takes raw
+    features: the classifier, or a pipeline of the feature transform and
+    the classifier. ``feature_transform`` (a ``FEATURE_TRANSFORMS`` name)
+    defaults to the warm-start model's, or "raw".
+    """
+    manifest = read_manifest(shards_dir)
+    if not manifest["shards"]:
+        raise SystemExit(f"No feature shards in '{shards_dir}'")
+    classes = np.array(manifest["classes"])
+    total_rows = sum(shard["rows"] for shard in manifest["shards"])
+
+    if resume and checkpoint and os.path.exists(checkpoint):
+        with open(checkpoint, "rb") as f:
+            state = pickle.load(f)
+        clf, epoch, next_shard = state["classifier"], state["epoch"], state["next_shard"]
+        mean, std = state["mean"], state["std"]
+        feature_transform = state.get("feature_transform", "raw")
+        transform = FEATURE_TRANSFORMS[feature_transform]
+        print(f"Resuming from {checkpoint}: epoch {epoch + 1}, shard {next_shard}")
+    else:
+        source = _load_warm_start(warm_start) if warm_start else None
+        if source is not None:
+            source_transform = model_feature_transform(source)
+            if feature_transform not in (None, source_transform):
+                raise SystemExit(f"Warm-start model {warm_start} expects '{source_transform}' features, "
+                                 f"not '{feature_transform}'")
+            feature_transform = source_transform
+        feature_transform = feature_transform or "raw"
+        if feature_transform not in FEATURE_TRANSFORMS:
+            raise SystemExit(f"Unknown feature transform '{feature_transform}'")
+        transform = FEATURE_TRANSFORMS[feature_transform]
+
+        clf = _new_classifier(alpha, seed, fine_tune_eta if warm_start else None)
+        epoch, next_shard = 0, 0
+        mean, std = _feature_stats(shards_dir, batch_size, transform)
+        if source is not None:
+            _warm_start(clf, source, classes, mean, std, total_rows)
+            print(f"Warm-starting from {warm_start} ({feature_transform} features)")
+    prepare = (lambda X: X) if transform is None else transform
+
+    while epoch < epochs:
+        start_time = time.perf_counter()
+        seen = correct = 0
+        shard = None
+        for position, X, y in iter_batches(shards_dir, batch_size, seed, epoch, next_shard):
+            if position != shard:
+                if checkpoint and shard is not None:
+                    _save_checkpoint(checkpoint, {"classifier": clf, "epoch": epoch, "next_shard": position,
+                                                  "mean": mean, "std": std,
+                                                  "feature_transform": feature_transform})
+                shard = position
+                # Seeded per shard, like the shuffle, so resuming replays the same copies
+                rng = np.random.default_rng([seed, epoch, position])
+            scaled = (prepare(X) - mean) / std
+            # Progressive validation: score each batch before learning from it
+            if hasattr(clf, "coef_"):
+                correct += int(np.sum(clf.predict(scaled) == y))
+                seen += len(y)
+            clf.partial_fit(scaled, y, classes=classes)
+            for _ in range(augment_copies):
+                clf.partial_fit((prepare(augment(X, rng)) - mean) / std, y, classes=classes)
+
+        elapsed = time.perf_counter() - start_time
+        accuracy = f", progressive accuracy {correct / seen:.3f}" if seen else ""
+        print(f"Epoch {epoch + 1}/{epochs}: {total_rows * (1 + augment_copies) / elapsed:.0f} rows/sec{accuracy}")
+        epoch, next_shard = epoch + 1, 0
+        if checkpoint:
+            _save_checkpoint(checkpoint, {"classifier": clf, "epoch": epoch, "next_shard": 0,
+                                          "mean": mean, "std": std,
+                                          "feature_transform": feature_transform})
+
+    _fold_scaling(clf, mean, std)
+    if transform is None:
+        return clf
+    # Same form as train_model --features: the pipeline applies the transform
+    return make_pipeline(FunctionTransformer(transform), clf)
+
+
+def main(shards_dir: str, out_model: str, **kwargs) -> None:
+    model = train(shards_dir, **kwargs)
+    with open(out_model, "wb") as f:
+        pickle.dump(model, f)
+    print(f"Model saved to {out_model}")
+
+    export_path = os.path.splitext(out_model)[0] + ".npz"
+    export_linear_model(as_linear_classifier(model), export_path)
+    print(f"Model exported to {export_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("shards_dir", help="labeled feature shard set")
+    parser.add_argument("out_model", help="output pickle, e.g. asl_model.pkl")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--alpha", type=float, default=1e-6, help="L2 regularization strength")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <out_model>.ckpt)")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint")
+    parser.add_argument("--warm-start", help="initialize from a model (.npz export, directory or pickle)")
+    parser.add_argument("--fine-tune-eta", type=float, default=1e-4,
+                        help="constant learning rate used with --warm-start")
+    parser.add_argument("--augment", type=int, default=0, metavar="N",
+                        help="also train on N augmented copies of every batch")
+    parser.add_argument("--features", choices=sorted(FEATURE_TRANSFORMS),
+                        help="feature transform applied before training "
+                             "(default: the --warm-start model's, or raw)")
+    args = parser.parse_args()
+    main(args.shards_dir, args.out_model, epochs=args.epochs, batch_size=args.batch_size, alpha=args.alpha,
+         seed=args.seed, checkpoint=args.checkpoint or args.out_model + ".ckpt", resume=args.resume,
+         warm_start=args.warm_start, fine_tune_eta=args.fine_tune_eta, augment_copies=args.augment,
+         feature_transform=args.features)